@@ -1,19 +1,66 @@
 import time
 import json
+import math
 import gzip
-from functools import lru_cache
+import bisect
+import contextvars
+import cProfile
+import hashlib
+import heapq
+import hmac
+import io
+import marshal
+import pstats
+import random
+import re
+import shutil
+import sys
+import sqlite3
+import zlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import tempfile
+from urllib.parse import urlsplit
+from collections import Counter, OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import update_wrapper
+from itertools import count, islice
 import numpy as np
 import pandas as pd
+import click
 import requests
-from flask import Flask, request, render_template, Response, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, request, render_template, Response, jsonify, has_request_context, g
 import logging
 import os
+import threading
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits.storage import Storage as LimiterStorage
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+try:
+    import orjson
+except ImportError:  # orjson ist optional, json_bytes fällt auf die Standardbibliothek zurück
+    orjson = None
+try:
+    import brotli
+except ImportError:  # Brotli ist optional, gzip reicht als Fallback
+    brotli = None
+try:
+    import redis
+except ImportError:  # Nur für CACHE_BACKEND=redis://... nötig
+    redis = None
+try:
+    import fcntl
+except ImportError:  # Windows: nur Sperren innerhalb des Prozesses
+    fcntl = None
 
 app = Flask(__name__)
+# Speicher wird erst nach dem gemeinsamen Cache-Backend festgelegt (init_app weiter unten)
 limiter = Limiter(
-    app=app,
     key_func=get_remote_address,
     default_limits=["2000 per day", "50 per minute"]
 )
@@ -45,6 +92,577 @@ STATION_CITY_COLSPECS = [
 ]
 STATION_CITY_NAMES = ["ID", "LATITUDE", "LONGITUDE", "ELEVATION", "STATE", "NAME", "GSN_FLAG", "HCN_CRN_FLAG", "WMO_ID"]
 
+# HTTP-Zugriffe auf NOAA: Timeouts (Sekunden), Wiederholungen mit exponentiellem Backoff,
+# maximale gleichzeitige Verbindungen pro Host und Prozess
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 10))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 60))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 3))
+HTTP_BACKOFF_SECONDS = float(os.environ.get('HTTP_BACKOFF_SECONDS', 0.5))
+HTTP_MAX_PER_HOST = int(os.environ.get('HTTP_MAX_PER_HOST', 8))
+
+# Lokales Verzeichnis für Snapshots und Caches (leer = deaktiviert)
+CACHE_DIR = os.environ.get('WETTER_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'wetteranzeige'))
+
+INVENTORY_URL = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
+STATIONS_URL = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
+STATION_DATA_URL = os.environ.get('STATION_DATA_URL',
+                                  'https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/by_station/{station_id}.csv.gz')
+STATION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+# Obergrenze für den Festplatten-Cache der by_station-Dateien und Revalidierungsintervall
+STATION_CACHE_MAX_BYTES = int(os.environ.get('STATION_CACHE_MAX_BYTES', 1024 ** 3))
+STATION_CACHE_REVALIDATE_SECONDS = int(os.environ.get('STATION_CACHE_REVALIDATE_SECONDS', 24 * 3600))
+# Blockgröße (dekomprimierte Bytes) beim Einlesen der by_station-Dateien
+STATION_PARSE_CHUNK_BYTES = int(os.environ.get('STATION_PARSE_CHUNK_BYTES', 1024 * 1024))
+# Werte mit gesetztem Q-FLAG (Qualitätsprüfung fehlgeschlagen) verwerfen
+SKIP_QUALITY_FLAGGED = os.environ.get('SKIP_QUALITY_FLAGGED', '0') == '1'
+# Prozess-Pool für die Stationsverarbeitung (0 = im aufrufenden Thread rechnen)
+STATION_WORKERS = int(os.environ.get('STATION_WORKERS', 2))
+# Maximale Anzahl gleichzeitig offener Stationsberechnungen, danach 503
+STATION_QUEUE_SIZE = int(os.environ.get('STATION_QUEUE_SIZE', 32))
+STATION_TIMEOUT_SECONDS = float(os.environ.get('STATION_TIMEOUT_SECONDS', 120))
+STATION_RETRY_AFTER_SECONDS = int(os.environ.get('STATION_RETRY_AFTER_SECONDS', 5))
+# SQLite-Datei mit vorberechneten Stationszusammenfassungen (flask precompute)
+AGGREGATE_STORE_PATH = os.environ.get('AGGREGATE_STORE_PATH',
+                                      os.path.join(CACHE_DIR, 'aggregates.sqlite') if CACHE_DIR else '')
+# Gemeinsamer Speicher aller Worker für Stationszusammenfassungen und (ohne RATELIMIT_STORAGE_URI) Rate-Limits:
+# memory://, sqlite:// (im Cache-Verzeichnis), sqlite:///pfad/datei oder redis://host:port/db
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', '')
+# Speicher der Rate-Limits; leer = shared:// über CACHE_BACKEND, memory:// zählt pro Worker
+RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', '')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+SHARED_CACHE_TTL_SECONDS = int(os.environ.get('SHARED_CACHE_TTL_SECONDS', STATION_CACHE_REVALIDATE_SECONDS))
+# Batch-Endpoint: maximale Stationen pro Anfrage und parallel geladene Stationen.
+# Jede Station zählt gegen das Limit von 30 pro Minute, mehr passt nicht in eine Anfrage.
+BATCH_MAX_STATIONS = int(os.environ.get('BATCH_MAX_STATIONS', 30))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 8))
+# Antwortformate von /api/station_data: verschachtelte Dicts (Standard) oder parallele Arrays
+RESPONSE_FORMATS = ('nested', 'columnar')
+# Server-Timing-Header mit der Dauer der einzelnen Verarbeitungsschritte (verrät interne Abläufe, daher opt-in)
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
+# Abstand, in dem InventoryRefresher nach einer neuen Inventory-Version sucht (0 = aus)
+INVENTORY_REFRESH_SECONDS = float(os.environ.get('INVENTORY_REFRESH_SECONDS', 6 * 3600))
+
+# Profiling langsamer Anfragen (0 = aus): Stack-Sampling ab PROFILE_SLOW_MS Laufzeit,
+# cProfile für den Anteil PROFILE_SAMPLE_RATE aller Anfragen; die PROFILE_KEEP langsamsten bleiben erhalten
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 0))
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+# Bearer-Token für /admin/...; leer = nur von localhost erreichbar
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+# Speicherbudget für Stationszusammenfassungen samt serialisierten Fenstern (pro Prozess)
+STATION_SUMMARY_CACHE_BYTES = int(os.environ.get('STATION_SUMMARY_CACHE_BYTES', 256 * 1024 ** 2))
+# Serialisierte Antworten: Fenster pro Station im Speicher und Vorkomprimierung ab dieser Größe
+ENCODED_WINDOWS_PER_STATION = int(os.environ.get('ENCODED_WINDOWS_PER_STATION', 8))
+PRECOMPRESS_MIN_BYTES = 256
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class SingleFlightCache:
+    """
+    LRU-Cache für Funktionsergebnisse, der gleichzeitige Misses zusammenfasst:
+    pro Schlüssel läuft nur ein Loader, alle weiteren Aufrufer warten auf dessen Ergebnis.
+    Exceptions werden an alle Wartenden weitergereicht und nicht gecached.
+    Kompatibel zu lru_cache (cache_clear, cache_info).
+
+    Mit maxbytes und sizeof (Größe eines Werts in Bytes) wird zusätzlich nach Speicherbedarf
+    begrenzt; maxsize=None hebt die Begrenzung der Anzahl auf. Wächst ein gecachter Wert
+    nachträglich, meldet resized die neue Größe.
+    """
+
+    def __init__(self, func, maxsize: int = 128, maxbytes: int = None, sizeof=None):
+        update_wrapper(self, func)
+        self._func = func
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof if maxbytes is not None else None
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._inflight = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    @staticmethod
+    def _key(args, kwargs):
+        return args + tuple(sorted(kwargs.items())) if kwargs else args
+
+    def __call__(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._data[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self._stats['misses'] += 1
+                future = self._inflight[key] = Future()
+                generation = self._generation
+            else:
+                self._stats['coalesced'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = self._func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Nach cache_clear/discard während des Ladens wird das Ergebnis nicht mehr gespeichert
+            if generation == self._generation:
+                self._data[key] = value
+                self._set_size(key, size)
+                self._evict()
+        future.set_result(value)
+        return value
+
+    def _set_size(self, key, size: int):
+        self._bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _evict(self):
+        # Am längsten nicht genutzte Einträge zuerst
+        while self._data and ((self.maxsize is not None and len(self._data) > self.maxsize)
+                              or (self.maxbytes is not None and self._bytes > self.maxbytes)):
+            key, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key, 0)
+            self._stats['evictions'] += 1
+
+    def resized(self, *args, **kwargs):
+        """
+        Misst einen gecachten Wert neu und verdrängt bei Bedarf andere Einträge.
+        """
+        if self._sizeof is None:
+            return
+        key = self._key(args, kwargs)
+        value = self.peek(*args, **kwargs)
+        if value is None:
+            return
+        size = self._sizeof(value)
+        with self._lock:
+            if self._data.get(key) is value:
+                self._set_size(key, size)
+                self._evict()
+
+    def peek(self, *args, **kwargs):
+        """
+        Liefert den gecachten Wert ohne zu laden (None bei Miss).
+        """
+        with self._lock:
+            return self._data.get(self._key(args, kwargs))
+
+    def put(self, value, *args, **kwargs):
+        """
+        Legt value als Ergebnis für die Argumente ab und ersetzt einen vorhandenen Eintrag.
+        Ein gerade laufender Loader für dieselben Argumente überschreibt ihn nicht mehr.
+        """
+        key = self._key(args, kwargs)
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._set_size(key, size)
+            self._generation += 1
+            self._evict()
+
+    def discard(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        with self._lock:
+            self._data.pop(key, None)
+            self._bytes -= self._sizes.pop(key, 0)
+            self._generation += 1
+
+    def cache_clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._stats['hits'], self._stats['misses'], self.maxsize, len(self._data))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, currsize=len(self._data), inflight=len(self._inflight), maxsize=self.maxsize,
+                        bytes=self._bytes, maxbytes=self.maxbytes)
+
+
+def single_flight_cache(maxsize: int = 128, maxbytes: int = None, sizeof=None):
+    """
+    Dekorator-Variante von SingleFlightCache, analog zu functools.lru_cache.
+    """
+    return lambda func: SingleFlightCache(func, maxsize, maxbytes, sizeof)
+
+
+def _metric_line(name: str, labels: dict, value) -> str:
+    if labels:
+        escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for v in labels.values())
+        name += '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+    return f"{name} {value!r}" if isinstance(value, float) else f"{name} {value}"
+
+
+class Metrics:
+    """
+    Zähler und Laufzeit-Histogramme dieses Prozesses, ausgegeben im Prometheus-Textformat (GET /metrics).
+
+    span misst einen Verarbeitungsschritt (Schritte können verschachtelt sein). Während einer
+    Anfrage mit Server-Timing (start_request/finish_request) wird die Dauer zusätzlich pro Anfrage
+    gesammelt. Messungen im Prozess-Pool zeichnet capture auf, merge überträgt sie in den Webprozess.
+    """
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    STAGE_METRIC = 'wetteranzeige_stage_seconds'
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        # ContextVars statt threading.local, damit asyncio.to_thread die Anfrage mitnimmt
+        self._timings = contextvars.ContextVar('server_timing', default=None)
+        self._captures = contextvars.ContextVar('metrics_capture', default=None)
+
+    def after_fork(self):
+        # Messwerte des Elternprozesses (z.B. Vorladen im gunicorn-Master) bleiben erhalten
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        records = self._captures.get()
+        if records is not None:
+            records.append(('inc', name, amount, labels))
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[1] += seconds
+        timings = self._timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        records = self._captures.get()
+        if records is not None:
+            records.append(('observe', stage, seconds))
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def capture(self):
+        """
+        Liefert eine Liste, in der alle Messungen des Blocks zusätzlich aufgezeichnet werden (picklebar).
+        """
+        records = []
+        token = self._captures.set(records)
+        try:
+            yield records
+        finally:
+            self._captures.reset(token)
+
+    def merge(self, records: list):
+        for kind, *args in records:
+            if kind == 'inc':
+                name, amount, labels = args
+                self.inc(name, amount, **labels)
+            else:
+                self.observe(*args)
+
+    def start_request(self):
+        self._timings.set({})
+
+    def finish_request(self) -> dict:
+        """
+        Dauer je Schritt (Sekunden) seit start_request, in der Reihenfolge der Messungen.
+        """
+        timings = self._timings.get()
+        self._timings.set(None)
+        return timings or {}
+
+    def counter(self, name: str, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, stage: str) -> tuple:
+        """
+        (Anzahl, Summe in Sekunden) der Messungen eines Schritts.
+        """
+        with self._lock:
+            counts, total = self._histograms.get(stage, ([0], 0.0))
+            return sum(counts), total
+
+    def render(self, samples: list = ()) -> str:
+        """
+        Prometheus-Textformat (Version 0.0.4). samples sind zusätzliche (name, typ, labels, wert),
+        etwa aus den stats() der Caches.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = {stage: (list(counts), total) for stage, (counts, total) in self._histograms.items()}
+        families = OrderedDict()
+        for (name, labels), value in counters:
+            families.setdefault((name, 'counter'), []).append((dict(labels), value))
+        for name, kind, labels, value in samples:
+            families.setdefault((name, kind), []).append((labels, value))
+        lines = []
+        for (name, kind), values in families.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_metric_line(name, labels, value) for labels, value in values)
+        if histograms:
+            name = self.STAGE_METRIC
+            lines.append(f"# HELP {name} Laufzeit einzelner Verarbeitungsschritte")
+            lines.append(f"# TYPE {name} histogram")
+            for stage in sorted(histograms):
+                counts, total = histograms[stage]
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if math.isinf(bound) else repr(float(bound))
+                    lines.append(_metric_line(name + '_bucket', {'stage': stage, 'le': le}, cumulative))
+                lines.append(_metric_line(name + '_sum', {'stage': stage}, total))
+                lines.append(_metric_line(name + '_count', {'stage': stage}, cumulative))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def server_timing(timings: dict) -> str:
+    """
+    Wert des Server-Timing-Headers (Dauer in Millisekunden).
+    """
+    return ', '.join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def collapse_stack(frame) -> str:
+    """
+    Stack im collapsed-Format (äußerster Aufruf zuerst, mit ";" getrennt), wie es
+    flamegraph.pl und speedscope einlesen.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:"
+                     f"{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Sampling-Profiler: ein Hintergrund-Thread liest alle interval Sekunden die Stacks der
+    angemeldeten Threads (sys._current_frames) und zählt sie im collapsed-Format.
+    Der profilierte Code läuft unverändert; ohne angemeldete Threads schläft der Sampler.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.after_fork()
+
+    def after_fork(self):
+        # Der Sampler-Thread existiert im Kindprozess nicht mehr
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = {}
+        self._thread = None
+
+    def start(self) -> Counter:
+        """
+        Meldet den aufrufenden Thread an; die gezählten Stacks landen im gelieferten Counter.
+        """
+        stacks = Counter()
+        with self._lock:
+            self._threads[threading.get_ident()] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return stacks
+
+    def stop(self) -> Counter:
+        with self._lock:
+            return self._threads.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._threads:
+                    self._wakeup.wait()
+                targets = list(self._threads)
+            frames = sys._current_frames()
+            samples = [(ident, collapse_stack(frames[ident])) for ident in targets if ident in frames]
+            del frames
+            with self._lock:
+                for ident, stack in samples:
+                    if ident in self._threads:
+                        self._threads[ident][stack] += 1
+            time.sleep(self.interval)
+
+    @contextmanager
+    def sample(self):
+        """
+        Sampelt den aufrufenden Thread für die Dauer des Blocks.
+        """
+        stacks = self.start()
+        try:
+            yield stacks
+        finally:
+            self.stop()
+
+
+class RequestProfiler:
+    """
+    Opt-in-Profiling einzelner Anfragen.
+
+    Mit slow_ms > 0 wird jede Anfrage per StackSampler gesampelt und das Profil behalten,
+    wenn sie mindestens slow_ms gedauert hat. Mit sample_rate > 0 läuft für diesen Anteil
+    der Anfragen stattdessen cProfile (Ergebnis als pstats). Aufbewahrt werden die keep
+    langsamsten Profile; ist der Puffer voll, verdrängt ein langsameres Profil das schnellste.
+    Ist beides 0, kostet der Hook pro Anfrage nur eine Abfrage von enabled.
+    """
+
+    def __init__(self, slow_ms: float = PROFILE_SLOW_MS, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, keep: int = PROFILE_KEEP):
+        self.slow_seconds = slow_ms / 1000
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.sampler = StackSampler(interval_ms / 1000)
+        self._lock = threading.Lock()
+        self._profiles = []
+        self._ids = count(1)
+        self._current = contextvars.ContextVar('request_profile', default=None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.slow_seconds > 0 or self.sample_rate > 0
+
+    def after_fork(self):
+        self.sampler.after_fork()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Beginnt das Profiling der Anfrage im aufrufenden Thread; None, wenn sie nicht profiliert wird.
+        """
+        if not self.enabled:
+            return None
+        state = {'started': time.perf_counter(), 'stacks': None, 'cprofile': None}
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                state['cprofile'] = profile
+            except ValueError:  # Ein anderer Profiler ist bereits aktiv
+                pass
+        if state['cprofile'] is None:
+            if self.slow_seconds <= 0:
+                return None
+            state['stacks'] = self.sampler.start()
+        self._current.set(state)
+        return state
+
+    def add_stacks(self, stacks: dict, root: str):
+        """
+        Ordnet anderswo gesampelte Stacks (z.B. aus dem Prozess-Pool) der laufenden Anfrage zu.
+        """
+        state = self._current.get()
+        if state is None or not stacks:
+            return
+        extra = state.setdefault('extra', Counter())
+        for stack, samples in stacks.items():
+            extra[f"{root};{stack}"] += samples
+
+    def finish(self, state: dict, label: str):
+        self._current.set(None)
+        duration = time.perf_counter() - state['started']
+        profile = state['cprofile']
+        if profile is not None:
+            profile.disable()
+            profile.create_stats()
+            stacks = Counter()
+        else:
+            stacks = self.sampler.stop()
+            if duration < self.slow_seconds:
+                return None
+        stacks.update(state.get('extra', {}))
+        record = {
+            'id': next(self._ids),
+            'label': label,
+            'mode': 'sampled' if profile is not None else 'slow',
+            'duration_ms': round(duration * 1000, 1),
+            'time': time.time(),
+            'samples': sum(stacks.values()),
+            'stacks': stacks,
+            'cprofile': profile,
+        }
+        entry = (duration, record['id'], record)
+        with self._lock:
+            if len(self._profiles) < self.keep:
+                heapq.heappush(self._profiles, entry)
+            elif self._profiles and duration > self._profiles[0][0]:
+                heapq.heapreplace(self._profiles, entry)
+            else:
+                return None
+        return record
+
+    def profiles(self) -> list:
+        """
+        Übersicht der aufbewahrten Profile, langsamstes zuerst.
+        """
+        with self._lock:
+            records = [record for _, _, record in sorted(self._profiles, reverse=True)]
+        return [dict({key: record[key] for key in ('id', 'label', 'mode', 'duration_ms', 'time', 'samples')},
+                     pstats=record['cprofile'] is not None) for record in records]
+
+    def get(self, profile_id: int):
+        with self._lock:
+            return next((record for _, _, record in self._profiles if record['id'] == profile_id), None)
+
+
+def profile_output(record: dict, fmt: str) -> tuple:
+    """
+    Ein Profil als (Body, Content-Type): collapsed (Stacks mit Anzahl Samples),
+    pstats (marshal, lesbar mit pstats.Stats) oder text (pstats-Auswertung nach kumulierter Zeit).
+    """
+    if fmt == 'collapsed':
+        lines = (f"{stack} {samples}" for stack, samples in record['stacks'].most_common())
+        return '\n'.join(lines) + '\n', 'text/plain; charset=utf-8'
+    profile = record['cprofile']
+    if profile is None:
+        raise ValueError("Profile has no pstats data, use format=collapsed")
+    if fmt == 'pstats':
+        return marshal.dumps(profile.stats), 'application/octet-stream'
+    if fmt == 'text':
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(50)
+        return out.getvalue(), 'text/plain; charset=utf-8'
+    raise ValueError(f"Unknown format: {fmt!r}")
+
+
+profiler = RequestProfiler()
+
 
 # Hilfsfunktionen
 def haversine(lat1, lon1, lat2, lon2):
@@ -61,49 +679,667 @@ def haversine(lat1, lon1, lat2, lon2):
 def replace_nan_with_none(obj):
     """
     Ersetzt in einem verschachtelten Objekt (dict, list) alle NaN-Werte durch None.
+    Für Antworten json_bytes verwenden, das NaN ohne zusätzlichen Durchlauf behandelt.
     """
     if isinstance(obj, dict):
         return {k: replace_nan_with_none(v) for k, v in obj.items()}
     elif isinstance(obj, list):
         return [replace_nan_with_none(item) for item in obj]
-    elif isinstance(obj, (float, np.floating)) and np.isnan(obj):
+    elif isinstance(obj, (float, np.floating)) and obj != obj:
+        return None
+    return obj
+
+
+def _finite_list(values: np.ndarray) -> list:
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    result = values.astype(object)
+    result[~np.isfinite(values)] = None
+    return result.tolist()
+
+
+def _finite(obj):
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_finite(item) for item in obj]
+    elif isinstance(obj, float) and not math.isfinite(obj):
         return None
     return obj
 
 
-@lru_cache(maxsize=1)
-def read_ghcnd_stations(url: str) -> pd.DataFrame:
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return _finite_list(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_bytes(obj) -> bytes:
+    """
+    Serialisiert obj kompakt nach JSON, NaN und ±inf werden zu null. Schlüssel werden
+    wie bei jsonify sortiert, damit die Reihenfolge in den Antworten gleich bleibt.
+    Mit orjson passiert das in einem Durchlauf in C; ohne orjson wird nur dann
+    rekursiv bereinigt, wenn der schnelle Versuch an einem nicht-endlichen Wert scheitert.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    try:
+        return json.dumps(obj, separators=(',', ':'), sort_keys=True, allow_nan=False, default=_json_default).encode('utf-8')
+    except ValueError:
+        return json.dumps(_finite(obj), separators=(',', ':'), sort_keys=True, default=_json_default).encode('utf-8')
+
+
+class HttpFetcher:
+    """
+    Gemeinsame HTTP-Schicht für alle NOAA-Abrufe: eine Session mit Connection-Pool (Keep-Alive),
+    Connect-/Read-Timeouts, begrenzte Wiederholungen mit Backoff bei Verbindungsfehlern und
+    429/5xx (Retry-After wird beachtet) sowie eine Obergrenze gleichzeitiger Anfragen pro Host.
+    """
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, connect_timeout: float = HTTP_CONNECT_TIMEOUT, read_timeout: float = HTTP_READ_TIMEOUT,
+                 retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF_SECONDS,
+                 max_per_host: int = HTTP_MAX_PER_HOST):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_per_host = max_per_host
+        self._retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=self.RETRY_STATUS,
+                            allowed_methods=frozenset({'GET', 'HEAD'}), raise_on_status=False)
+        self._stats = {'requests': 0, 'errors': 0, 'throttled': 0}
+        self.reset()
+
+    def reset(self):
+        """
+        Neue Session und neue Host-Slots. Nach einem fork aufgerufen, damit der Kindprozess
+        keine Keep-Alive-Verbindungen oder belegten Semaphoren des Elternprozesses übernimmt.
+        """
+        adapter = HTTPAdapter(pool_maxsize=self.max_per_host, max_retries=self._retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._hosts[host]
+
+    @contextmanager
+    def request(self, method: str, url: str, **kwargs):
+        """
+        Führt eine Anfrage aus und liefert die Response; beim Verlassen wird sie geschlossen
+        und die Verbindung geht zurück in den Pool. Der Host-Slot bleibt belegt, solange
+        der Body gestreamt wird.
+        """
+        slot = self._slot(url)
+        if not slot.acquire(blocking=False):
+            with self._lock:
+                self._stats['throttled'] += 1
+            slot.acquire()
+        try:
+            with self._lock:
+                self._stats['requests'] += 1
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException:
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            with response:
+                yield response
+        finally:
+            slot.release()
+
+    def get_bytes(self, url: str) -> bytes:
+        with self.request('GET', url) as response:
+            response.raise_for_status()
+            return response.content
+
+
+http_fetcher = HttpFetcher()
+
+
+def open_source(url: str, kind: str = 'source'):
+    """
+    Öffnet eine Quelldatei: HTTP(S) über http_fetcher, alles andere als lokaler Pfad.
+    kind benennt Messpunkt und Download-Zähler (inventory, stations).
+    """
+    if url.startswith(('http://', 'https://')):
+        with metrics.span(f"{kind}_download"):
+            data = http_fetcher.get_bytes(url)
+        metrics.inc('wetteranzeige_downloaded_bytes_total', len(data), source=kind)
+        return io.BytesIO(data)
+    return url
+
+
+def source_validator(url: str, kind: str = 'source'):
+    """
+    Liefert einen Validator (ETag/Last-Modified bzw. mtime/Größe bei lokalen Dateien),
+    der sich ändert, sobald sich die Quelldatei ändert. None, falls die Quelle nicht erreichbar ist.
+    """
+    try:
+        with metrics.span(f"{kind}_validate"):
+            if url.startswith(('http://', 'https://')):
+                with http_fetcher.request('HEAD', url, allow_redirects=True) as response:
+                    response.raise_for_status()
+                    return response.headers.get('ETag') or response.headers.get('Last-Modified')
+            stat = os.stat(url)
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+    except (requests.RequestException, OSError) as e:
+        app.logger.warning(f"Validator für {url} nicht verfügbar: {e}")
+        return None
+
+
+# Ändert sich das Format der Snapshot-Spalten, werden ältere Snapshots ignoriert und neu geparst
+SNAPSHOT_FORMAT = 2
+
+
+def _snapshot_dir(kind: str, url: str) -> str:
+    return os.path.join(CACHE_DIR, 'snapshots', f"{kind}-{hashlib.sha1(url.encode()).hexdigest()[:16]}")
+
+
+def load_snapshot(kind: str, url: str, validator):
+    """
+    Lädt einen Snapshot als Dictionary von (memory-mapped) NumPy-Arrays.
+    Ist kein Validator bekannt (Quelle offline), wird der neueste vorhandene Snapshot verwendet.
+    """
+    if not CACHE_DIR:
+        return None
+    base = _snapshot_dir(kind, url)
+    try:
+        generations = sorted(os.scandir(base), key=lambda e: e.stat().st_mtime, reverse=True)
+    except OSError:
+        return None
+    for entry in generations:
+        try:
+            with open(os.path.join(entry.path, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta.get('format') != SNAPSHOT_FORMAT or (validator is not None and meta['validator'] != validator):
+                continue
+            return {col: np.load(os.path.join(entry.path, f"{col}.npy"), mmap_mode='r')
+                    for col in meta['columns']}
+        except (OSError, ValueError, KeyError):
+            continue
+    return None
+
+
+def save_snapshot(kind: str, url: str, validator, columns: dict):
+    """
+    Schreibt einen Snapshot (eine .npy-Datei pro Spalte) atomar in das Cache-Verzeichnis
+    und entfernt ältere Generationen.
+    """
+    if not CACHE_DIR or validator is None:
+        return
+    base = _snapshot_dir(kind, url)
+    try:
+        os.makedirs(base, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=base, prefix='.tmp-')
+        for col, values in columns.items():
+            np.save(os.path.join(tmp, f"{col}.npy"), values)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'url': url, 'validator': validator, 'format': SNAPSHOT_FORMAT, 'columns': list(columns)}, f)
+        target = os.path.join(base, hashlib.sha1(validator.encode()).hexdigest()[:16])
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp, target)
+        for entry in os.scandir(base):
+            if entry.path != target:
+                shutil.rmtree(entry.path, ignore_errors=True)
+    except OSError as e:
+        app.logger.warning(f"Snapshot für {url} konnte nicht geschrieben werden: {e}")
+
+
+# Fehlende Jahresangaben in den int16-Spalten der Stationstabelle
+MISSING_YEAR = int(np.iinfo(np.int16).min)
+
+
+def _byte_strings(values) -> np.ndarray:
+    # Strings als UTF-8-Bytes fester Breite: ein zusammenhängender Puffer statt eines Python-Objekts
+    # pro Zeile, der sich außerdem memory-mappen lässt
+    values = np.asarray(values)
+    if values.dtype.kind == 'S':
+        return values
+    return np.char.encode(values.astype(str), 'utf-8')
+
+
+def _year_column(values) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype == np.int16:
+        return values
+    years = values.astype(np.float64)
+    return np.where(np.isnan(years), MISSING_YEAR, years).astype(np.int16)
+
+
+def _decode_ids(ids: np.ndarray) -> list:
+    return [station_id.decode('utf-8') for station_id in ids.tolist()]
+
+
+def station_name_columns(ids, names) -> dict:
+    """
+    Spalten der Stationsliste mit Namen als Kategorien: jeder Name einmal (sortiert in NAMES),
+    pro Station nur dessen Nummer (NAME_CODE).
+    """
+    categories, codes = np.unique(_byte_strings(names), return_inverse=True)
+    return {'ID': _byte_strings(ids), 'NAME_CODE': codes.reshape(-1).astype(np.int32), 'NAMES': categories}
+
+
+# Validator der Quelle, aus der die gecachte Version jeder URL stammt (für InventoryRefresher)
+_source_validators = {}
+
+
+@single_flight_cache(maxsize=1)
+def read_station_table(inventory_url: str, stations_url: str) -> 'StationTable':
+    """
+    Reads the GHCND Inventory (only stations with the ELEMENT 'TMIN' or 'TMAX') and the
+    station list and joins both into one StationTable.
+    Both sources are kept as local snapshots until they change;
+    newer versions are swapped in by InventoryRefresher.
+    """
+    validators = {inventory_url: source_validator(inventory_url, 'inventory'),
+                  stations_url: source_validator(stations_url, 'stations')}
+    _source_validators.update(validators)
+    return load_station_table(inventory_url, stations_url, validators)
+
+
+def load_station_table(inventory_url: str, stations_url: str, validators: dict) -> 'StationTable':
+    """
+    Baut die Stationstabelle zu den Validatoren der Quellen aus Snapshots oder den Quelldateien
+    (ohne Cache im Speicher).
+    """
+    return StationTable.from_columns(load_ghcnd_stations(inventory_url, validators.get(inventory_url)),
+                                     load_station_cities(stations_url, validators.get(stations_url)))
+
+
+def load_ghcnd_stations(url: str, validator) -> dict:
     """
-    Reads and parses the GHCND Inventory file from the given URL,
-    and only keeps records with the ELEMENT 'TMIN' or 'TMAX'.
+    Liefert die Inventory-Spalten zum Validator aus dem Snapshot oder parst die Quelle neu.
     """
+    with metrics.span('inventory_snapshot_load'):
+        snapshot = load_snapshot('inventory', url, validator)
+    if snapshot is not None:
+        app.logger.info(f"Inventory aus Snapshot geladen ({len(snapshot['ID'])} Stationen)")
+        return snapshot
+
     app.logger.info("Lade Inventory-Datei von URL (Cache miss)")
-    df = pd.read_fwf(url, colspecs=GHCND_COLSPECS, header=None, names=GHCND_NAMES)
+    source = open_source(url, 'inventory')
+    with metrics.span('inventory_parse'):
+        df = pd.read_fwf(source, colspecs=GHCND_COLSPECS, header=None, names=GHCND_NAMES)
 
-    # Filter rows: keep only rows where ELEMENT is 'TMIN' or 'TMAX'
-    df = df[df['ELEMENT'].isin(['TMIN', 'TMAX'])]
+        # Filter rows: keep only rows where ELEMENT is 'TMIN' or 'TMAX'
+        df = df[df['ELEMENT'].isin(['TMIN', 'TMAX'])]
 
-    # Convert columns to numeric types
-    for col in ['LATITUDE', 'LONGITUDE', 'FIRSTYEAR', 'LASTYEAR']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+        # Convert columns to numeric types
+        for col in ['LATITUDE', 'LONGITUDE', 'FIRSTYEAR', 'LASTYEAR']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
 
-    # Remove rows with missing essential values
-    df = df.dropna(subset=['ID', 'LATITUDE', 'LONGITUDE'])
+        # Remove rows with missing essential values
+        df = df.dropna(subset=['ID', 'LATITUDE', 'LONGITUDE'])
 
-    # Remove duplicate station entries (only one per station)
-    df_unique = df.drop_duplicates(subset=['ID'])
+        # Remove duplicate station entries (only one per station)
+        df_unique = df.drop_duplicates(subset=['ID']).reset_index(drop=True)
+        columns = {
+            'ID': _byte_strings(df_unique['ID']),
+            'LATITUDE': df_unique['LATITUDE'].to_numpy(dtype=np.float32),
+            'LONGITUDE': df_unique['LONGITUDE'].to_numpy(dtype=np.float32),
+            'FIRSTYEAR': _year_column(df_unique['FIRSTYEAR']),
+            'LASTYEAR': _year_column(df_unique['LASTYEAR']),
+        }
     app.logger.info(f"Es wurden {len(df_unique)} eindeutige Stationen geladen")
-    return df_unique
 
+    with metrics.span('inventory_snapshot_save'):
+        save_snapshot('inventory', url, validator, columns)
+    return columns
+
+
+def load_station_cities(csv_url_city: str, validator) -> dict:
+    """
+    Liest die Fixed-Width-Datei mit Stationsmetadaten und liefert Station IDs und Namen
+    als Spalten von station_name_columns, aus dem Snapshot oder neu geparst.
+    """
+    with metrics.span('stations_snapshot_load'):
+        snapshot = load_snapshot('stations', csv_url_city, validator)
+    if snapshot is not None:
+        return snapshot
+
+    source = open_source(csv_url_city, 'stations')
+    with metrics.span('stations_parse'):
+        df = pd.read_fwf(source, colspecs=STATION_CITY_COLSPECS, header=None, names=STATION_CITY_NAMES)
+        columns = station_name_columns(df["ID"].fillna('').str.strip(), df["NAME"].fillna('').str.strip())
+    with metrics.span('stations_snapshot_save'):
+        save_snapshot('stations', csv_url_city, validator, columns)
+    return columns
+
+
+class StationTable:
+    """
+    Kompakte Stationstabelle aus Inventory und Stationsnamen, eine Zeile pro Station.
+
+    Alle Spalten sind NumPy-Arrays ohne Python-Objekte pro Zeile: IDs als Bytes fester Breite,
+    Koordinaten als float32, Jahre als int16 (MISSING_YEAR, falls unbekannt) und Namen als
+    Kategorien (NAME_CODE je Station, -1 ohne Namen). Aus Snapshots geladene Spalten bleiben
+    memory-mapped. Die Zeile zu einer Station ID liefert ein Hash-Index mit offener
+    Adressierung (FNV-1a, lineares Sondieren) anstelle eines Dictionaries.
+    """
+    # NOAA gibt Koordinaten mit 4 Nachkommastellen an; darauf gerundet liefern die float32-Spalten
+    # wieder genau die Werte der Quelldatei
+    COORD_DECIMALS = 4
+    UNKNOWN_CITY = "Unknown"
+    _FNV_OFFSET = 0xcbf29ce484222325
+    _FNV_PRIME = 0x100000001b3
+
+    def __init__(self, ids, lat, lon, firstyear, lastyear, name_codes=None, names=None):
+        self.ids = _byte_strings(ids)
+        self.lat = np.asarray(lat, dtype=np.float32)
+        self.lon = np.asarray(lon, dtype=np.float32)
+        self.firstyear = _year_column(firstyear)
+        self.lastyear = _year_column(lastyear)
+        if name_codes is None:
+            name_codes = np.full(len(self.ids), -1, dtype=np.int32)
+        self.name_codes = np.asarray(name_codes, dtype=np.int32)
+        self.names = _byte_strings([] if names is None else names)
+        self._slots = self._build_slots()
+
+    @classmethod
+    def from_columns(cls, inventory, stations: dict = None) -> 'StationTable':
+        """
+        Baut die Tabelle aus den Inventory-Spalten (ID, LATITUDE, LONGITUDE, FIRSTYEAR, LASTYEAR;
+        Snapshot oder DataFrame) und ordnet über die ID die Namen aus den Spalten von
+        station_name_columns zu.
+        """
+        ids = _byte_strings(inventory['ID'])
+        name_codes = names = None
+        if stations is not None:
+            station_ids = _byte_strings(stations['ID'])
+            names = stations['NAMES']
+            if len(station_ids):
+                order = np.argsort(station_ids, kind='stable')
+                rows = order[np.minimum(np.searchsorted(station_ids, ids, sorter=order), len(order) - 1)]
+                name_codes = np.where(station_ids[rows] == ids, np.asarray(stations['NAME_CODE'])[rows], -1)
+        return cls(ids, inventory['LATITUDE'], inventory['LONGITUDE'], inventory['FIRSTYEAR'],
+                   inventory['LASTYEAR'], name_codes, names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in (self.ids, self.lat, self.lon, self.firstyear, self.lastyear,
+                                                self.name_codes, self.names, self._slots))
+
+    @classmethod
+    def _hash(cls, ids: np.ndarray) -> np.ndarray:
+        # FNV-1a über die Bytes jeder ID; die Nullbytes der Auffüllung zählen nicht mit
+        hashes = np.full(len(ids), cls._FNV_OFFSET, dtype=np.uint64)
+        for octet in ids.view(np.uint8).reshape(len(ids), ids.dtype.itemsize).T:
+            hashes = np.where(octet != 0, (hashes ^ octet) * np.uint64(cls._FNV_PRIME), hashes)
+        return hashes
+
+    @classmethod
+    def _hash_key(cls, key: bytes) -> int:
+        value = cls._FNV_OFFSET
+        for octet in key:
+            value = ((value ^ octet) * cls._FNV_PRIME) & 0xFFFFFFFFFFFFFFFF
+        return value
+
+    def _build_slots(self) -> np.ndarray:
+        # Mindestens doppelt so viele Slots wie Zeilen halten die Sondierfolgen kurz
+        size = 1 << max(2 * len(self.ids) - 1, 1).bit_length()
+        mask = size - 1
+        slots = np.full(size, -1, dtype=np.int32)
+        rows = np.arange(len(self.ids))
+        home = (self._hash(self.ids) & np.uint64(mask)).astype(np.int64)
+        # Einfügen in Runden: jede offene Zeile versucht ihren nächsten Slot, je freiem Slot gewinnt die erste
+        while len(rows):
+            free = np.flatnonzero(slots[home] == -1)
+            claimed, first = np.unique(home[free], return_index=True)
+            slots[claimed] = rows[free[first]]
+            waiting = np.ones(len(rows), dtype=bool)
+            waiting[free[first]] = False
+            rows, home = rows[waiting], (home[waiting] + 1) & mask
+        return slots
+
+    def position(self, station_id: str):
+        """
+        Liefert die Zeilenposition einer Station (None, falls nicht enthalten).
+        """
+        key = station_id.encode('utf-8')
+        mask = len(self._slots) - 1
+        slot = self._hash_key(key) & mask
+        while True:
+            row = int(self._slots[slot])
+            if row < 0:
+                return None
+            if self.ids[row] == key:
+                return row
+            slot = (slot + 1) & mask
+
+    def station_id(self, position: int) -> str:
+        return self.ids[position].decode('utf-8')
+
+    def coordinates(self, positions) -> tuple:
+        """
+        Breiten- und Längengrade der Zeilen (Position, Array oder Slice) als float64.
+        """
+        return (np.round(self.lat[positions].astype(np.float64), self.COORD_DECIMALS),
+                np.round(self.lon[positions].astype(np.float64), self.COORD_DECIMALS))
+
+    def city(self, position: int) -> str:
+        code = self.name_codes[position]
+        return self.names[code].decode('utf-8') if code >= 0 else self.UNKNOWN_CITY
 
-@lru_cache(maxsize=1)
-def read_station_cities(csv_url_city: str) -> dict:
+
+class StationIndex:
+    """
+    Räumlicher Index über die Stationskoordinaten einer StationTable mit integrierter Jahresabdeckung.
+
+    Die Stationen werden in ein Gitter aus CELL_DEG x CELL_DEG Grad großen Zellen
+    einsortiert (CSR-Layout: Stationen nach Zelle sortiert plus Startoffsets je Zelle).
+    Innerhalb einer Zelle sind die Stationen zusätzlich nach FIRSTYEAR sortiert, so dass
+    die Stationen mit FIRSTYEAR <= firstyear per Binärsuche als Präfix der Zelle gefunden werden.
+    Eine Radiusabfrage berechnet nur für diese Kandidaten die exakte Haversine-Distanz.
+    """
+    CELL_DEG = 1.0
+    EARTH_RADIUS_KM = 6371.0
+    # Kleiner Sicherheitsrand gegen Rundungsfehler an Zellgrenzen
+    _PAD_DEG = 1e-6
+    # Sortierschlüssel: Zelle * _YEAR_SLOTS + FIRSTYEAR, fehlende Jahre landen am Zellende
+    _YEAR_SLOTS = 1 << 14
+    _NO_YEAR = _YEAR_SLOTS - 1
+
+    def __init__(self, table: StationTable):
+        self.table = table
+        self.n_lat = int(round(180 / self.CELL_DEG))
+        self.n_lon = int(round(360 / self.CELL_DEG))
+
+        lat, lon = table.coordinates(slice(None))
+        cells = self._lat_bin(lat) * self.n_lon + self._lon_bin(lon)
+        first = np.where(table.firstyear == MISSING_YEAR, self._NO_YEAR,
+                         np.clip(table.firstyear, 0, self._NO_YEAR - 1)).astype(np.int64)
+        keys = cells * self._YEAR_SLOTS + first
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+        self._cell_starts = np.searchsorted(self._keys, np.arange(self.n_lat * self.n_lon + 1) * self._YEAR_SLOTS)
+
+    def __len__(self):
+        return len(self.table)
+
+    def _lat_bin(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.CELL_DEG).astype(np.int64), 0, self.n_lat - 1)
+
+    def _lon_bin(self, lon):
+        return np.floor((np.asarray(lon) + 180.0) / self.CELL_DEG).astype(np.int64) % self.n_lon
+
+    def _cells(self, lat: float, lon: float, max_dist_km: float) -> np.ndarray:
+        """
+        Liefert die Nummern aller Zellen, die den Suchkreis überdecken.
+        """
+        ang = max_dist_km / self.EARTH_RADIUS_KM
+        if ang >= np.pi:
+            return np.arange(self.n_lat * self.n_lon)
+
+        ang_deg = np.degrees(ang) + self._PAD_DEG
+        lat_lo, lat_hi = lat - ang_deg, lat + ang_deg
+        lat_rows = np.arange(self._lat_bin(max(lat_lo, -90.0)), self._lat_bin(min(lat_hi, 90.0)) + 1)
+
+        # Enthält der Kreis einen Pol oder ist er breiter als der Breitenkreis, werden alle Längen durchsucht
+        cos_lat = np.cos(np.radians(lat))
+        if lat_lo <= -90.0 or lat_hi >= 90.0 or np.sin(ang) >= cos_lat:
+            lon_cols = np.arange(self.n_lon)
+        else:
+            dlon_deg = np.degrees(np.arcsin(np.sin(ang) / cos_lat)) + self._PAD_DEG
+            first = int(np.floor((lon - dlon_deg + 180.0) / self.CELL_DEG))
+            last = int(np.floor((lon + dlon_deg + 180.0) / self.CELL_DEG))
+            if last - first + 1 >= self.n_lon:
+                lon_cols = np.arange(self.n_lon)
+            else:
+                lon_cols = np.arange(first, last + 1) % self.n_lon
+
+        return (lat_rows[:, None] * self.n_lon + lon_cols[None, :]).ravel()
+
+    def candidates(self, lat: float, lon: float, max_dist_km: float,
+                   firstyear: int = None, lastyear: int = None) -> np.ndarray:
+        """
+        Liefert die Zeilenpositionen aller Stationen in den Zellen, die den Suchkreis überdecken
+        und (falls angegeben) den Zeitraum firstyear-lastyear abdecken.
+        """
+        cells = self._cells(lat, lon, max_dist_km)
+        starts = self._cell_starts[cells]
+        if firstyear is None:
+            ends = self._cell_starts[cells + 1]
+        else:
+            year = min(max(int(firstyear), -1), self._NO_YEAR - 1)
+            ends = np.maximum(np.searchsorted(self._keys, cells * self._YEAR_SLOTS + year, side='right'), starts)
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Alle Bereiche [start, end) ohne Python-Schleife aneinanderhängen
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        positions = self._order[offsets]
+        if lastyear is not None:
+            year = min(max(int(lastyear), MISSING_YEAR + 1), np.iinfo(np.int16).max)
+            positions = positions[self.table.lastyear[positions] >= year]
+        return positions
+
+    def query_radius(self, lat: float, lon: float, max_dist_km: float,
+                     firstyear: int = None, lastyear: int = None) -> tuple:
+        """
+        Liefert (Zeilenpositionen, Distanzen in km) aller Stationen innerhalb des Radius,
+        aufsteigend nach Distanz sortiert.
+        """
+        positions = self.candidates(lat, lon, max_dist_km, firstyear, lastyear)
+        distances = haversine(lat, lon, *self.table.coordinates(positions))
+        inside = distances <= max_dist_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((positions, distances))
+        return positions[order], distances[order]
+
+    def query_nearest(self, lat: float, lon: float, k: int, max_dist_km: float = None,
+                      firstyear: int = None, lastyear: int = None) -> tuple:
+        """
+        Liefert die k nächstgelegenen Stationen (optional begrenzt auf max_dist_km).
+        Der Suchradius wird verdoppelt, bis mindestens k Stationen gefunden wurden.
+        """
+        limit = np.pi * self.EARTH_RADIUS_KM if max_dist_km is None else max_dist_km
+        radius = min(50.0, limit)
+        while True:
+            positions, distances = self.query_radius(lat, lon, radius, firstyear, lastyear)
+            if len(positions) >= k or radius >= limit:
+                return positions[:k], distances[:k]
+            radius = min(radius * 2, limit)
+
+    def position(self, station_id: str):
+        """
+        Liefert die Zeilenposition einer Station (None, falls nicht im Inventory).
+        """
+        return self.table.position(station_id)
+
+    def station(self, position: int, distance_km: float) -> dict:
+        """
+        Baut das Ergebnis-Dictionary für eine Station, samt Stationsname aus der Tabelle.
+        """
+        table = self.table
+        lat, lon = table.coordinates(position)
+        return {
+            "station_id": table.station_id(position),
+            "latitude": float(lat),
+            "longitude": float(lon),
+            "distance_km": float(distance_km),
+            "firstyear": int(table.firstyear[position]),
+            "lastyear": int(table.lastyear[position]),
+            "city": table.city(position)
+        }
+
+
+_station_index_lock = threading.Lock()
+_station_index_cache = {}
+
+
+def get_station_index(table: StationTable) -> StationIndex:
+    """
+    Liefert den räumlichen Index für die übergebene Stationstabelle.
+    Der Index wird nur neu gebaut, wenn sich die Tabelle geändert hat. Anfragen, die die
+    Tabelle noch vor einem Austausch (install_station_table) gelesen haben, erhalten den vorherigen Index.
+    """
+    with _station_index_lock:
+        for generation in ('current', 'previous'):
+            cached = _station_index_cache.get(generation)
+            if cached is not None and cached[0] is table:
+                return cached[1]
+        with metrics.span('index_build'):
+            cached = (table, StationIndex(table))
+        _station_index_cache['current'] = cached
+        return cached[1]
+
+
+def install_station_table(inventory_url: str, stations_url: str, table: StationTable, index: StationIndex,
+                          validators: dict):
+    """
+    Tauscht Stationstabelle und Stationsindex gemeinsam aus; laufende Anfragen behalten ihren Stand.
+    """
+    with _station_index_lock:
+        _station_index_cache['previous'] = _station_index_cache.get('current')
+        _station_index_cache['current'] = (table, index)
+        read_station_table.put(table, inventory_url, stations_url)
+        _source_validators.update(validators)
+
+
+def diff_inventory(old: StationTable, new: StationTable) -> dict:
+    """
+    Vergleicht zwei Stände der Stationstabelle: hinzugekommene und entfernte Stationen, Stationen mit
+    geänderter Jahresabdeckung (neue Daten) und verschobene Stationen (nur Koordinaten geändert).
+    """
+    common, old_rows, new_rows = np.intersect1d(old.ids, new.ids, assume_unique=True, return_indices=True)
+    years = ((old.firstyear[old_rows] != new.firstyear[new_rows])
+             | (old.lastyear[old_rows] != new.lastyear[new_rows]))
+    coordinates = (old.lat[old_rows] != new.lat[new_rows]) | (old.lon[old_rows] != new.lon[new_rows])
+    return {
+        'added': _decode_ids(np.setdiff1d(new.ids, old.ids)),
+        'removed': _decode_ids(np.setdiff1d(old.ids, new.ids)),
+        'changed': _decode_ids(common[years]),
+        'moved': _decode_ids(common[coordinates & ~years]),
+    }
+
+
+def iter_stations_within_radius(inventory_url: str, lat: float, lon: float, max_dist_km: float,
+                                firstyear: int, lastyear: int, offset: int = 0):
     """
-    Liest eine Fixed-Width-Datei mit Stationsmetadaten und erstellt ein Mapping von Station ID zu NAME.
+    Wie find_stations_within_radius, aber als Iterator ab Rang offset, nächste Station zuerst.
+    Die Suche selbst läuft sofort (Fehler treten beim Aufruf auf), die Ergebnis-Dicts
+    entstehen erst beim Iterieren.
     """
-    df = pd.read_fwf(csv_url_city, colspecs=STATION_CITY_COLSPECS, header=None, names=STATION_CITY_NAMES)
-    mapping = dict(zip(df["ID"].str.strip(), df["NAME"].str.strip()))
-    return mapping
+    index = get_station_index(read_station_table(inventory_url, STATIONS_URL))
+    with metrics.span('station_search'):
+        positions, distances = index.query_radius(lat, lon, max_dist_km, firstyear, lastyear)
+    return (index.station(position, distance)
+            for position, distance in zip(positions[offset:], distances[offset:]))
 
 
 def find_stations_within_radius(inventory_url: str, lat: float, lon: float,
@@ -113,21 +1349,8 @@ def find_stations_within_radius(inventory_url: str, lat: float, lon: float,
     Sucht die nächstgelegenen Stationen innerhalb eines bestimmten Radius,
     die im angegebenen Zeitraum Daten liefern.
     """
-    stations_df = read_ghcnd_stations(inventory_url)
-    stations_df = stations_df[(stations_df['FIRSTYEAR'] <= firstyear) & (stations_df['LASTYEAR'] >= lastyear)].copy()
-    stations_df['distance_km'] = haversine(lat, lon, stations_df['LATITUDE'].values, stations_df['LONGITUDE'].values)
-    nearby = stations_df[stations_df['distance_km'] <= max_dist_km].sort_values('distance_km').head(max_stations)
-    return [
-        {
-            "station_id": str(row['ID']),
-            "latitude": float(row['LATITUDE']),
-            "longitude": float(row['LONGITUDE']),
-            "distance_km": float(row['distance_km']),
-            "firstyear": int(row['FIRSTYEAR']),
-            "lastyear": int(row['LASTYEAR'])
-        }
-        for _, row in nearby.iterrows()
-    ]
+    return list(islice(iter_stations_within_radius(inventory_url, lat, lon, max_dist_km, firstyear, lastyear),
+                       max_stations))
 
 
 def get_season(month: int, station_lat: float) -> str:
@@ -154,136 +1377,1848 @@ def get_season(month: int, station_lat: float) -> str:
             return 'Summer'
 
 
-@lru_cache(maxsize=100)
-def process_station_data(station_id: str, firstyear: int, lastyear: int, station_lat: float) -> tuple:
+class _FileLock:
     """
-    Verarbeitet und cached Wetterdaten für eine Station.
+    Exklusive Sperre über eine Lock-Datei, die sowohl Threads als auch Prozesse ausschließt.
     """
-    app.logger.info(f"Processing weather data for station {station_id} - cache miss")
-    station_data_url = f'https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/by_station/{station_id}.csv.gz'
-    response = requests.get(station_data_url, stream=True)
-    response.raise_for_status()
-
-    with gzip.GzipFile(fileobj=response.raw) as f:
-        data = pd.read_csv(
-            f,
-            header=None,
-            names=['ID', 'DATE', 'ELEMENT', 'VALUE', 'M-FLAG', 'Q-FLAG', 'S-FLAG', 'OBS-TIME'],
-            dtype={'ID': str, 'DATE': str, 'ELEMENT': str, 'VALUE': float,
-                   'M-FLAG': str, 'Q-FLAG': str, 'S-FLAG': str, 'OBS-TIME': str},
-            low_memory=False
-        )
-    data['DATE'] = pd.to_datetime(data['DATE'], format='%Y%m%d', errors='coerce')
-    data['YEAR'] = data['DATE'].dt.year.astype(str)
-    filtered = data[data['ELEMENT'].isin(['TMAX', 'TMIN'])].copy()
-    filtered['VALUE'] = pd.to_numeric(filtered['VALUE'], errors='coerce')
-    filtered.loc[filtered['ELEMENT'].isin(['TMAX', 'TMIN']), 'VALUE'] /= 10
-
-    # Yearly Statistics
-    # Compute the yearly average for TMAX and TMIN separately
-    yearly_tmax_avg = filtered[filtered['ELEMENT'] == 'TMAX'].groupby('YEAR')['VALUE'].mean()
-    yearly_tmin_avg = filtered[filtered['ELEMENT'] == 'TMIN'].groupby('YEAR')['VALUE'].mean()
-    yearly_overall_avg = filtered.groupby('YEAR')['VALUE'].mean()
-
-    yearly_result = pd.DataFrame({
-        'Max_Temperature (°C)': yearly_tmax_avg,
-        'Min_Temperature (°C)': yearly_tmin_avg,
-        'Year_Avg_Temperature (°C)': yearly_overall_avg
-    }).fillna(0)
-
-    # Seasonal Statistics based on all TMIN and TMAX values in a season
-    season_data = filtered.copy()  # filtered already contains only TMAX and TMIN rows and values converted to °C
-    season_data['month'] = season_data['DATE'].dt.month
-    season_data['year_int'] = season_data['DATE'].dt.year
-    # Use a function get_season(m, station_lat) to get the season, possibly switching for Southern Hemisphere.
-    season_data['season'] = season_data['month'].apply(lambda m: get_season(m, station_lat))
-    # For proper grouping of winter, assign December to the following year:
-    season_data['season_year'] = season_data['year_int']
-    season_data.loc[season_data['month'] == 12, 'season_year'] += 1
-
-    # Compute the average TMAX for each season-year
-    seasonal_tmax_avg = season_data[season_data['ELEMENT'] == 'TMAX'].groupby(['season_year', 'season'])['VALUE'].mean()
-    # Compute the average TMIN for each season-year
-    seasonal_tmin_avg = season_data[season_data['ELEMENT'] == 'TMIN'].groupby(['season_year', 'season'])['VALUE'].mean()
-
-    # Build a dictionary for the seasonal summary (for each season-year and season)
-    seasonal_summary = {}
-    for sy in sorted(season_data['season_year'].unique()):
-        sy_str = str(sy)
-        seasonal_summary[sy_str] = {}
-        for season in ['Winter', 'Spring', 'Summer', 'Autumn']:
-            # Use .loc with a tuple to fetch the value if available, else default to None
-            tmax_val = seasonal_tmax_avg.loc[(sy, season)] if (sy, season) in seasonal_tmax_avg.index else None
-            tmin_val = seasonal_tmin_avg.loc[(sy, season)] if (sy, season) in seasonal_tmin_avg.index else None
-            seasonal_summary[sy_str][season] = {
-                'Max_Temperature (°C)': tmax_val if tmax_val is not None else 0,
-                'Min_Temperature (°C)': tmin_val if tmin_val is not None else 0,
-            }
+    _thread_locks = {}
+    _registry_lock = threading.Lock()
 
-    yearly_filtered = {year: val for year, val in yearly_result.to_dict(orient='index').items()
-                       if firstyear <= int(year) <= lastyear}
-    seasonal_filtered = {year: val for year, val in seasonal_summary.items()
-                         if firstyear <= int(year) <= lastyear}
+    def __init__(self, path: str):
+        self.path = path
+        with self._registry_lock:
+            self._thread_lock = self._thread_locks.setdefault(path, threading.Lock())
+        self._fd = None
 
-    result = {
-        'yearly_summary': replace_nan_with_none(yearly_filtered),
-        'seasonal_summary': replace_nan_with_none(seasonal_filtered)
-    }
-    return jsonify(result), 200
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Nimmt die Sperre; mit blocking=False sofort False, wenn sie gerade gehalten wird.
+        """
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            # Hat ein anderer Prozess die Lock-Datei inzwischen gelöscht, gilt die Sperre nicht
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    self._fd = fd
+                    return True
+            except FileNotFoundError:
+                pass
+            os.close(fd)
 
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
 
-# Flask Endpoints
-@app.route('/api/station_data', methods=['GET'])
-@limiter.limit("30 per minute")
-def get_station_weather_data():
-    station_id = request.args.get('station_id')
-    if not station_id:
-        return jsonify({"error": "Missing station_id"}), 400
-    try:
-        firstyear = int(request.args.get('firstyear', 1900))
-        lastyear = int(request.args.get('lastyear', 2100))
-        station_lat = float(request.args.get('station_lat', 0))
-        app.logger.info(f"Fetching data for station {station_id} for years {firstyear}-{lastyear}, lat: {station_lat}")
-        return process_station_data(station_id, firstyear, lastyear, station_lat)
-    except Exception as e:
-        app.logger.error(f"Error processing station data: {e}")
-        return jsonify({"error": str(e)}), 500
+    def __enter__(self):
+        self.acquire()
+        return self
 
+    def __exit__(self, *exc):
+        self.release()
 
-@app.route('/api/find_stations', methods=['GET'])
-@limiter.limit("30 per minute")
-def find_stations():
-    inventory_url = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
-    csv_url_city = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
-    try:
-        lat = float(request.args.get("lat", 48.060711110885094))
-        lon = float(request.args.get("lon", 8.533784762385885))
-        max_dist_km = float(request.args.get("max_dist_km", 50.0))
-        max_stations = int(request.args.get("max_stations", 5))
-        firstyear = int(request.args.get("firstyear", 2010))
-        lastyear = int(request.args.get("lastyear", 2015))
-
-        stations = find_stations_within_radius(
-            inventory_url, lat, lon, max_dist_km, max_stations, firstyear, lastyear
-        )
-        station_names = read_station_cities(csv_url_city)
-        for station in stations:
-            station["city"] = station_names.get(station.get("station_id"), "Unknown")
 
-        def generate():
-            for station in stations:
-                yield f"data: {json.dumps(station)}\n\n"
-            time.sleep(1)
-            yield "data: finished\n\n"
+class StationFileCache:
+    """
+    Festplatten-Cache für die by_station-Dateien (csv.gz) von NOAA.
 
-    except Exception as e:
-        app.logger.error(f"Fehler bei der Stationssuche: {e}")
-        return jsonify({"error": str(e)}), 500
+    Dateien werden nach STATION_CACHE_REVALIDATE_SECONDS per If-None-Match/If-Modified-Since
+    revalidiert und bei Überschreiten von max_bytes nach LRU (Datei-mtime) entfernt.
+    Mehrere Worker-Prozesse koordinieren sich über Lock-Dateien (flock).
+    Ohne Verzeichnis wird jede Datei direkt in den Speicher geladen.
+    """
 
-    return Response(
-        generate(),
+    def __init__(self, directory, url_template: str = STATION_DATA_URL,
+                 max_bytes: int = STATION_CACHE_MAX_BYTES,
+                 revalidate_after: float = STATION_CACHE_REVALIDATE_SECONDS):
+        self.directory = directory
+        self.url_template = url_template
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale': 0, 'evictions': 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+        # Auch im Pool-Prozess erfasst und von dort in den Webprozess übertragen
+        metrics.inc('wetteranzeige_cache_events_total', n, cache='station_files', event=key)
+
+    def url(self, station_id: str) -> str:
+        if not STATION_ID_PATTERN.match(station_id):
+            raise ValueError(f"Invalid station_id: {station_id!r}")
+        return self.url_template.format(station_id=station_id)
+
+    def path(self, station_id: str) -> str:
+        return os.path.join(self.directory, f"{station_id}.csv.gz")
+
+    def _is_fresh(self, meta) -> bool:
+        return meta is not None and time.time() - meta.get('checked_at', 0) < self.revalidate_after
+
+    def open(self, station_id: str):
+        """
+        Liefert ein binäres Dateiobjekt mit dem gzip-komprimierten Inhalt der Station.
+        """
+        url = self.url(station_id)
+
+        if not self.directory:
+            self._count('misses')
+            with metrics.span('station_download'), http_fetcher.request('GET', url, stream=True) as response:
+                response.raise_for_status()
+                data = response.raw.read()
+            metrics.inc('wetteranzeige_downloaded_bytes_total', len(data), source='station')
+            return io.BytesIO(data)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(station_id)
+        with _FileLock(path + '.lock'):
+            meta = self._read_meta(path)
+            if self._is_fresh(meta):
+                self._count('hits')
+                downloaded = False
+            else:
+                downloaded = self._download(url, path, meta)
+            try:
+                # mtime dient als LRU-Zeitstempel
+                os.utime(path)
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                # Außerhalb des Caches gelöscht: ohne Metadaten neu laden
+                downloaded = self._download(url, path, None)
+                f = open(path, 'rb')
+        if downloaded:
+            self._evict(keep=path)
+        return f
+
+    def _read_meta(self, path: str):
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            return meta if os.path.exists(path) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, path: str, meta: dict):
+        tmp = f"{path}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path + '.json')
+
+    @staticmethod
+    def _conditional_headers(meta) -> dict:
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def _install(self, path: str, tmp: str, url: str, headers):
+        os.replace(tmp, path)
+        self._write_meta(path, {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        })
+
+    def _download(self, url: str, path: str, meta) -> bool:
+        """
+        Lädt die Datei (bedingt) herunter. Liefert True, wenn neue Daten geschrieben wurden.
+        """
+        try:
+            with metrics.span('station_download'), \
+                    http_fetcher.request('GET', url, headers=self._conditional_headers(meta), stream=True) as response:
+                if meta is not None and response.status_code == 304:
+                    self._count('revalidated')
+                    self._write_meta(path, {**meta, 'checked_at': time.time()})
+                    return False
+                response.raise_for_status()
+                self._count('misses')
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f)
+                        size = f.tell()
+                    self._install(path, tmp, url, response.headers)
+                    metrics.inc('wetteranzeige_downloaded_bytes_total', size, source='station')
+                finally:
+                    if os.path.exists(tmp):
+                        os.unlink(tmp)
+        except requests.RequestException as e:
+            if meta is None:
+                raise
+            # NOAA nicht erreichbar: vorhandene Kopie weiterverwenden
+            app.logger.warning(f"Revalidierung von {url} fehlgeschlagen, verwende Cache: {e}")
+            self._count('stale')
+            return False
+        return True
+
+    # Schnittstelle für asynchrone Downloads (asgi.py): der Aufrufer lädt die Datei selbst
+    # in eine temporäre Datei, Metadaten, Sperren und Verdrängung bleiben hier.
+    def needs_download(self, station_id: str) -> bool:
+        return bool(self.directory) and not self._is_fresh(self._read_meta(self.path(station_id)))
+
+    def conditional_headers(self, station_id: str) -> dict:
+        return self._conditional_headers(self._read_meta(self.path(station_id)))
+
+    def temp_path(self, station_id: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{self.path(station_id)}.{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+
+    def store(self, station_id: str, tmp: str, headers):
+        """
+        Übernimmt eine vollständig heruntergeladene Datei in den Cache.
+        """
+        path = self.path(station_id)
+        size = os.path.getsize(tmp)
+        with _FileLock(path + '.lock'):
+            self._install(path, tmp, self.url(station_id), headers)
+        self._count('misses')
+        metrics.inc('wetteranzeige_downloaded_bytes_total', size, source='station')
+        self._evict(keep=path)
+
+    def mark_revalidated(self, station_id: str):
+        path = self.path(station_id)
+        with _FileLock(path + '.lock'):
+            meta = self._read_meta(path)
+            if meta is not None:
+                self._write_meta(path, {**meta, 'checked_at': time.time()})
+        self._count('revalidated')
+
+    def expire(self, station_id: str):
+        """
+        Erzwingt beim nächsten Zugriff eine Revalidierung; die Datei bleibt als Fallback liegen.
+        """
+        if not self.directory:
+            return
+        path = self.path(station_id)
+        if not os.path.exists(path + '.json'):
+            return
+        with _FileLock(path + '.lock'):
+            meta = self._read_meta(path)
+            if meta is not None:
+                self._write_meta(path, {**meta, 'checked_at': 0})
+
+    def mark_stale(self, station_id: str, error: Exception):
+        app.logger.warning(f"Revalidierung von {station_id} fehlgeschlagen, verwende Cache: {error}")
+        self._count('stale')
+
+    @staticmethod
+    def _remove(path: str, only_orphaned: bool = False) -> bool:
+        """
+        Löscht Datei, Metadaten und Lock-Datei einer Station unter deren Sperre. Gerade
+        benutzte Stationen werden übersprungen (False), statt auf sie zu warten.
+        """
+        lock = _FileLock(path + '.lock')
+        if not lock.acquire(blocking=False):
+            return False
+        try:
+            if only_orphaned and os.path.exists(path):
+                return False
+            # Die Lock-Datei zuletzt: Wartende bemerken das und sperren eine neue
+            for suffix in ('', '.json', '.lock'):
+                try:
+                    os.unlink(path + suffix)
+                except OSError:
+                    pass
+            return True
+        finally:
+            lock.release()
+
+    def _evict(self, keep: str = None):
+        """
+        Entfernt die am längsten nicht genutzten Dateien, bis max_bytes eingehalten wird,
+        und Lock-Dateien von Stationen ohne Datei (z.B. nach fehlgeschlagenem Download).
+        """
+        with _FileLock(os.path.join(self.directory, '.evict.lock')):
+            entries, orphans = [], []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.csv.gz'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                elif entry.name.endswith('.csv.gz.lock') and not os.path.exists(entry.path[:-len('.lock')]):
+                    orphans.append(entry.path[:-len('.lock')])
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep or not self._remove(path):
+                    continue
+                total -= size
+                self._count('evictions')
+            for path in orphans:
+                if path != keep:
+                    self._remove(path, only_orphaned=True)
+
+
+station_file_cache = StationFileCache(os.path.join(CACHE_DIR, 'by_station') if CACHE_DIR else None)
+
+
+SEASONS = ['Winter', 'Spring', 'Summer', 'Autumn']
+# Index in SEASONS je Monat (1-12) auf der Nordhalbkugel; Index 0 ist unbenutzt.
+# Auf der Südhalbkugel verschiebt sich jede Jahreszeit um zwei Positionen (Winter <-> Summer).
+NORTHERN_SEASON_BY_MONTH = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+SOUTHERN_SEASON_BY_MONTH = (NORTHERN_SEASON_BY_MONTH + 2) % 4
+
+MAX_TEMP_KEY = 'Max_Temperature (°C)'
+MIN_TEMP_KEY = 'Min_Temperature (°C)'
+AVG_TEMP_KEY = 'Year_Avg_Temperature (°C)'
+
+
+def _group_means(groups: np.ndarray, values: np.ndarray, mask: np.ndarray, size: int) -> tuple:
+    """
+    Liefert (Mittelwerte, Anzahl gültiger Werte, Anzahl Zeilen) je Gruppe für die Zeilen in mask.
+    """
+    rows = np.bincount(groups[mask], minlength=size)
+    valid = mask & ~np.isnan(values)
+    sums = np.bincount(groups[valid], weights=values[valid], minlength=size)
+    counts = np.bincount(groups[valid], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts, rows
+
+
+def summarize_temperatures(year, month, is_tmax, value, southern: bool) -> 'StationSummary':
+    """
+    Berechnet Jahres- und Saisonmittel aus TMAX/TMIN-Beobachtungen (Werte in °C).
+
+    Alle Gruppierungen laufen über np.bincount auf einem Gruppenindex, die Jahreszeit
+    kommt aus einer Lookup-Tabelle pro Monat. Dezember zählt zum Winter bzw. Sommer
+    des Folgejahres.
+    """
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    is_tmax = np.asarray(is_tmax, dtype=bool)
+    value = np.asarray(value, dtype=np.float64)
+    everything = np.ones(len(year), dtype=bool)
+
+    # Yearly Statistics, fehlende Mittelwerte werden wie bisher als 0 gemeldet
+    years, year_idx = np.unique(year, return_inverse=True)
+    yearly_columns = [
+        (MAX_TEMP_KEY, _group_means(year_idx, value, is_tmax, len(years))),
+        (MIN_TEMP_KEY, _group_means(year_idx, value, ~is_tmax, len(years))),
+        (AVG_TEMP_KEY, _group_means(year_idx, value, everything, len(years))),
+    ]
+    yearly_summary = {
+        str(y): {key: float(means[i]) if counts[i] else 0 for key, (means, counts, _) in yearly_columns}
+        for i, y in enumerate(years.tolist())
+    }
+
+    # Seasonal Statistics: Gruppe = (Saisonjahr, Jahreszeit)
+    season_year = year + (month == 12)
+    season = (SOUTHERN_SEASON_BY_MONTH if southern else NORTHERN_SEASON_BY_MONTH)[month]
+    season_years, sy_idx = np.unique(season_year, return_inverse=True)
+    groups = sy_idx * len(SEASONS) + season
+    size = len(season_years) * len(SEASONS)
+    seasonal_columns = [
+        (MAX_TEMP_KEY, _group_means(groups, value, is_tmax, size)),
+        (MIN_TEMP_KEY, _group_means(groups, value, ~is_tmax, size)),
+    ]
+
+    def seasonal_value(means, counts, rows, g):
+        # Keine Beobachtung -> 0, nur fehlende Messwerte -> None
+        if not rows[g]:
+            return 0
+        return float(means[g]) if counts[g] else None
+
+    seasonal_summary = {
+        str(sy): {
+            name: {key: seasonal_value(*column, i * len(SEASONS) + s) for key, column in seasonal_columns}
+            for s, name in enumerate(SEASONS)
+        }
+        for i, sy in enumerate(season_years.tolist())
+    }
+    return StationSummary(yearly_summary, seasonal_summary)
+
+
+# Spalten einer by_station-Zeile: ID,DATE,ELEMENT,VALUE,M-FLAG,Q-FLAG,S-FLAG,OBS-TIME
+STATION_FILE_FIELDS = 8
+# Maximale Ziffernzahl eines VALUE-Felds (ohne Vorzeichen)
+_VALUE_DIGITS = 5
+# Nullbytes hinter dem Block, damit feste Offsets nie über das Pufferende hinaus lesen
+_PADDING = bytes(16)
+
+
+def _empty_observations() -> dict:
+    return {
+        'year': np.empty(0, dtype=np.int16),
+        'month': np.empty(0, dtype=np.int8),
+        'is_tmax': np.empty(0, dtype=bool),
+        'value': np.empty(0, dtype=np.float64),
+        'quality_flagged': np.empty(0, dtype=bool),
+    }
+
+
+def _observations(date: np.ndarray, is_tmax: np.ndarray, value: np.ndarray, flagged: np.ndarray) -> dict:
+    """
+    Zerlegt YYYYMMDD-Integer in Jahr und Monat und verwirft ungültige Datumswerte.
+    """
+    month = date // 100 % 100
+    day = date % 100
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    return {
+        'year': (date[valid] // 10000).astype(np.int16),
+        'month': month[valid].astype(np.int8),
+        'is_tmax': is_tmax[valid],
+        'value': value[valid] / 10,
+        'quality_flagged': flagged[valid],
+    }
+
+
+def _digits(a: np.ndarray, start: np.ndarray, count) -> tuple:
+    """
+    Liest count Ziffern ab den Offsets start als Integer. Liefert (Zahl, alle Zeichen waren Ziffern).
+    count darf pro Zeile verschieden sein; überzählige Positionen werden ignoriert.
+    """
+    count = np.broadcast_to(count, start.shape)
+    number = np.zeros(len(start), dtype=np.int64)
+    ok = np.ones(len(start), dtype=bool)
+    for i in range(int(count.max(initial=0))):
+        # uint8-Arithmetik: Zeichen unterhalb von '0' laufen über und landen ebenfalls über 9
+        digit = a[start + i] - np.uint8(ord('0'))
+        active = i < count
+        ok &= ~active | (digit <= 9)
+        number = np.where(active, number * 10 + digit, number)
+    return number, ok
+
+
+def _parse_chunk(buf: bytes) -> dict:
+    """
+    Wertet einen Block vollständiger Zeilen direkt auf Byte-Ebene aus.
+    Nur TMAX/TMIN-Zeilen werden weiterverarbeitet; hat eine Zeile nicht genau
+    STATION_FILE_FIELDS Felder, übernimmt der tolerantere pandas-Parser den Block.
+    """
+    a = np.frombuffer(buf + _PADDING, dtype=np.uint8)
+    line_ends = np.flatnonzero(a[:len(buf)] == ord('\n'))
+    commas = np.flatnonzero(a[:len(buf)] == ord(','))
+    n_lines = len(line_ends)
+    if n_lines == 0:
+        return _empty_observations()
+    if len(commas) != n_lines * (STATION_FILE_FIELDS - 1):
+        return _parse_chunk_with_pandas(buf)
+    commas = commas.reshape(n_lines, STATION_FILE_FIELDS - 1)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    if not ((commas[:, 0] >= line_starts).all() and (commas[:, -1] < line_ends).all()):
+        return _parse_chunk_with_pandas(buf)
+
+    # ELEMENT: genau vier Zeichen, nur TMAX/TMIN behalten
+    element = commas[:, 1] + 1
+    tm = ((commas[:, 2] - element) == 4) & (a[element] == ord('T')) & (a[element + 1] == ord('M'))
+    third, fourth = a[element + 2], a[element + 3]
+    is_tmax = tm & (third == ord('A')) & (fourth == ord('X'))
+    keep = is_tmax | (tm & (third == ord('I')) & (fourth == ord('N')))
+    commas, is_tmax = commas[keep], is_tmax[keep]
+
+    # DATE: genau acht Ziffern YYYYMMDD
+    date, valid_date = _digits(a, commas[:, 0] + 1, 8)
+    valid_date &= (commas[:, 1] - commas[:, 0]) == 9
+
+    # VALUE: optionales Minus und bis zu _VALUE_DIGITS Ziffern, sonst NaN
+    value_start = commas[:, 2] + 1
+    negative = a[value_start] == ord('-')
+    n_digits = commas[:, 3] - value_start - negative
+    magnitude, numeric = _digits(a, value_start + negative, np.minimum(n_digits, _VALUE_DIGITS))
+    numeric &= (n_digits >= 1) & (n_digits <= _VALUE_DIGITS)
+    value = np.where(numeric, np.where(negative, -magnitude, magnitude), np.nan)
+
+    # Q-FLAG: gesetzt, sobald das Feld nicht leer ist
+    flagged = (commas[:, 5] - commas[:, 4]) > 1
+    return _observations(date[valid_date], is_tmax[valid_date], value[valid_date], flagged[valid_date])
+
+
+def _parse_chunk_with_pandas(buf: bytes) -> dict:
+    data = pd.read_csv(
+        io.BytesIO(buf),
+        header=None,
+        names=['ID', 'DATE', 'ELEMENT', 'VALUE', 'M-FLAG', 'Q-FLAG', 'S-FLAG', 'OBS-TIME'],
+        dtype=str,
+        keep_default_na=False
+    ).fillna('')
+    data = data[data['ELEMENT'].isin(['TMAX', 'TMIN'])]
+    date = pd.to_numeric(data['DATE'].where(data['DATE'].str.fullmatch(r'\d{8}')), errors='coerce')
+    data, date = data[date.notna()], date[date.notna()]
+    return _observations(
+        date.to_numpy(dtype=np.int64),
+        (data['ELEMENT'] == 'TMAX').to_numpy(),
+        pd.to_numeric(data['VALUE'], errors='coerce').to_numpy(dtype=np.float64),
+        (data['Q-FLAG'] != '').to_numpy()
+    )
+
+
+def parse_station_file(fileobj, chunk_bytes: int = None) -> dict:
+    """
+    Liest eine gzip-komprimierte by_station-Datei blockweise und liefert die
+    TMAX/TMIN-Beobachtungen als NumPy-Arrays (year, month, is_tmax, value in °C, quality_flagged).
+    Der Speicherbedarf ist durch die Blockgröße und das kompakte Ergebnis begrenzt.
+    """
+    chunk_bytes = chunk_bytes or STATION_PARSE_CHUNK_BYTES
+    parts = []
+    rest = b''
+    # Dekompression und Parsen wechseln sich blockweise ab und werden getrennt aufsummiert
+    decompress_seconds = parse_seconds = 0.0
+    with gzip.GzipFile(fileobj=fileobj) as f:
+        while True:
+            started = time.perf_counter()
+            block = f.read(chunk_bytes)
+            decompress_seconds += time.perf_counter() - started
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind(b'\n') + 1
+            rest = block[cut:]
+            if cut:
+                started = time.perf_counter()
+                parts.append(_parse_chunk(block[:cut]))
+                parse_seconds += time.perf_counter() - started
+    started = time.perf_counter()
+    if rest.strip():
+        parts.append(_parse_chunk(rest + b'\n'))
+    parts = parts or [_empty_observations()]
+    observations = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    metrics.observe('station_decompress', decompress_seconds)
+    metrics.observe('station_parse', parse_seconds + time.perf_counter() - started)
+    return observations
+
+
+def _deep_sizeof(obj) -> int:
+    # Näherung für verschachtelte Dicts/Listen aus Zahlen und Strings
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(key) + _deep_sizeof(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(item) for item in obj)
+    return size
+
+
+def _nullable(values: np.ndarray) -> list:
+    """
+    Rundet auf zwei Nachkommastellen und ersetzt NaN/inf in einem Schritt durch None.
+    """
+    return _finite_list(np.round(values, 2))
+
+
+class StationSummary:
+    """
+    Jahres- und Saisonwerte einer Station über den gesamten Messzeitraum.
+    Zeitfenster werden per Binärsuche über die sortierten Jahre ausgeschnitten.
+    """
+    _encoded_lock = threading.Lock()
+
+    def __init__(self, yearly_summary: dict, seasonal_summary: dict):
+        self.yearly = self._sorted_by_year(yearly_summary)
+        self.seasonal = self._sorted_by_year(seasonal_summary)
+
+    @staticmethod
+    def _sorted_by_year(summary: dict) -> tuple:
+        items = sorted((int(year), year, value) for year, value in summary.items() if str(year).isdigit())
+        return [item[0] for item in items], [(item[1], item[2]) for item in items]
+
+    @staticmethod
+    def _slice(summary: tuple, firstyear: int, lastyear: int) -> dict:
+        years, items = summary
+        return dict(items[bisect.bisect_left(years, firstyear):bisect.bisect_right(years, lastyear)])
+
+    def window(self, firstyear: int, lastyear: int) -> dict:
+        return {
+            'yearly_summary': self._slice(self.yearly, firstyear, lastyear),
+            'seasonal_summary': self._slice(self.seasonal, firstyear, lastyear)
+        }
+
+    def _bounds(self, firstyear: int, lastyear: int) -> tuple:
+        return tuple(bisect_func(summary[0], year)
+                     for summary in (self.yearly, self.seasonal)
+                     for bisect_func, year in ((bisect.bisect_left, firstyear), (bisect.bisect_right, lastyear)))
+
+    def _columns(self) -> dict:
+        # Einmalig pro Station: Werte als Matrizen, fehlende Saisonwerte (None) als NaN
+        if '_columns_cache' not in self.__dict__:
+            yearly = [value for _, value in self.yearly[1]]
+            seasonal = [value for _, value in self.seasonal[1]]
+            self.__dict__['_columns_cache'] = {
+                'years': np.array(self.yearly[0], dtype=np.int64),
+                'yearly': np.array([[row[key] for key in (MAX_TEMP_KEY, MIN_TEMP_KEY, AVG_TEMP_KEY)]
+                                    for row in yearly], dtype=np.float64).reshape(-1, 3),
+                'season_years': np.array(self.seasonal[0], dtype=np.int64),
+                'seasonal': np.array([[[row.get(season, {}).get(key, np.nan) for season in SEASONS]
+                                       for key in (MAX_TEMP_KEY, MIN_TEMP_KEY)]
+                                      for row in seasonal], dtype=np.float64).reshape(-1, 2, len(SEASONS)),
+            }
+        return self.__dict__['_columns_cache']
+
+    def columnar(self, firstyear: int, lastyear: int) -> dict:
+        """
+        Zeitfenster als parallele Arrays statt verschachtelter Dicts pro Jahr.
+        Werte sind wie im Frontend auf zwei Nachkommastellen gerundet, NaN wird zu null.
+        """
+        columns = self._columns()
+        y_lo, y_hi, s_lo, s_hi = self._bounds(firstyear, lastyear)
+        yearly = _nullable(columns['yearly'][y_lo:y_hi])
+        seasonal = columns['seasonal'][s_lo:s_hi]
+        return {
+            'format': 'columnar',
+            'years': columns['years'][y_lo:y_hi].tolist(),
+            'tmax': [row[0] for row in yearly],
+            'tmin': [row[1] for row in yearly],
+            'avg': [row[2] for row in yearly],
+            'seasons': SEASONS,
+            'season_years': columns['season_years'][s_lo:s_hi].tolist(),
+            'seasonal_tmax': _nullable(seasonal[:, 0]),
+            'seasonal_tmin': _nullable(seasonal[:, 1]),
+        }
+
+    def encoded(self, firstyear: int, lastyear: int, fmt: str = 'nested') -> 'EncodedPayload':
+        """
+        Serialisiertes Zeitfenster. Fenster mit denselben enthaltenen Jahren teilen sich
+        einen Eintrag, pro Station werden die zuletzt genutzten ENCODED_WINDOWS_PER_STATION gehalten.
+        """
+        key = (fmt,) + self._bounds(firstyear, lastyear)
+        with self._encoded_lock:
+            payload = self._encoded.get(key)
+            if payload is not None:
+                self._encoded.move_to_end(key)
+                return payload
+        window = self.columnar if fmt == 'columnar' else self.window
+        payload = EncodedPayload(window(firstyear, lastyear))
+        with self._encoded_lock:
+            self._encoded[key] = payload
+            while len(self._encoded) > ENCODED_WINDOWS_PER_STATION:
+                self._encoded.popitem(last=False)
+        return payload
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Geschätzter Speicherbedarf: Jahres- und Saisonwerte, Spaltenmatrizen und serialisierte Fenster.
+        """
+        if '_base_nbytes' not in self.__dict__:
+            self.__dict__['_base_nbytes'] = _deep_sizeof(self.yearly) + _deep_sizeof(self.seasonal)
+        size = self.__dict__['_base_nbytes']
+        size += sum(column.nbytes for column in self.__dict__.get('_columns_cache', {}).values())
+        with self._encoded_lock:
+            size += sum(payload.nbytes for payload in self._encoded.values())
+        return size
+
+    @property
+    def _encoded(self) -> OrderedDict:
+        if '_encoded_cache' not in self.__dict__:
+            self.__dict__['_encoded_cache'] = OrderedDict()
+        return self.__dict__['_encoded_cache']
+
+    def __getstate__(self) -> dict:
+        # Serialisierte Fenster und Lock bleiben beim Transport zwischen Prozessen außen vor
+        return {'yearly': self.yearly, 'seasonal': self.seasonal}
+
+    def to_dict(self) -> dict:
+        return {
+            'yearly_summary': dict(self.yearly[1]),
+            'seasonal_summary': dict(self.seasonal[1])
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StationSummary':
+        return cls(data['yearly_summary'], data['seasonal_summary'])
+
+
+class EncodedPayload:
+    """
+    Einmalig serialisierte JSON-Antwort mit vorkomprimierten Varianten und starkem ETag.
+    Jede Kodierung erhält ein eigenes ETag, da sich die ausgelieferten Bytes unterscheiden.
+    """
+
+    def __init__(self, payload):
+        self.body = json_bytes(payload)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {}
+        if len(self.body) >= PRECOMPRESS_MIN_BYTES:
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            self.variants['gzip'] = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    def negotiate(self, accept_encoding: str = None) -> str:
+        """
+        Wählt die vom Client akzeptierte Kodierung (Accept-Encoding-Header), Brotli vor gzip;
+        None steht für unkomprimiert.
+        """
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_header(accept_encoding)
+        for encoding in self.variants:
+            if accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def render(self, accept_encoding: str = None, if_none_match: str = None) -> tuple:
+        """
+        Liefert (Status, Header, Body) unabhängig vom Webframework (Flask und ASGI).
+        """
+        encoding = self.negotiate(accept_encoding)
+        etag = self.etag if encoding is None else f"{self.etag}-{encoding}"
+        headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache',
+                   'Content-Type': 'application/json'}
+        if if_none_match and parse_etags(if_none_match).contains_weak(etag):
+            return 304, headers, b''
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return 200, headers, self.variants.get(encoding, self.body)
+
+    def response(self, req=None) -> Response:
+        if req is None:
+            status, headers, body = self.render()
+        else:
+            status, headers, body = self.render(req.headers.get('Accept-Encoding'), req.headers.get('If-None-Match'))
+        return Response(body, status=status, headers=headers)
+
+
+def pack_summary(summary: StationSummary) -> bytes:
+    return zlib.compress(json.dumps(summary.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+
+def unpack_summary(data: bytes) -> StationSummary:
+    return StationSummary.from_dict(json.loads(zlib.decompress(data)))
+
+
+class AggregateStore:
+    """
+    SQLite-Datei mit vorberechneten StationSummary-Objekten, indiziert über (station_id, southern).
+    Jeder Thread und Prozess öffnet eine eigene Verbindung; WAL erlaubt parallele Leser.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        if getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS aggregates ('
+                ' station_id TEXT NOT NULL,'
+                ' southern INTEGER NOT NULL,'
+                ' computed_at REAL NOT NULL,'
+                ' payload BLOB NOT NULL,'
+                ' PRIMARY KEY (station_id, southern)'
+                ') WITHOUT ROWID'
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get(self, station_id: str, southern: bool):
+        row = self._connection().execute(
+            'SELECT payload FROM aggregates WHERE station_id = ? AND southern = ?',
+            (station_id, int(southern))
+        ).fetchone()
+        if row is None:
+            return None
+        return unpack_summary(row[0])
+
+    def contains(self, station_id: str, southern: bool) -> bool:
+        return self._connection().execute(
+            'SELECT 1 FROM aggregates WHERE station_id = ? AND southern = ?',
+            (station_id, int(southern))
+        ).fetchone() is not None
+
+    def put(self, station_id: str, southern: bool, summary: StationSummary):
+        payload = pack_summary(summary)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO aggregates (station_id, southern, computed_at, payload) VALUES (?, ?, ?, ?)',
+                (station_id, int(southern), time.time(), payload)
+            )
+
+    def delete(self, station_ids) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.executemany('DELETE FROM aggregates WHERE station_id = ?',
+                                    [(station_id,) for station_id in station_ids]).rowcount
+
+    def keys(self) -> set:
+        return {(station_id, bool(southern))
+                for station_id, southern in self._connection().execute('SELECT station_id, southern FROM aggregates')}
+
+
+aggregate_store = AggregateStore(AGGREGATE_STORE_PATH) if AGGREGATE_STORE_PATH else None
+
+
+# Gemeinsame Cache-Backends. Alle bieten dieselbe Schnittstelle: Byte-Werte mit optionaler
+# Lebensdauer (get/set/contains/delete) und Zähler mit Ablaufzeit (incr/counter) für die Rate-Limits.
+# errors sind die Ausnahmen des Backends, bei denen der Cache umgangen wird.
+class MemoryCacheBackend:
+    """
+    Prozesslokaler LRU-Speicher; teilt nichts zwischen Workern.
+    """
+    errors = ()
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return self._live(key) is not None
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[1] <= now:
+                if len(self._counters) >= self.max_entries:
+                    self._counters = {k: c for k, c in self._counters.items() if c[1] > now}
+                counter = self._counters[key] = [0, now + ttl]
+            counter[0] += amount
+            return counter[0]
+
+    def counter(self, key: str) -> tuple:
+        """
+        (Zählerstand, Ablaufzeitpunkt); (0, None) für fehlende oder abgelaufene Zähler.
+        """
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[1] <= time.time():
+                return 0, None
+            return counter[0], counter[1]
+
+    def ping(self) -> bool:
+        return True
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries) + len(self._counters)
+            self._entries.clear()
+            self._counters.clear()
+            return removed
+
+
+class SQLiteCacheBackend:
+    """
+    SQLite-Datei, die sich alle Worker auf einem Host teilen. Bei mehr als max_entries
+    Einträgen werden die am längsten gespeicherten verdrängt.
+
+    Die Zähler der Rate-Limits liegen in einer eigenen Datei (path + '-counters'): jede Anfrage
+    schreibt dort, und mit eigener Schreibsperre und eigenem WAL wartet sie nie auf das
+    Speichern großer Zusammenfassungen oder deren Checkpoints.
+    """
+    errors = (sqlite3.Error, OSError)
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.counters_path = path + '-counters'
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    @staticmethod
+    def _open(path: str, schema: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(schema)
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        if getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._local.conn = self._open(
+                self.path, 'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+                           ' expires_at REAL, stored_at REAL NOT NULL) WITHOUT ROWID')
+            self._local.counters = self._open(
+                self.counters_path, 'CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY,'
+                                    ' value INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID')
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def _counters(self) -> sqlite3.Connection:
+        self._connection()
+        return self._local.counters
+
+    def get(self, key: str):
+        row = self._connection().execute(
+            'SELECT value FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO entries (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)',
+                         (key, value, now + ttl if ttl else None, now))
+            excess = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+                conn.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at LIMIT ?)',
+                             (conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries,))
+
+    def contains(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def delete(self, key: str):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+        counters = self._counters()
+        with counters:
+            counters.execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        now = time.time()
+        conn = self._counters()
+        with conn:
+            # Abgelaufene Zähler beginnen ein neues Fenster
+            return conn.execute(
+                'INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET'
+                ' value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END,'
+                ' expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END'
+                ' RETURNING value',
+                (key, amount, now + ttl, now, now)
+            ).fetchone()[0]
+
+    def counter(self, key: str) -> tuple:
+        row = self._counters().execute(
+            'SELECT value, expires_at FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return (0, None) if row is None else (row[0], row[1])
+
+    def ping(self) -> bool:
+        self._connection().execute('SELECT 1')
+        return True
+
+    def clear(self) -> int:
+        conn, counters = self._connection(), self._counters()
+        with conn, counters:
+            return (conn.execute('DELETE FROM entries').rowcount
+                    + counters.execute('DELETE FROM counters').rowcount)
+
+
+class RedisCacheBackend:
+    """
+    Redis oder ein kompatibler Server (Valkey, KeyDB, ...), geteilt über Hosts hinweg.
+    Alle Schlüssel erhalten das Präfix prefix.
+    """
+
+    def __init__(self, url: str, prefix: str = 'wetteranzeige:'):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis:// benötigt das Paket redis")
+        # RESP2 sprechen alle kompatiblen Server, auch solche ohne HELLO
+        self.client = redis.Redis.from_url(url, protocol=2, socket_timeout=HTTP_CONNECT_TIMEOUT,
+                                           socket_connect_timeout=HTTP_CONNECT_TIMEOUT)
+        self.prefix = prefix
+        self.errors = (redis.RedisError,)
+
+    def get(self, key: str):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def contains(self, key: str) -> bool:
+        return bool(self.client.exists(self.prefix + key))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        # In einer Transaktion: der erste Treffer im Fenster legt den Zähler mit Ablaufzeit an,
+        # ein Absturz dazwischen kann keinen Zähler ohne Ablaufzeit hinterlassen
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(self.prefix + key, 0, px=max(1, int(ttl * 1000)), nx=True)
+        pipe.incrby(self.prefix + key, amount)
+        return pipe.execute()[1]
+
+    def counter(self, key: str) -> tuple:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self.prefix + key)
+        pipe.pttl(self.prefix + key)
+        value, pttl = pipe.execute()
+        if value is None:
+            return 0, None
+        return int(value), time.time() + pttl / 1000 if pttl > 0 else None
+
+    def ping(self) -> bool:
+        return bool(self.client.ping())
+
+    def clear(self) -> int:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        return self.client.delete(*keys) if keys else 0
+
+
+def cache_backend_from_url(url: str):
+    """
+    Erzeugt das Cache-Backend zu einer URL wie memory://, sqlite:///pfad oder redis://host:6379/0.
+    """
+    scheme = urlsplit(url).scheme
+    if scheme == 'memory':
+        return MemoryCacheBackend()
+    if scheme == 'sqlite':
+        path = url[len('sqlite://'):] or os.path.join(CACHE_DIR or tempfile.gettempdir(), 'shared-cache.sqlite')
+        return SQLiteCacheBackend(path)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unbekanntes Cache-Backend: {url!r}")
+
+
+shared_cache = cache_backend_from_url(CACHE_BACKEND) if CACHE_BACKEND else None
+
+
+class SharedLimiterStorage(LimiterStorage):
+    """
+    Speicher für flask-limiter (Schema shared://) auf Basis von shared_cache,
+    damit alle Worker dieselben Zähler sehen.
+    """
+    STORAGE_SCHEME = ['shared']
+    _PREFIX = 'limit:'
+
+    def __init__(self, uri: str = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def backend(self):
+        return shared_cache
+
+    @property
+    def base_exceptions(self):
+        return self.backend.errors or Exception
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self.backend.incr(self._PREFIX + key, amount, expiry)
+
+    def get(self, key: str) -> int:
+        return self.backend.counter(self._PREFIX + key)[0]
+
+    def get_expiry(self, key: str) -> float:
+        return self.backend.counter(self._PREFIX + key)[1] or time.time()
+
+    def check(self) -> bool:
+        try:
+            return self.backend.ping()
+        except self.backend.errors:
+            return False
+
+    def reset(self) -> int:
+        return self.backend.clear()
+
+    def clear(self, key: str):
+        self.backend.delete(self._PREFIX + key)
+
+
+# Vor limiter.init_app registriert: der Profiler startet vor und endet nach allen anderen
+# Request-Hooks, auch denen des Limiters
+@app.before_request
+def start_profile():
+    if profiler.enabled:
+        g.profile = profiler.start()
+
+
+@app.after_request
+def finish_profile(response):
+    state = g.pop('profile', None)
+    if state is not None:
+        label = f"{request.method} {request.full_path.rstrip('?')}"
+        if response.is_streamed:
+            # Gestreamte Antworten (Batch, Stationssuche) entstehen erst beim Ausliefern
+            response.call_on_close(lambda: profiler.finish(state, label))
+        else:
+            profiler.finish(state, label)
+    return response
+
+
+app.config.setdefault('RATELIMIT_STORAGE_URI',
+                      RATELIMIT_STORAGE_URI or ('shared://' if shared_cache is not None else 'memory://'))
+limiter.init_app(app)
+
+
+def station_latitude(station_id: str):
+    """
+    Liefert den Breitengrad einer Station laut Inventory (None, falls unbekannt).
+    """
+    try:
+        index = get_station_index(read_station_table(INVENTORY_URL, STATIONS_URL))
+    except Exception as e:
+        app.logger.warning(f"Inventory nicht verfügbar, Breitengrad von {station_id} unbekannt: {e}")
+        return None
+    position = index.position(station_id)
+    return None if position is None else float(index.table.coordinates(position)[0])
+
+
+def station_hemisphere(station_id: str, station_lat: float = None) -> bool:
+    """
+    True für Stationen der Südhalbkugel. Maßgeblich ist das Inventory;
+    station_lat dient nur als Ersatz für Stationen, die dort fehlen.
+    """
+    latitude = station_latitude(station_id)
+    if latitude is None:
+        latitude = station_lat or 0.0
+    return latitude < 0
+
+
+@single_flight_cache(maxsize=None, maxbytes=STATION_SUMMARY_CACHE_BYTES, sizeof=lambda summary: summary.nbytes)
+def aggregate_station_data(station_id: str, southern: bool) -> StationSummary:
+    """
+    Liefert die Jahres- und Saisonwerte einer Station über den gesamten Messzeitraum,
+    bevorzugt aus dem vorberechneten AggregateStore, danach aus dem gemeinsamen Cache der Worker
+    (CACHE_BACKEND). Gecached wird nur pro Station und Hemisphäre.
+    """
+    if aggregate_store is not None:
+        summary = aggregate_store.get(station_id, southern)
+        if summary is not None:
+            metrics.inc('wetteranzeige_summary_source_total', source='store')
+            return summary
+    key = f"summary:{station_id}:{int(southern)}"
+    if shared_cache is not None:
+        try:
+            cached = shared_cache.get(key)
+        except shared_cache.errors as e:
+            app.logger.warning(f"Gemeinsamer Cache nicht verfügbar: {e}")
+            cached = None
+        if cached is not None:
+            metrics.inc('wetteranzeige_summary_source_total', source='shared_cache')
+            return unpack_summary(cached)
+    metrics.inc('wetteranzeige_summary_source_total', source='computed')
+    with metrics.span('station_compute'):
+        future = station_executor.submit(station_id, southern)
+        summary = future.result(timeout=STATION_TIMEOUT_SECONDS)
+    profiler.add_stacks(getattr(future, 'worker_stacks', None), 'station_worker')
+    if shared_cache is not None:
+        try:
+            shared_cache.set(key, pack_summary(summary), ttl=SHARED_CACHE_TTL_SECONDS)
+        except shared_cache.errors as e:
+            app.logger.warning(f"Gemeinsamer Cache nicht verfügbar: {e}")
+    return summary
+
+
+def summary_available(station_id: str, southern: bool) -> bool:
+    """
+    True, wenn aggregate_station_data die Station ohne Download liefern kann.
+    """
+    if aggregate_station_data.peek(station_id, southern) is not None:
+        return True
+    if aggregate_store is not None and aggregate_store.contains(station_id, southern):
+        return True
+    try:
+        return shared_cache is not None and shared_cache.contains(f"summary:{station_id}:{int(southern)}")
+    except shared_cache.errors:
+        return False
+
+
+def invalidate_stations(station_ids: list):
+    """
+    Verwirft die Zusammenfassungen der Stationen (im Speicher, im gemeinsamen Cache und im
+    AggregateStore); die by_station-Dateien werden beim nächsten Zugriff revalidiert.
+    """
+    for station_id in station_ids:
+        for southern in (False, True):
+            aggregate_station_data.discard(station_id, southern)
+        station_file_cache.expire(station_id)
+    if aggregate_store is not None:
+        aggregate_store.delete(station_ids)
+    if shared_cache is not None:
+        try:
+            for station_id in station_ids:
+                for southern in (0, 1):
+                    shared_cache.delete(f"summary:{station_id}:{southern}")
+        except shared_cache.errors as e:
+            app.logger.warning(f"Gemeinsamer Cache nicht verfügbar: {e}")
+
+
+def compute_station_summary(station_id: str, southern: bool) -> StationSummary:
+    """
+    Lädt die Wetterdaten einer Station und berechnet die Jahres- und Saisonwerte.
+    """
+    app.logger.info(f"Processing weather data for station {station_id} - cache miss")
+    with metrics.span('station_fetch'):
+        raw = station_file_cache.open(station_id)
+    with raw:
+        observations = parse_station_file(raw)
+    keep = ~observations['quality_flagged'] if SKIP_QUALITY_FLAGGED else slice(None)
+    with metrics.span('station_aggregate'):
+        return summarize_temperatures(
+            observations['year'][keep],
+            observations['month'][keep],
+            observations['is_tmax'][keep],
+            observations['value'][keep],
+            southern
+        )
+
+
+def _pooled_station_summary(station_id: str, southern: bool) -> tuple:
+    # Läuft im Pool-Prozess; die dort erfassten Messwerte und (bei aktivem Profiling) Stacks
+    # gehen mit dem Ergebnis zurück
+    stacks = Counter()
+    with metrics.capture() as records:
+        if profiler.enabled:
+            with profiler.sampler.sample() as stacks:
+                summary = compute_station_summary(station_id, southern)
+        else:
+            summary = compute_station_summary(station_id, southern)
+    return summary, records, stacks
+
+
+class StationExecutorBusy(Exception):
+    """
+    Die Warteschlange des StationExecutor ist voll; der Client soll es nach retry_after Sekunden erneut versuchen.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Station processing queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class StationExecutor:
+    """
+    Führt compute_station_summary in einem Prozess-Pool aus, damit Dekompression, Parsing
+    und Aggregation den Request-Thread nicht blockieren.
+
+    Gleichzeitige Anfragen für dieselbe Station teilen sich ein Future. Sind bereits
+    max_pending Berechnungen offen, wird StationExecutorBusy ausgelöst.
+    Mit workers=0 wird im aufrufenden Thread gerechnet (Tests, Entwicklung).
+    """
+
+    def __init__(self, workers: int = STATION_WORKERS, max_pending: int = STATION_QUEUE_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'deduplicated': 0, 'rejected': 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending=len(self._inflight))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn statt fork: der Webserver ist multithreaded
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def submit(self, station_id: str, southern: bool) -> Future:
+        key = (station_id, southern)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats['deduplicated'] += 1
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise StationExecutorBusy(STATION_RETRY_AFTER_SECONDS)
+            self._stats['submitted'] += 1
+            if self.workers > 0:
+                try:
+                    pooled = self._pool().submit(_pooled_station_summary, station_id, southern)
+                except BrokenProcessPool:
+                    # Abgestürzten Pool ersetzen
+                    self._executor = None
+                    pooled = self._pool().submit(_pooled_station_summary, station_id, southern)
+                future = Future()
+                future.set_running_or_notify_cancel()
+                pooled.add_done_callback(lambda done: self._unpack(done, future))
+            else:
+                future = Future()
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._done(key, future))
+
+        if self.workers <= 0 and future.set_running_or_notify_cancel():
+            try:
+                future.set_result(compute_station_summary(station_id, southern))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    @staticmethod
+    def _unpack(pooled: Future, future: Future):
+        # Messwerte aus dem Pool-Prozess übernehmen, Aufrufer erhalten nur die Zusammenfassung;
+        # die Stacks stehen als future.worker_stacks für das Profil der wartenden Anfragen bereit
+        try:
+            summary, records, stacks = pooled.result()
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        metrics.merge(records)
+        future.worker_stacks = stacks
+        future.set_result(summary)
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def reset(self):
+        # Nach fork: Pool und offene Futures gehören dem Elternprozess
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+
+station_executor = StationExecutor()
+
+
+def _reset_after_fork():
+    http_fetcher.reset()
+    station_executor.reset()
+    metrics.after_fork()
+    profiler.after_fork()
+    inventory_refresher.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def station_payload(station_id: str, firstyear: int, lastyear: int, station_lat: float = None,
+                    fmt: str = 'nested') -> EncodedPayload:
+    """
+    Serialisierte Wetterdaten einer Station für den Zeitraum firstyear-lastyear.
+    Die Hemisphäre bestimmt station_hemisphere. fmt ist eines von RESPONSE_FORMATS.
+    """
+    southern = station_hemisphere(station_id, station_lat)
+    summary = aggregate_station_data(station_id, southern)
+    with metrics.span('station_encode'):
+        payload = summary.encoded(firstyear, lastyear, fmt)
+    # Neu serialisierte Fenster vergrößern den Cache-Eintrag
+    aggregate_station_data.resized(station_id, southern)
+    return payload
+
+
+def process_station_data(station_id: str, firstyear: int, lastyear: int, station_lat: float = None,
+                         fmt: str = 'nested') -> tuple:
+    """
+    Liefert die Wetterdaten einer Station als Flask-Response, siehe station_payload.
+    """
+    payload = station_payload(station_id, firstyear, lastyear, station_lat, fmt)
+    response = payload.response(request if has_request_context() else None)
+    return response, response.status_code
+
+
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='station-batch')
+
+
+def batch_line(station_id: str, payload: EncodedPayload = None, error: Exception = None) -> bytes:
+    """
+    Eine Ergebniszeile des Batch-Endpoints; die serialisierte Antwort wird unverändert als "data" eingebettet.
+    """
+    prefix = b'{"station_id":' + json_bytes(station_id)
+    if isinstance(error, StationExecutorBusy):
+        return prefix + b',"status":503,"retry_after":' + json_bytes(error.retry_after) + b'}'
+    if error is not None:
+        app.logger.error(f"Error processing station data for {station_id}: {error}")
+        return prefix + b',"status":500,"error":' + json_bytes(str(error)) + b'}'
+    return prefix + b',"status":200,"data":' + payload.body + b'}'
+
+
+def stream_station_batch(station_ids: list, firstyear: int, lastyear: int, fmt: str = 'nested'):
+    """
+    Lädt alle Stationen parallel und liefert pro Station eine JSON-Zeile (bytes), sobald sie fertig ist.
+    """
+    futures = {batch_pool.submit(station_payload, station_id, firstyear, lastyear, None, fmt): station_id
+               for station_id in station_ids}
+    try:
+        for future in as_completed(futures):
+            try:
+                payload = future.result()
+            except Exception as e:
+                yield batch_line(futures[future], error=e)
+            else:
+                yield batch_line(futures[future], payload)
+    finally:
+        # Client hat die Verbindung abgebrochen: noch nicht gestartete Stationen verwerfen
+        for future in futures:
+            future.cancel()
+
+
+# Request-Parameter und Stream-Formate, gemeinsam für Flask und den ASGI-Einstiegspunkt (asgi.py).
+# Die Parser erhalten ein Mapping mit .get() und melden ungültige Angaben als ValueError.
+BATCH_SSE_END = b'data: finished\n\n'
+
+
+def parse_station_args(args) -> dict:
+    station_id = args.get('station_id')
+    if not station_id:
+        raise ValueError("Missing station_id")
+    if not STATION_ID_PATTERN.match(station_id):
+        raise ValueError(f"Invalid station_id: {station_id!r}")
+    fmt = args.get('format', 'nested')
+    if fmt not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+    station_lat = args.get('station_lat')
+    return {
+        'station_id': station_id,
+        'firstyear': int(args.get('firstyear', 1900)),
+        'lastyear': int(args.get('lastyear', 2100)),
+        'station_lat': float(station_lat) if station_lat is not None else None,
+        'fmt': fmt,
+    }
+
+
+def parse_batch_args(args) -> dict:
+    station_ids = list(dict.fromkeys(s for s in args.get('station_ids', '').split(',') if s))
+    if not station_ids:
+        raise ValueError("Missing station_ids")
+    if len(station_ids) > BATCH_MAX_STATIONS:
+        raise ValueError(f"At most {BATCH_MAX_STATIONS} stations per request")
+    invalid = [station_id for station_id in station_ids if not STATION_ID_PATTERN.match(station_id)]
+    if invalid:
+        raise ValueError(f"Invalid station_ids: {', '.join(invalid)}")
+    fmt = args.get('format', 'nested')
+    if fmt not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+    return {
+        'station_ids': station_ids,
+        'firstyear': int(args.get('firstyear', 1900)),
+        'lastyear': int(args.get('lastyear', 2100)),
+        'fmt': fmt,
+    }
+
+
+def batch_cost(args) -> int:
+    """
+    Rate-Limit-Kosten einer Batch-Anfrage: eine Einheit pro Station wie bei /api/station_data,
+    ungültige Anfragen zählen einfach.
+    """
+    try:
+        return len(parse_batch_args(args)['station_ids'])
+    except ValueError:
+        return 1
+
+
+def parse_search_args(args) -> dict:
+    max_stations = int(args.get("max_stations", 5))
+    # Optionales Paging: limit Stationen pro Antwort ab Rang cursor (innerhalb von max_stations)
+    cursor = int(args.get("cursor") or 0)
+    limit = args.get("limit")
+    limit = int(limit) if limit else None
+    # limit=0 lieferte next_cursor == cursor, ein Client bliebe auf derselben Seite stehen
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    end = max_stations if limit is None else min(max_stations, cursor + limit)
+    if cursor < 0 or end < cursor:
+        raise ValueError("Invalid limit or cursor")
+    return {
+        'lat': float(args.get("lat", 48.060711110885094)),
+        'lon': float(args.get("lon", 8.533784762385885)),
+        'max_dist_km': float(args.get("max_dist_km", 50.0)),
+        'max_stations': max_stations,
+        'firstyear': int(args.get("firstyear", 2010)),
+        'lastyear': int(args.get("lastyear", 2015)),
+        'cursor': cursor,
+        'end': end,
+    }
+
+
+def wants_event_stream(accept: str) -> bool:
+    """
+    Batch-Antwort als SSE statt NDJSON, wenn der Client text/event-stream bevorzugt.
+    """
+    best = parse_accept_header(accept or '', MIMEAccept).best_match(['application/x-ndjson', 'text/event-stream'])
+    return best == 'text/event-stream'
+
+
+def batch_frame(line: bytes, sse: bool) -> bytes:
+    return b'data: ' + line + b'\n\n' if sse else line + b'\n'
+
+
+def station_search_events(stations, params: dict):
+    """
+    SSE-Ereignisse der Stationssuche: eine Station pro Ereignis, optional der Cursor
+    der nächsten Seite, zuletzt "finished".
+    """
+    cursor, end = params['cursor'], params['end']
+    # Eine Station mehr als angefordert zeigt an, ob eine weitere Seite existiert
+    for rank, station in enumerate(islice(stations, end - cursor + 1), start=cursor):
+        if rank == end:
+            if end < params['max_stations']:
+                yield b"event: cursor\ndata: " + json_bytes({'next_cursor': str(end)}) + b"\n\n"
+            break
+        yield b"data: " + json_bytes(station) + b"\n\n"
+    yield b"data: finished\n\n"
+
+
+def search_stations(params: dict):
+    """
+    Führt die Stationssuche aus und liefert den Stations-Iterator für station_search_events.
+    """
+    return iter_stations_within_radius(
+        INVENTORY_URL, params['lat'], params['lon'], params['max_dist_km'],
+        params['firstyear'], params['lastyear'], offset=params['cursor']
+    )
+
+
+_preload_state = {'error': None, 'seconds': None}
+
+
+def preload_station_data() -> bool:
+    """
+    Lädt die Stationstabelle (Inventory und Stationsnamen) und baut den räumlichen Index.
+    Unter gunicorn (gunicorn.conf.py) läuft das einmal im Master-Prozess vor dem Forken,
+    die Worker teilen Tabelle und Index dann copy-on-write.
+    """
+    app.logger.info("Preloading station data...")
+    started = time.perf_counter()
+    try:
+        get_station_index(read_station_table(INVENTORY_URL, STATIONS_URL))
+    except Exception as e:
+        app.logger.error(f"Error preloading station data: {e}")
+        _preload_state['error'] = str(e)
+        return False
+    _preload_state.update(error=None, seconds=round(time.perf_counter() - started, 3))
+    app.logger.info("Station data preloaded successfully.")
+    return True
+
+
+class InventoryRefresher:
+    """
+    Hält die Stationstabelle (Inventory und Stationsnamen) samt Index aktuell, ohne Anfragen zu blockieren.
+
+    Alle interval Sekunden wird per Validator (ETag/Last-Modified) geprüft, ob NOAA eine neue
+    Version veröffentlicht hat. Nur dann wird sie im Hintergrund-Thread geparst (bzw. aus dem
+    Snapshot eines anderen Workers geladen), mit dem aktuellen Stand verglichen und samt neu
+    gebautem Index in einem Schritt ausgetauscht. Verworfen werden nur die Zusammenfassungen
+    der Stationen, deren Jahresabdeckung sich geändert hat oder die entfernt wurden.
+    """
+
+    def __init__(self, interval: float = INVENTORY_REFRESH_SECONDS):
+        self.interval = interval
+        self.last = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def after_fork(self):
+        # Der Thread des Elternprozesses läuft im Kind nicht weiter
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='inventory-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                app.logger.error(f"Aktualisierung des Inventory fehlgeschlagen: {e}")
+
+    def refresh(self):
+        """
+        Prüft beide Quellen und tauscht bei einer Änderung die Stationstabelle samt Index aus.
+        Liefert den Unterschied im Inventory (siehe diff_inventory) oder None, wenn beide
+        Quellen unverändert sind.
+        """
+        with self._lock:
+            return self._refresh_table(INVENTORY_URL, STATIONS_URL)
+
+    @staticmethod
+    def _changed_validator(url: str, kind: str):
+        validator = source_validator(url, kind)
+        return validator if validator is not None and validator != _source_validators.get(url) else None
+
+    def _refresh_table(self, inventory_url: str, stations_url: str):
+        # Eine noch nicht geladene Tabelle lädt der erste Zugriff regulär
+        current = read_station_table.peek(inventory_url, stations_url)
+        if current is None:
+            return None
+        changed = {inventory_url: self._changed_validator(inventory_url, 'inventory'),
+                   stations_url: self._changed_validator(stations_url, 'stations')}
+        if not any(changed.values()):
+            return None
+        # Die unveränderte Quelle kommt aus ihrem Snapshot
+        validators = {url: validator or _source_validators.get(url) for url, validator in changed.items()}
+        with metrics.span('inventory_refresh'):
+            table = load_station_table(inventory_url, stations_url, validators)
+            with metrics.span('index_build'):
+                index = StationIndex(table)
+            diff = diff_inventory(current, table)
+            install_station_table(inventory_url, stations_url, table, index, validators)
+            invalidate_stations(diff['changed'] + diff['removed'])
+        metrics.inc('wetteranzeige_inventory_refreshes_total')
+        for kind, station_ids in diff.items():
+            metrics.inc('wetteranzeige_inventory_stations_total', len(station_ids), change=kind)
+        self.last = {'time': time.time(), 'stations': len(table),
+                     **{kind: len(station_ids) for kind, station_ids in diff.items()}}
+        app.logger.info(f"Inventory aktualisiert: {len(table)} Stationen, {len(diff['added'])} neu, "
+                        f"{len(diff['removed'])} entfernt, {len(diff['changed'])} mit neuen Daten")
+        return diff
+
+
+inventory_refresher = InventoryRefresher()
+
+
+def station_data_ready() -> bool:
+    """
+    Bereit, sobald der räumliche Index existiert (vorgeladen oder von der ersten Suche gebaut).
+    """
+    return _station_index_cache.get('current') is not None
+
+
+# Flask Endpoints
+@app.route('/health', methods=['GET'])
+@limiter.exempt
+def health():
+    """
+    Readiness für Load-Balancer und Orchestrierung: 200 erst, wenn der Stationsindex gebaut ist, sonst 503.
+    """
+    ready = station_data_ready()
+    cached = _station_index_cache.get('current')
+    body = {
+        "status": "ready" if ready else "starting",
+        "pid": os.getpid(),
+        "stations": len(cached[1]) if cached else 0,
+        "preload_seconds": _preload_state['seconds'],
+        "preload_error": _preload_state['error'],
+    }
+    return jsonify(body), 200 if ready else 503
+
+
+@app.route('/api/stats', methods=['GET'])
+def cache_stats():
+    """
+    Kennzahlen der Caches und Warteschlangen dieses Worker-Prozesses.
+    """
+    return jsonify({
+        "pid": os.getpid(),
+        "station_summaries": aggregate_station_data.stats(),
+        "station_files": station_file_cache.stats(),
+        "station_executor": station_executor.stats(),
+        "http": http_fetcher.stats(),
+        "inventory_refresh": inventory_refresher.last,
+    })
+
+
+def metrics_samples() -> list:
+    """
+    Kennzahlen aus den stats() der prozessinternen Caches, Warteschlangen und der HTTP-Schicht
+    als (name, typ, labels, wert) für Metrics.render.
+    """
+    samples = []
+    for name, cache in (('station_summaries', aggregate_station_data), ('station_table', read_station_table)):
+        stats = cache.stats()
+        for event in ('hits', 'misses', 'coalesced', 'evictions'):
+            samples.append(('wetteranzeige_cache_events_total', 'counter', {'cache': name, 'event': event},
+                            stats[event]))
+        samples.append(('wetteranzeige_cache_entries', 'gauge', {'cache': name}, stats['currsize']))
+        samples.append(('wetteranzeige_cache_bytes', 'gauge', {'cache': name}, stats['bytes']))
+    executor = station_executor.stats()
+    for event in ('submitted', 'deduplicated', 'rejected'):
+        samples.append(('wetteranzeige_station_executor_total', 'counter', {'event': event}, executor[event]))
+    samples.append(('wetteranzeige_station_executor_pending', 'gauge', {}, executor['pending']))
+    for event, value in http_fetcher.stats().items():
+        samples.append(('wetteranzeige_http_requests_total', 'counter', {'event': event}, value))
+    samples.append(('wetteranzeige_station_index_ready', 'gauge', {}, int(station_data_ready())))
+    cached = _station_index_cache.get('current')
+    samples.append(('wetteranzeige_station_table_bytes', 'gauge', {}, cached[0].nbytes if cached else 0))
+    return samples
+
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def prometheus_metrics():
+    """
+    Zähler und Laufzeiten dieses Worker-Prozesses im Prometheus-Textformat. Unter gunicorn
+    zählt jeder Worker für sich, wetteranzeige_process_info nennt den antwortenden Prozess.
+    """
+    body = metrics.render(metrics_samples() + [('wetteranzeige_process_info', 'gauge', {'pid': os.getpid()}, 1)])
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Die aufbewahrten Profile dieses Worker-Prozesses (siehe RequestProfiler), langsamstes zuerst.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    return jsonify({
+        "pid": os.getpid(),
+        "slow_ms": profiler.slow_seconds * 1000,
+        "sample_rate": profiler.sample_rate,
+        "profiles": profiler.profiles(),
+    })
+
+
+@app.route('/admin/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    Ein Profil als collapsed stacks (Standard), ?format=pstats oder ?format=text.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    record = profiler.get(profile_id)
+    if record is None:
+        return jsonify({"error": f"Unknown profile: {profile_id}"}), 404
+    try:
+        body, content_type = profile_output(record, request.args.get('format', 'collapsed'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(body, content_type=content_type)
+
+
+def admin_denied():
+    """
+    None, wenn die Admin-Endpoints erreichbar sind, sonst die Fehlerantwort.
+    """
+    if not profiler.enabled:
+        return jsonify({"error": "Profiling is disabled (PROFILE_SLOW_MS, PROFILE_SAMPLE_RATE)"}), 404
+    if not ADMIN_TOKEN:
+        # Ohne Token nur lokal erreichbar: Profile enthalten Pfade, Query-Strings und Stacks
+        if request.remote_addr not in ('127.0.0.1', '::1'):
+            return jsonify({"error": "ADMIN_TOKEN is not set, admin endpoints are local only"}), 403
+        return None
+    authorization = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        return jsonify({"error": "Unauthorized"}), 401, {"WWW-Authenticate": "Bearer"}
+    return None
+
+
+@app.before_request
+def start_server_timing():
+    if SERVER_TIMING:
+        metrics.start_request()
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def add_server_timing(response):
+    if SERVER_TIMING and 'request_started' in g:
+        timings = metrics.finish_request()
+        timings['total'] = time.perf_counter() - g.request_started
+        response.headers['Server-Timing'] = server_timing(timings)
+    return response
+
+
+@app.route('/api/station_data', methods=['GET'])
+@limiter.limit("30 per minute")
+def get_station_weather_data():
+    try:
+        params = parse_station_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    station_id = params['station_id']
+    try:
+        app.logger.info(f"Fetching data for station {station_id} for years {params['firstyear']}-{params['lastyear']}, "
+                        f"lat: {params['station_lat']}")
+        return process_station_data(station_id, params['firstyear'], params['lastyear'],
+                                    params['station_lat'], params['fmt'])
+    except StationExecutorBusy as e:
+        app.logger.warning(f"Station processing saturated, rejecting {station_id}")
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
+    except Exception as e:
+        app.logger.error(f"Error processing station data: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/station_data/batch', methods=['GET'])
+@limiter.limit("30 per minute", cost=lambda: batch_cost(request.args))
+def get_station_weather_batch():
+    """
+    Wetterdaten mehrerer Stationen (station_ids, kommagetrennt) in einer Anfrage.
+    Antwort als NDJSON, bei Accept: text/event-stream als SSE mit abschließendem "finished".
+    """
+    try:
+        params = parse_batch_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    app.logger.info(f"Fetching batch of {len(params['station_ids'])} stations "
+                    f"for years {params['firstyear']}-{params['lastyear']}")
+    sse = wants_event_stream(request.headers.get('Accept'))
+
+    def generate():
+        for line in stream_station_batch(**params):
+            yield batch_frame(line, sse)
+        if sse:
+            yield BATCH_SSE_END
+
+    return Response(generate(), content_type='text/event-stream' if sse else 'application/x-ndjson',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/api/find_stations', methods=['GET'])
+@limiter.limit("30 per minute")
+def find_stations():
+    try:
+        params = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        stations = search_stations(params)
+    except Exception as e:
+        app.logger.error(f"Fehler bei der Stationssuche: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    return Response(
+        station_search_events(stations, params),
         content_type='text/event-stream',
-        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+        headers={"Cache-Control": "no-cache"}
     )
 
 
@@ -292,16 +3227,85 @@ def index():
     return render_template('index.html')
 
 
+# Batch-Vorberechnung
+def _precompute_worker(station_id: str, southern: bool) -> tuple:
+    # Läuft im Worker-Prozess; Fehler werden als Text zurückgegeben, damit der Batch weiterläuft
+    try:
+        return station_id, southern, compute_station_summary(station_id, southern), None
+    except Exception as e:
+        return station_id, southern, None, f"{type(e).__name__}: {e}"
+
+
+def precompute_aggregates(stations: list, store: AggregateStore, workers: int = 1,
+                          refresh: bool = False, progress=None) -> dict:
+    """
+    Berechnet die Zusammenfassungen für eine Liste von (station_id, southern) und legt sie im Store ab.
+    Bereits vorhandene Einträge werden übersprungen (außer refresh=True), so dass ein
+    abgebrochener Lauf einfach erneut gestartet werden kann. Doppelte Einträge zählen einmal.
+    """
+    stations = list(dict.fromkeys(stations))
+    done = set() if refresh else store.keys()
+    pending = [key for key in stations if key not in done]
+    stats = {'total': len(stations), 'skipped': len(stations) - len(pending), 'stored': 0, 'failed': 0}
+
+    def record(index, result):
+        station_id, southern, summary, error = result
+        if summary is not None:
+            store.put(station_id, southern, summary)
+            stats['stored'] += 1
+        else:
+            stats['failed'] += 1
+        if progress is not None:
+            progress(index, len(pending), station_id, error)
+
+    if workers <= 1:
+        for i, (station_id, southern) in enumerate(pending, 1):
+            record(i, _precompute_worker(station_id, southern))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_precompute_worker, station_id, southern) for station_id, southern in pending]
+            for i, future in enumerate(as_completed(futures), 1):
+                record(i, future.result())
+    return stats
+
+
+@app.cli.command('precompute')
+@click.argument('station_ids', nargs=-1)
+@click.option('--all', 'all_stations', is_flag=True, help='Alle Stationen aus dem Inventory berechnen.')
+@click.option('--from-file', type=click.File(), help='Datei mit einer Station ID pro Zeile.')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Anzahl Worker-Prozesse.')
+@click.option('--refresh', is_flag=True, help='Vorhandene Einträge neu berechnen.')
+def precompute_command(station_ids, all_stations, from_file, workers, refresh):
+    """Berechnet Jahres- und Saisonwerte vorab und legt sie im AggregateStore ab."""
+    if aggregate_store is None:
+        raise click.ClickException("AGGREGATE_STORE_PATH ist nicht gesetzt")
+    index = get_station_index(read_station_table(INVENTORY_URL, STATIONS_URL))
+    ids = list(station_ids)
+    if from_file is not None:
+        ids += [line.strip() for line in from_file if line.strip()]
+    if all_stations:
+        ids += _decode_ids(index.table.ids)
+    if not ids:
+        raise click.UsageError("Keine Stationen angegeben (STATION_IDS, --from-file oder --all)")
+
+    def southern(station_id):
+        position = index.position(station_id)
+        return position is not None and index.table.lat[position] < 0
+
+    def progress(i, total, station_id, error):
+        status = f"FEHLER {error}" if error else "ok"
+        click.echo(f"[{i}/{total}] {station_id} {status}")
+
+    started = time.perf_counter()
+    stats = precompute_aggregates([(station_id, southern(station_id)) for station_id in ids],
+                                  aggregate_store, workers, refresh, progress)
+    click.echo(f"{stats['stored']} gespeichert, {stats['skipped']} übersprungen, "
+               f"{stats['failed']} fehlgeschlagen in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == '__main__':
     with app.app_context():
-        try:
-            app.logger.info("Preloading station data...")
-            csv_url = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
-            csv_url_city = "https://www1.ncdc.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
-            read_ghcnd_stations(csv_url)
-            read_station_cities(csv_url_city)
-            app.logger.info("Station data preloaded successfully.")
-        except Exception as e:
-            app.logger.error(f"Error preloading station data: {e}")
+        preload_station_data()
+    inventory_refresher.start()
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
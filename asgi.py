@@ -0,0 +1,334 @@
+"""
+ASGI-Einstiegspunkt mit asynchronen Varianten der I/O-lastigen Endpoints.
+
+Aufruf:
+    uvicorn asgi:application --host 0.0.0.0 --port 8080
+
+/api/station_data, /api/station_data/batch und /api/find_stations laufen direkt auf der
+Event-Loop: by_station-Dateien werden über httpx.AsyncClient in den StationFileCache geladen,
+Parsen und Aggregation laufen wie im synchronen Pfad über aggregate_station_data
+(Prozess-Pool bzw. Thread). Ein wartender Download belegt damit keinen Thread, ein Prozess
+kann Hunderte offene Abrufe halten. Alle übrigen Routen gehen unverändert an die Flask-App.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from limits import parse as parse_limit
+
+import app
+
+
+# Gleichzeitige Verbindungen insgesamt und pro Host sowie Threads für blockierende Schritte
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_MAX_CONNECTIONS', 256))
+ASYNC_MAX_PER_HOST = int(os.environ.get('ASYNC_MAX_PER_HOST', 64))
+ASYNC_THREADS = int(os.environ.get('ASYNC_THREADS', 64))
+RATE_LIMIT = parse_limit("30 per minute")
+
+
+class AsyncStationFetcher:
+    """
+    Lädt by_station-Dateien asynchron in den StationFileCache, mit denselben Regeln wie
+    HttpFetcher: Timeouts, Wiederholungen mit Backoff bei Verbindungsfehlern und 429/5xx,
+    Obergrenze pro Host. Gleichzeitige Abrufe derselben Station werden zusammengefasst.
+    """
+
+    def __init__(self, max_connections: int = ASYNC_MAX_CONNECTIONS, max_per_host: int = ASYNC_MAX_PER_HOST,
+                 retries: int = app.HTTP_RETRIES, backoff: float = app.HTTP_BACKOFF_SECONDS):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+        self._hosts = {}
+        self._pending = {}
+        self._stats = {'downloads': 0, 'coalesced': 0, 'revalidated': 0, 'stale': 0, 'retries': 0}
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=len(self._pending))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Erst in der laufenden Event-Loop anlegen
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections),
+                timeout=httpx.Timeout(app.HTTP_READ_TIMEOUT, connect=app.HTTP_CONNECT_TIMEOUT),
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return self._hosts[host]
+
+    async def ensure_cached(self, station_id: str):
+        """
+        Sorgt dafür, dass eine aktuelle Kopie der Station im StationFileCache liegt.
+        Ohne Cache-Verzeichnis lädt der synchrone Pfad die Datei selbst.
+        """
+        cache = app.station_file_cache
+        if not cache.needs_download(station_id):
+            return
+        task = self._pending.get(station_id)
+        if task is None:
+            task = self._pending[station_id] = asyncio.ensure_future(self._download(cache, station_id))
+            task.add_done_callback(lambda _: self._pending.pop(station_id, None))
+        else:
+            self._stats['coalesced'] += 1
+        # shield: ein abgebrochener Aufrufer beendet nicht den Download der übrigen
+        await asyncio.shield(task)
+
+    async def _download(self, cache, station_id: str):
+        url = cache.url(station_id)
+        headers = cache.conditional_headers(station_id)
+        has_copy = os.path.exists(cache.path(station_id))
+        try:
+            async with self._slot(url):
+                with app.metrics.span('station_download'):
+                    await self._fetch(cache, station_id, url, headers if has_copy else {})
+        except httpx.HTTPError as e:
+            if not has_copy:
+                raise
+            # NOAA nicht erreichbar: vorhandene Kopie weiterverwenden
+            self._stats['stale'] += 1
+            cache.mark_stale(station_id, e)
+
+    async def _fetch(self, cache, station_id: str, url: str, headers: dict):
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                async with self.client.stream('GET', url, headers=headers) as response:
+                    if response.status_code in app.HttpFetcher.RETRY_STATUS and attempt < self.retries:
+                        retry_after = response.headers.get('Retry-After', '')
+                        delay = float(retry_after) if retry_after.isdigit() else delay
+                    elif response.status_code == 304 and headers:
+                        self._stats['revalidated'] += 1
+                        await asyncio.to_thread(cache.mark_revalidated, station_id)
+                        return
+                    else:
+                        response.raise_for_status()
+                        await self._store(cache, station_id, response)
+                        return
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            self._stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    async def _store(self, cache, station_id: str, response: httpx.Response):
+        tmp = cache.temp_path(station_id)
+        try:
+            # Dateizugriffe im Thread-Pool, die Event-Loop bedient währenddessen andere Verbindungen
+            f = await asyncio.to_thread(open, tmp, 'wb')
+            try:
+                async for chunk in response.aiter_raw():
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            # Sperren und Verdrängung können blockieren
+            await asyncio.to_thread(cache.store, station_id, tmp, response.headers)
+            self._stats['downloads'] += 1
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+class Request:
+    """
+    Die von den Endpoints benötigten Teile eines ASGI-HTTP-Scopes.
+    """
+
+    def __init__(self, scope: dict):
+        self.path = scope['path']
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+        self.args = {key: values[0] for key, values in query.items()}
+        self.headers = {key.decode('latin-1'): value.decode('latin-1') for key, value in scope.get('headers', [])}
+        self.client = (scope.get('client') or ('-', 0))[0]
+
+
+async def send_response(send, status: int, headers: dict, body: bytes = b''):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(key.lower().encode('latin-1'), str(value).encode('latin-1')) for key, value in headers.items()]
+                   + [(b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status: int, obj, headers: dict = None):
+    await send_response(send, status, {'Content-Type': 'application/json', **(headers or {})}, app.json_bytes(obj))
+
+
+async def start_stream(send, content_type: str, headers: dict):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', content_type.encode())]
+                   + [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers.items()],
+    })
+
+
+async def send_chunk(send, chunk: bytes, more: bool = True):
+    await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+
+
+class AsyncApp:
+    """
+    ASGI-Anwendung: asynchrone Station- und Suchendpoints, alles andere über WsgiToAsgi an Flask.
+    """
+
+    def __init__(self, flask_app, fetcher: AsyncStationFetcher = None):
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.fetcher = fetcher or AsyncStationFetcher()
+        self._preload = None
+        self.routes = {
+            '/api/station_data': self.station_data,
+            '/api/station_data/batch': self.station_batch,
+            '/api/find_stations': self.find_stations,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        handler = self.routes.get(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        request = Request(scope)
+        # Batch-Anfragen zählen wie in Flask einmal pro Station
+        cost = app.batch_cost(request.args) if handler == self.station_batch else 1
+        if app.limiter.enabled and not app.limiter.limiter.hit(RATE_LIMIT, 'asgi', request.client, request.path,
+                                                              cost=cost):
+            return await send_json(send, 429, {"error": f"Rate limit exceeded: {RATE_LIMIT}"}, {'Retry-After': '60'})
+
+        # Bricht der Client ab, werden laufende Abrufe dieser Anfrage abgebrochen
+        handler_task = asyncio.ensure_future(handler(request, send))
+        disconnect_task = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        await asyncio.wait({handler_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not handler_task.done():
+            handler_task.cancel()
+        disconnect_task.cancel()
+        try:
+            await handler_task
+        except asyncio.CancelledError:
+            pass
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                loop = asyncio.get_running_loop()
+                loop.set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_THREADS, thread_name_prefix='asgi'))
+                # Index im Hintergrund aufbauen; bis dahin meldet /health 503
+                if not app.station_data_ready():
+                    self._preload = loop.run_in_executor(None, app.preload_station_data)
+                app.inventory_refresher.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                app.inventory_refresher.stop()
+                await self.fetcher.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def station_payload(self, station_id: str, firstyear: int, lastyear: int, station_lat: float = None,
+                              fmt: str = 'nested') -> app.EncodedPayload:
+        """
+        Asynchrone Variante von app.station_payload: zuerst die Datei laden, dann rechnen.
+        """
+        southern = await asyncio.to_thread(app.station_hemisphere, station_id, station_lat)
+        summary = app.aggregate_station_data.peek(station_id, southern)
+        if summary is None:
+            if not await asyncio.to_thread(app.summary_available, station_id, southern):
+                await self.fetcher.ensure_cached(station_id)
+            summary = await asyncio.to_thread(app.aggregate_station_data, station_id, southern)
+        with app.metrics.span('station_encode'):
+            payload = await asyncio.to_thread(summary.encoded, firstyear, lastyear, fmt)
+        app.aggregate_station_data.resized(station_id, southern)
+        return payload
+
+    async def station_data(self, request: Request, send):
+        # Der Handler läuft als eigener Task, die Messungen dieser Anfrage bleiben in dessen Kontext
+        started = time.perf_counter()
+        if app.SERVER_TIMING:
+            app.metrics.start_request()
+        try:
+            params = app.parse_station_args(request.args)
+        except ValueError as e:
+            return await send_json(send, 400, {"error": str(e)})
+        try:
+            payload = await self.station_payload(**params)
+        except app.StationExecutorBusy as e:
+            app.app.logger.warning(f"Station processing saturated, rejecting {params['station_id']}")
+            return await send_json(send, 503, {"error": str(e)}, {'Retry-After': str(e.retry_after)})
+        except Exception as e:
+            app.app.logger.error(f"Error processing station data: {e}")
+            return await send_json(send, 500, {"error": str(e)})
+        status, headers, body = payload.render(request.headers.get('accept-encoding'),
+                                               request.headers.get('if-none-match'))
+        if app.SERVER_TIMING:
+            timings = app.metrics.finish_request()
+            timings['total'] = time.perf_counter() - started
+            headers = {**headers, 'Server-Timing': app.server_timing(timings)}
+        await send_response(send, status, headers, body)
+
+    async def _batch_line(self, station_id: str, params: dict) -> bytes:
+        try:
+            payload = await self.station_payload(station_id, params['firstyear'], params['lastyear'], None,
+                                                 params['fmt'])
+        except Exception as e:
+            return app.batch_line(station_id, error=e)
+        return app.batch_line(station_id, payload)
+
+    async def station_batch(self, request: Request, send):
+        try:
+            params = app.parse_batch_args(request.args)
+        except ValueError as e:
+            return await send_json(send, 400, {"error": str(e)})
+        sse = app.wants_event_stream(request.headers.get('accept'))
+        await start_stream(send, 'text/event-stream' if sse else 'application/x-ndjson',
+                           {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        tasks = [asyncio.ensure_future(self._batch_line(station_id, params)) for station_id in params['station_ids']]
+        try:
+            for next_line in asyncio.as_completed(tasks):
+                await send_chunk(send, app.batch_frame(await next_line, sse))
+        finally:
+            for task in tasks:
+                task.cancel()
+        await send_chunk(send, app.BATCH_SSE_END if sse else b'', more=False)
+
+    async def find_stations(self, request: Request, send):
+        try:
+            params = app.parse_search_args(request.args)
+        except ValueError as e:
+            return await send_json(send, 400, {"error": str(e)})
+        try:
+            # Beim ersten Aufruf wird das Inventory geladen
+            stations = await asyncio.to_thread(app.search_stations, params)
+        except Exception as e:
+            app.app.logger.error(f"Fehler bei der Stationssuche: {e}")
+            return await send_json(send, 500, {"error": str(e)})
+        await start_stream(send, 'text/event-stream', {'Cache-Control': 'no-cache'})
+        for event in app.station_search_events(stations, params):
+            await send_chunk(send, event)
+        await send_chunk(send, b'', more=False)
+
+
+application = AsyncApp(app.app)
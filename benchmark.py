@@ -0,0 +1,757 @@
+"""
+Offline-Benchmarks für die Hot Paths von app.py.
+
+Aufruf:
+    python benchmark.py seasonal [--years 100] [--repeat 5]
+    python benchmark.py parse [--years 100] [--repeat 5]
+    python benchmark.py payload [--years 100] [--repeat 5]
+    python benchmark.py sanitize [--years 100] [--repeat 5]
+    python benchmark.py suite [--stations 120000] [--station-years 10,50,150] [--queries 200] [--repeat 5]
+    python benchmark.py load [--clients 16] [--duration 10] [--load-stations 30]
+    python benchmark.py memory [--stations 120000]
+    python benchmark.py compare ALT.json NEU.json
+
+suite misst Inventory-Parsing, Indexaufbau, Radiussuche und /api/station_data (kalt, mit
+gecachter Datei, mit gecachter Zusammenfassung) auf synthetischen GHCN-Fixtures, die über
+einen lokalen HTTP-Server ausgeliefert werden. load treibt die Flask-Endpoints über einen
+lokalen Server mit mehreren gleichzeitigen Clients. memory misst den Speicherzuwachs eines
+Workers durch Stationstabelle und Index. Alle laufen komplett offline.
+
+Die Ergebnisse werden als JSON auf stdout (oder in --output) ausgegeben; compare stellt
+die p50/p99-Werte zweier Läufe gegenüber.
+"""
+import argparse
+import functools
+import gc
+import gzip
+import http.server
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import requests
+from werkzeug.serving import make_server
+
+import app
+
+
+# Synthetische Testdaten
+def synthetic_station_csv(years: int = 100, station_id: str = 'SYN00000001', seed: int = 0,
+                          elements=('TMAX', 'TMIN', 'PRCP', 'SNOW')) -> str:
+    """
+    Erzeugt eine by_station-Datei im GHCN-Format mit täglichen Werten über `years` Jahre.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{2024 - years + 1}-01-01", "2024-12-31", freq='D')
+    date_str = dates.strftime('%Y%m%d').to_numpy()
+    season = np.cos((dates.dayofyear.to_numpy() - 200) / 365.25 * 2 * np.pi)
+    lines = []
+    for element in elements:
+        if element == 'TMAX':
+            values = (150 + 100 * season + rng.normal(0, 30, len(dates))).astype(int)
+        elif element == 'TMIN':
+            values = (50 + 80 * season + rng.normal(0, 30, len(dates))).astype(int)
+        else:
+            values = rng.integers(0, 200, len(dates))
+        qflag = np.where(rng.random(len(dates)) < 0.001, 'I', '')
+        lines.append(pd.Series(station_id + ',' + date_str + f',{element},' + values.astype(str)
+                               + ',,' + qflag + ',E,0700'))
+    return '\n'.join(pd.concat(lines).tolist()) + '\n'
+
+
+def synthetic_station_gzip(years: int = 100, **kwargs) -> bytes:
+    return gzip.compress(synthetic_station_csv(years, **kwargs).encode('utf-8'))
+
+
+def load_station_dataframe(gz_bytes: bytes) -> pd.DataFrame:
+    with gzip.GzipFile(fileobj=io.BytesIO(gz_bytes)) as f:
+        data = pd.read_csv(
+            f,
+            header=None,
+            names=['ID', 'DATE', 'ELEMENT', 'VALUE', 'M-FLAG', 'Q-FLAG', 'S-FLAG', 'OBS-TIME'],
+            dtype={'ID': str, 'DATE': str, 'ELEMENT': str, 'VALUE': float,
+                   'M-FLAG': str, 'Q-FLAG': str, 'S-FLAG': str, 'OBS-TIME': str},
+            low_memory=False
+        )
+    data['DATE'] = pd.to_datetime(data['DATE'], format='%Y%m%d', errors='coerce')
+    return data
+
+
+# Referenzimplementierungen (Stand vor der Vektorisierung)
+def legacy_aggregate(data: pd.DataFrame, station_lat: float) -> dict:
+    """
+    Ursprüngliche Aggregation mit get_season per apply und .loc-Schleife.
+    """
+    data = data.copy()
+    data['YEAR'] = data['DATE'].dt.year.astype(str)
+    filtered = data[data['ELEMENT'].isin(['TMAX', 'TMIN'])].copy()
+    filtered['VALUE'] = pd.to_numeric(filtered['VALUE'], errors='coerce')
+    filtered.loc[filtered['ELEMENT'].isin(['TMAX', 'TMIN']), 'VALUE'] /= 10
+
+    yearly_tmax_avg = filtered[filtered['ELEMENT'] == 'TMAX'].groupby('YEAR')['VALUE'].mean()
+    yearly_tmin_avg = filtered[filtered['ELEMENT'] == 'TMIN'].groupby('YEAR')['VALUE'].mean()
+    yearly_overall_avg = filtered.groupby('YEAR')['VALUE'].mean()
+    yearly_result = pd.DataFrame({
+        'Max_Temperature (°C)': yearly_tmax_avg,
+        'Min_Temperature (°C)': yearly_tmin_avg,
+        'Year_Avg_Temperature (°C)': yearly_overall_avg
+    }).fillna(0)
+
+    season_data = filtered.copy()
+    season_data['month'] = season_data['DATE'].dt.month
+    season_data['year_int'] = season_data['DATE'].dt.year
+    season_data['season'] = season_data['month'].apply(lambda m: app.get_season(m, station_lat))
+    season_data['season_year'] = season_data['year_int']
+    season_data.loc[season_data['month'] == 12, 'season_year'] += 1
+    seasonal_tmax_avg = season_data[season_data['ELEMENT'] == 'TMAX'].groupby(['season_year', 'season'])['VALUE'].mean()
+    seasonal_tmin_avg = season_data[season_data['ELEMENT'] == 'TMIN'].groupby(['season_year', 'season'])['VALUE'].mean()
+
+    seasonal_summary = {}
+    for sy in sorted(season_data['season_year'].unique()):
+        sy_str = str(sy)
+        seasonal_summary[sy_str] = {}
+        for season in ['Winter', 'Spring', 'Summer', 'Autumn']:
+            tmax_val = seasonal_tmax_avg.loc[(sy, season)] if (sy, season) in seasonal_tmax_avg.index else None
+            tmin_val = seasonal_tmin_avg.loc[(sy, season)] if (sy, season) in seasonal_tmin_avg.index else None
+            seasonal_summary[sy_str][season] = {
+                'Max_Temperature (°C)': tmax_val if tmax_val is not None else 0,
+                'Min_Temperature (°C)': tmin_val if tmin_val is not None else 0,
+            }
+    return {
+        'yearly_summary': app.replace_nan_with_none(yearly_result.to_dict(orient='index')),
+        'seasonal_summary': app.replace_nan_with_none(seasonal_summary)
+    }
+
+
+def legacy_replace_nan_with_none(obj):
+    """
+    Ursprüngliche rekursive Bereinigung mit np.isnan pro Skalar.
+    """
+    if isinstance(obj, dict):
+        return {k: legacy_replace_nan_with_none(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_replace_nan_with_none(item) for item in obj]
+    elif isinstance(obj, (float, np.floating)) and np.isnan(obj):
+        return None
+    return obj
+
+
+def vectorized_aggregate(data: pd.DataFrame, station_lat: float) -> dict:
+    filtered = data[data['ELEMENT'].isin(['TMAX', 'TMIN']) & data['DATE'].notna()]
+    summary = app.summarize_temperatures(
+        filtered['DATE'].dt.year.to_numpy(),
+        filtered['DATE'].dt.month.to_numpy(),
+        (filtered['ELEMENT'] == 'TMAX').to_numpy(),
+        pd.to_numeric(filtered['VALUE'], errors='coerce').to_numpy(dtype=np.float64) / 10,
+        station_lat < 0
+    )
+    return summary.window(-10**9, 10**9)
+
+
+def synthetic_station_ids(stations: int) -> list:
+    return [f"SYN{i:08d}" for i in range(stations)]
+
+
+def _synthetic_coordinates(stations: int, seed: int) -> tuple:
+    # Gut zwei Drittel der Stationen in Ballungen, der Rest gleichmäßig verteilt
+    rng = np.random.default_rng(seed)
+    clustered = int(stations * 0.7)
+    centers = np.column_stack([rng.uniform(-45, 65, 60), rng.uniform(-180, 180, 60)])
+    picks = centers[rng.integers(0, len(centers), clustered)]
+    lat = np.concatenate([picks[:, 0] + rng.normal(0, 3, clustered), rng.uniform(-60, 80, stations - clustered)])
+    lon = np.concatenate([picks[:, 1] + rng.normal(0, 4, clustered), rng.uniform(-180, 180, stations - clustered)])
+    return np.clip(lat, -89.9, 89.9), (lon + 180) % 360 - 180
+
+
+def synthetic_inventory_text(stations: int = 120_000, seed: int = 0) -> str:
+    """
+    ghcnd-inventory.txt mit TMAX/TMIN/PRCP-Zeilen pro Station (Fixed-Width wie bei NOAA).
+    """
+    rng = np.random.default_rng(seed + 1)
+    lat, lon = _synthetic_coordinates(stations, seed)
+    firstyear = rng.integers(1850, 2015, stations)
+    lastyear = np.minimum(firstyear + rng.integers(5, 175, stations), 2024)
+    lines = []
+    for station_id, la, lo, first, last in zip(synthetic_station_ids(stations), lat, lon, firstyear, lastyear):
+        for element in ('TMAX', 'TMIN', 'PRCP'):
+            lines.append(f"{station_id:<11} {la:8.4f} {lo:9.4f} {element:<4} {first:4d} {last:4d}")
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_stations_text(stations: int = 120_000, seed: int = 0) -> str:
+    """
+    ghcnd-stations.txt mit Koordinaten und Namen passend zu synthetic_inventory_text.
+    """
+    lat, lon = _synthetic_coordinates(stations, seed)
+    return ''.join(f"{station_id:<11} {la:8.4f} {lo:9.4f} {100.0:6.1f}    {'STATION ' + station_id[3:]:<30}"
+                   f"             \n"
+                   for station_id, la, lo in zip(synthetic_station_ids(stations), lat, lon))
+
+
+def write_fixtures(directory: str, stations: int, station_years, load_stations: int = 0) -> dict:
+    """
+    Schreibt Inventory, Stationsliste und by_station-Dateien nach directory; vorhandene
+    Dateien mit gleichen Parametern werden wiederverwendet. Liefert {Jahre: Station-ID}.
+    """
+    marker = os.path.join(directory, 'fixtures.json')
+    station_years = sorted(set(station_years))
+    ids = synthetic_station_ids(stations)
+    params = {'stations': stations, 'station_years': station_years, 'load_stations': load_stations}
+    by_years = {years: ids[i] for i, years in enumerate(station_years)}
+    try:
+        with open(marker) as f:
+            if json.load(f) == params:
+                return by_years
+    except (OSError, ValueError):
+        pass
+    os.makedirs(os.path.join(directory, 'by_station'), exist_ok=True)
+    with open(os.path.join(directory, 'ghcnd-inventory.txt'), 'w') as f:
+        f.write(synthetic_inventory_text(stations))
+    with open(os.path.join(directory, 'ghcnd-stations.txt'), 'w') as f:
+        f.write(synthetic_stations_text(stations))
+    contents = {years: synthetic_station_gzip(years, station_id=by_years[years]) for years in station_years}
+    for i in range(max(load_stations, len(station_years))):
+        years = station_years[i % len(station_years)]
+        with open(os.path.join(directory, 'by_station', f"{ids[i]}.csv.gz"), 'wb') as f:
+            f.write(contents[years])
+    with open(marker, 'w') as f:
+        json.dump(params, f)
+    return by_years
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def fixture_environment(args, load_stations: int = 0):
+    """
+    Stellt die Fixtures über einen lokalen HTTP-Server bereit und richtet app.py darauf aus:
+    Inventory-URLs, eigenes Cache-Verzeichnis, kein AggregateStore und kein gemeinsamer Cache.
+    Die Worker-Prozesse des StationExecutor finden die Fixtures über die Umgebungsvariablen.
+    """
+    fixtures = args.fixtures or os.path.join(tempfile.gettempdir(), 'wetteranzeige-benchmark-fixtures')
+    by_years = write_fixtures(fixtures, args.stations, args.station_years, load_stations)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             functools.partial(_QuietHandler, directory=fixtures))
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    cache_dir = tempfile.mkdtemp(prefix='wetteranzeige-benchmark-')
+    station_url = base_url + "/by_station/{station_id}.csv.gz"
+    environ = {'STATION_DATA_URL': station_url, 'WETTER_CACHE_DIR': cache_dir}
+    executor = app.StationExecutor(workers=args.workers)
+    try:
+        with patch.dict(os.environ, environ), patch.multiple(
+                app, CACHE_DIR=cache_dir, INVENTORY_URL=base_url + '/ghcnd-inventory.txt',
+                STATIONS_URL=base_url + '/ghcnd-stations.txt', aggregate_store=None, shared_cache=None,
+                station_executor=executor,
+                station_file_cache=app.StationFileCache(os.path.join(cache_dir, 'by_station'), station_url)):
+            for cached in (app.read_station_table, app.aggregate_station_data):
+                cached.cache_clear()
+            yield {'fixtures': fixtures, 'by_years': by_years, 'cache_dir': cache_dir}
+    finally:
+        for cached in (app.read_station_table, app.aggregate_station_data):
+            cached.cache_clear()
+        executor.shutdown()
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+# Messung
+def measure(func, repeat: int, setup=None) -> dict:
+    """
+    Führt func repeat-mal aus; setup läuft vor jedem Durchlauf außerhalb der Zeitmessung.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return latency_stats(timings)
+
+
+def latency_stats(timings) -> dict:
+    timings = np.array(timings) * 1000
+    return {
+        'runs': len(timings),
+        'min_ms': round(float(timings.min()), 3),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssSampler:
+    """
+    Misst den Spitzenwert des Resident Set Size während eines Abschnitts durch Abtasten
+    von /proc/self/statm. Ohne /proc bleibt nur das Prozessmaximum aus getrusage.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_mb = self.peak_mb = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start_mb is None:
+            # ru_maxrss: Kilobyte unter Linux, Byte unter macOS
+            scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def result(self) -> dict:
+        result = {'peak_rss_mb': round(self.peak_mb, 1)}
+        if self.start_mb is not None:
+            result['rss_growth_mb'] = round(self.peak_mb - self.start_mb, 1)
+        return result
+
+
+def memory_mb() -> dict:
+    """
+    Resident Set Size und davon privater Speicher (nicht mit anderen Prozessen geteilt) in MB.
+    """
+    result = {'rss_mb': current_rss_mb()}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        result['private_mb'] = sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty')) / 2 ** 10
+    except (OSError, KeyError, ValueError):
+        result['private_mb'] = None
+    return result
+
+
+def _forked_footprint(func, conn):
+    before = memory_mb()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    after = memory_mb()
+    conn.send(dict({key: round(after[key] - before[key], 1) if after[key] is not None else None for key in after},
+                   seconds=round(elapsed, 3)))
+    conn.close()
+
+
+def forked_footprint(func) -> dict:
+    """
+    Führt func in einem frisch geforkten Prozess aus (wie ein gunicorn-Worker ohne Vorladen)
+    und liefert dessen Speicherzuwachs.
+    """
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_forked_footprint, args=(func, sender))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def stage(func, repeat: int, rows: int = None, setup=None) -> dict:
+    """
+    Latenzen, Zeilen pro Sekunde (bezogen auf p50) und Spitzen-RSS eines Benchmark-Abschnitts.
+    """
+    with RssSampler() as rss:
+        result = measure(func, repeat, setup)
+    if rows:
+        result['rows'] = rows
+        result['rows_per_sec'] = int(rows / (result['p50_ms'] / 1000)) if result['p50_ms'] else None
+    result.update(rss.result())
+    return result
+
+
+def bench_seasonal(args) -> dict:
+    """
+    Vergleicht die Aggregation vor und nach der Vektorisierung auf einer synthetischen Station.
+    """
+    data = load_station_dataframe(synthetic_station_gzip(args.years))
+    rows = int(data['ELEMENT'].isin(['TMAX', 'TMIN']).sum())
+    legacy = measure(lambda: legacy_aggregate(data, 48.0), args.repeat)
+    vectorized = measure(lambda: vectorized_aggregate(data, 48.0), args.repeat)
+    return {
+        'benchmark': 'seasonal_aggregation',
+        'years': args.years,
+        'temperature_rows': rows,
+        'legacy': legacy,
+        'vectorized': vectorized,
+        'speedup_p50': round(legacy['p50_ms'] / vectorized['p50_ms'], 1),
+    }
+
+
+def peak_memory_mb(func) -> float:
+    """
+    Spitzenwert der über tracemalloc erfassten Allokationen (inklusive NumPy-Puffern).
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parse(args) -> dict:
+    """
+    Vergleicht das Einlesen einer by_station-Datei per pd.read_csv mit dem blockweisen Parser.
+    """
+    gz = synthetic_station_gzip(args.years)
+    rows = synthetic_station_csv(args.years).count('\n')
+    result = {
+        'benchmark': 'station_file_parse',
+        'years': args.years,
+        'rows': rows,
+        'compressed_bytes': len(gz),
+    }
+    for name, func in (('read_csv', lambda: load_station_dataframe(gz)),
+                       ('streaming', lambda: app.parse_station_file(io.BytesIO(gz)))):
+        timing = measure(func, args.repeat)
+        timing['rows_per_sec'] = int(rows / (timing['p50_ms'] / 1000))
+        timing['peak_mb'] = peak_memory_mb(func)
+        result[name] = timing
+    result['speedup_p50'] = round(result['read_csv']['p50_ms'] / result['streaming']['p50_ms'], 1)
+    return result
+
+
+def synthetic_summary(years: int) -> 'app.StationSummary':
+    observations = app.parse_station_file(io.BytesIO(synthetic_station_gzip(years)))
+    return app.summarize_temperatures(observations['year'], observations['month'], observations['is_tmax'],
+                                      observations['value'], False)
+
+
+def bench_payload(args) -> dict:
+    """
+    Vergleicht Größe und Serialisierungszeit der Antwortformate von /api/station_data.
+    """
+    summary = synthetic_summary(args.years)
+    result = {'benchmark': 'station_payload', 'years': args.years}
+    for fmt, window in (('nested', summary.window), ('columnar', summary.columnar)):
+        encoded = app.EncodedPayload(window(-10**9, 10**9))
+        timing = measure(lambda: app.json_bytes(window(-10**9, 10**9)), args.repeat)
+        timing['bytes'] = len(encoded.body)
+        timing['gzip_bytes'] = len(encoded.variants.get('gzip', encoded.body))
+        result[fmt] = timing
+    result['size_ratio'] = round(result['nested']['bytes'] / result['columnar']['bytes'], 1)
+    result['speedup_p50'] = round(result['nested']['p50_ms'] / result['columnar']['p50_ms'], 1)
+    return result
+
+
+def synthetic_nested_summary(years: int, stations: int = 50, nan_share: float = 0.05, seed: int = 0) -> dict:
+    """
+    Verschachtelte Zusammenfassungen mehrerer Stationen im Format von /api/station_data mit NaN-Lücken.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.normal(10, 8, (stations, years, len(app.SEASONS), 2))
+    values[rng.random(values.shape) < nan_share] = np.nan
+    return {
+        f"SYN{station:08d}": {
+            'seasonal_summary': {
+                str(1900 + year): {
+                    season: {app.MAX_TEMP_KEY: float(values[station, year, s, 0]),
+                             app.MIN_TEMP_KEY: float(values[station, year, s, 1])}
+                    for s, season in enumerate(app.SEASONS)
+                }
+                for year in range(years)
+            }
+        }
+        for station in range(stations)
+    }
+
+
+def bench_sanitize(args) -> dict:
+    """
+    Vergleicht rekursives NaN-Ersetzen plus json.dumps mit json_bytes auf einer großen Zusammenfassung.
+    """
+    data = synthetic_nested_summary(args.years)
+    elements = 50 * args.years * len(app.SEASONS) * 2
+    assert json.loads(app.json_bytes(data)) == json.loads(json.dumps(legacy_replace_nan_with_none(data)))
+    result = {'benchmark': 'nan_sanitize', 'years': args.years, 'float_values': elements,
+              'orjson': app.orjson is not None}
+    for name, func in (('recursive', lambda: json.dumps(legacy_replace_nan_with_none(data)).encode('utf-8')),
+                       ('json_bytes', lambda: app.json_bytes(data))):
+        timing = measure(func, args.repeat)
+        timing['ns_per_value'] = round(timing['p50_ms'] * 1e6 / elements, 1)
+        result[name] = timing
+    result['speedup_p50'] = round(result['recursive']['p50_ms'] / result['json_bytes']['p50_ms'], 1)
+    return result
+
+
+def search_queries(index: 'app.StationIndex', count: int, seed: int = 0) -> list:
+    """
+    Suchpunkte in der Nähe zufälliger Stationen, damit die meisten Suchen Treffer liefern.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, len(index), count)
+    firstyears = rng.integers(1950, 2010, count)
+    lat, lon = index.table.coordinates(positions)
+    return [(float(la + rng.normal(0, 0.3)), float(lo + rng.normal(0, 0.3)),
+             float(rng.choice([25, 50, 100, 250])), int(first), int(first + rng.integers(1, 15)))
+            for la, lo, first in zip(lat, lon, firstyears)]
+
+
+def bench_suite(args) -> dict:
+    """
+    Hot Paths von der Inventory-Datei bis zur serialisierten Stationsantwort.
+    """
+    result = {'benchmark': 'suite', 'stations': args.stations, 'stages': {}}
+    stages = result['stages']
+    with fixture_environment(args) as env:
+        inventory_path = os.path.join(env['fixtures'], 'ghcnd-inventory.txt')
+        with open(inventory_path) as f:
+            inventory_rows = sum(1 for _ in f)
+        # Stationstabelle aus Inventory und Stationsliste
+        load_inventory = functools.partial(app.read_station_table.__wrapped__, app.INVENTORY_URL, app.STATIONS_URL)
+
+        # Ohne Cache-Verzeichnis wird immer die Fixed-Width-Datei geparst
+        with patch.object(app, 'CACHE_DIR', ''):
+            stages['inventory_parse'] = stage(load_inventory, args.repeat, inventory_rows)
+        load_inventory()
+        stages['inventory_snapshot'] = stage(load_inventory, args.repeat, inventory_rows)
+
+        table = app.read_station_table(app.INVENTORY_URL, app.STATIONS_URL)
+        stages['inventory_snapshot']['table_bytes'] = table.nbytes
+        stages['index_build'] = stage(lambda: app.StationIndex(table), args.repeat, len(table))
+        index = app.get_station_index(table)
+
+        queries = iter(search_queries(index, args.queries))
+        found = []
+
+        def search():
+            lat, lon, radius, firstyear, lastyear = next(queries)
+            found.append(len(app.find_stations_within_radius(app.INVENTORY_URL, lat, lon, radius, 50,
+                                                             firstyear, lastyear)))
+
+        stages['station_search'] = stage(search, args.queries)
+        stages['station_search']['mean_results'] = round(float(np.mean(found)), 1)
+
+        for years, station_id in sorted(env['by_years'].items()):
+            with open(os.path.join(env['fixtures'], 'by_station', f"{station_id}.csv.gz"), 'rb') as f:
+                rows = gzip.decompress(f.read()).count(b'\n')
+
+            def request():
+                with app.app.app_context():
+                    response, status = app.process_station_data(station_id, 1800, 2100)
+                    assert status == 200, response.get_data()
+
+            def forget_file():
+                app.aggregate_station_data.cache_clear()
+                shutil.rmtree(app.station_file_cache.directory, ignore_errors=True)
+
+            # Erster Aufruf startet den Prozess-Pool und bleibt ungemessen
+            forget_file()
+            request()
+            stages[f'station_data_{years}y'] = {
+                'cold': stage(request, args.repeat, rows, setup=forget_file),
+                'cached_file': stage(request, args.repeat, rows, setup=app.aggregate_station_data.cache_clear),
+                'cached_summary': stage(request, args.repeat),
+            }
+    return result
+
+
+def bench_memory(args) -> dict:
+    """
+    Speicherbedarf von Stationstabelle und Index pro Worker: ein geforkter Prozess parst die
+    Quellen (und schreibt die Snapshots), ein zweiter lädt danach aus den Snapshots.
+    """
+    result = {'benchmark': 'memory', 'stations': args.stations}
+    with fixture_environment(args):
+        for name in ('parse', 'snapshot'):
+            result[name] = forked_footprint(app.preload_station_data)
+    return result
+
+
+def _load_client(base_url: str, station_ids: list, deadline: float, seed: int, samples: dict, lock):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.8:
+            first = rng.randint(1850, 2010)
+            endpoint = 'station_data'
+            url = (f"{base_url}/api/station_data?station_id={rng.choice(station_ids)}"
+                   f"&firstyear={first}&lastyear={first + rng.randint(5, 100)}")
+        else:
+            endpoint = 'find_stations'
+            url = (f"{base_url}/api/find_stations?lat={rng.uniform(-40, 60):.3f}&lon={rng.uniform(-180, 180):.3f}"
+                   f"&max_dist_km=250&max_stations=20&firstyear=1950&lastyear=2020")
+        start = time.perf_counter()
+        try:
+            status = session.get(url, headers={'Accept-Encoding': 'gzip'}, timeout=60).status_code
+        except requests.RequestException:
+            status = 'error'
+        elapsed = time.perf_counter() - start
+        with lock:
+            samples.setdefault(endpoint, []).append((elapsed, status))
+
+
+def bench_load(args) -> dict:
+    """
+    Lastprofil gegen einen lokalen Flask-Server: 80 % /api/station_data, 20 % /api/find_stations.
+    """
+    with fixture_environment(args, load_stations=args.load_stations), \
+            patch.object(app.limiter, 'enabled', False):
+        app.preload_station_data()
+        server = make_server('127.0.0.1', 0, app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        station_ids = synthetic_station_ids(args.load_stations)
+        samples, lock = {}, threading.Lock()
+        deadline = time.perf_counter() + args.duration
+        clients = [threading.Thread(target=_load_client, args=(base_url, station_ids, deadline, seed, samples, lock))
+                   for seed in range(args.clients)]
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+
+    result = {'benchmark': 'load', 'clients': args.clients, 'duration_s': round(elapsed, 2),
+              'stations': args.stations, 'load_stations': args.load_stations, 'endpoints': {}}
+    for endpoint, entries in sorted(samples.items()):
+        statuses = {}
+        for _, status in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        result['endpoints'][endpoint] = dict(latency_stats([t for t, _ in entries]), statuses=statuses,
+                                             requests_per_sec=round(len(entries) / elapsed, 1))
+    result['requests_per_sec'] = round(sum(len(e) for e in samples.values()) / elapsed, 1)
+    result.update(rss.result())
+    return result
+
+
+def _latencies(node, path=''):
+    # Alle Abschnitte mit p50/p99 als {Pfad: Werte}
+    if isinstance(node, dict):
+        if 'p50_ms' in node:
+            yield path, node
+        for key, value in node.items():
+            yield from _latencies(value, f"{path}.{key}" if path else key)
+
+
+def compare_results(baseline: dict, current: dict) -> dict:
+    """
+    Verhältnis neu/alt für p50 und p99 jedes Abschnitts (> 1 bedeutet langsamer).
+    """
+    old = dict(_latencies(baseline))
+    changes = {}
+    for path, new in _latencies(current):
+        if path in old:
+            changes[path] = {metric: round(new[metric] / old[path][metric], 2) if old[path][metric] else None
+                             for metric in ('p50_ms', 'p99_ms')}
+    return {'benchmark': 'compare', 'baseline': baseline.get('meta'), 'current': current.get('meta'),
+            'ratios': changes}
+
+
+def bench_compare(args) -> dict:
+    with open(args.files[0]) as f:
+        baseline = json.load(f)
+    with open(args.files[1]) as f:
+        current = json.load(f)
+    return compare_results(baseline, current)
+
+
+def run_metadata() -> dict:
+    """
+    Angaben zum Lauf, damit Ergebnisse verschiedener Commits vergleichbar bleiben.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'orjson': app.orjson is not None,
+    }
+
+
+BENCHMARKS = {
+    'seasonal': bench_seasonal,
+    'parse': bench_parse,
+    'payload': bench_payload,
+    'sanitize': bench_sanitize,
+    'suite': bench_suite,
+    'load': bench_load,
+    'memory': bench_memory,
+    'compare': bench_compare,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('files', nargs='*', help="compare: Baseline- und neue Ergebnisdatei")
+    parser.add_argument('--years', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stations', type=int, default=120_000, help="Stationen im synthetischen Inventory")
+    parser.add_argument('--station-years', type=lambda value: [int(v) for v in value.split(',')],
+                        default=[10, 50, 150], help="Längen der by_station-Dateien in Jahren")
+    parser.add_argument('--queries', type=int, default=200, help="Radiussuchen in suite")
+    parser.add_argument('--workers', type=int, default=app.STATION_WORKERS, help="Prozesse des StationExecutor")
+    parser.add_argument('--fixtures', help="Verzeichnis für wiederverwendbare Fixtures")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--load-stations', type=int, default=30, help="Stationen mit by_station-Datei in load")
+    parser.add_argument('--output', help="JSON in diese Datei statt auf stdout")
+    args = parser.parse_args(argv)
+    if args.benchmark == 'compare' and len(args.files) != 2:
+        parser.error("compare erwartet zwei Ergebnisdateien")
+
+    result = BENCHMARKS[args.benchmark](args)
+    if args.benchmark != 'compare':
+        result['meta'] = run_metadata()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+gunicorn-Konfiguration für den Produktivbetrieb.
+
+Aufruf:
+    gunicorn -c gunicorn.conf.py app:app
+
+Die App wird im Master geladen (preload_app), dort werden Inventory, Stationsnamen und
+räumlicher Index einmal aufgebaut. Die Worker entstehen per fork und teilen diese Daten
+copy-on-write; die Snapshot-Spalten liegen ohnehin memory-mapped im Page-Cache.
+GET /health meldet erst dann 200, wenn der Index im Worker vorhanden ist.
+"""
+import gc
+import multiprocessing
+import os
+import threading
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Längste Stationsberechnung (STATION_TIMEOUT_SECONDS) plus Reserve
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 150))
+preload_app = True
+accesslog = '-'
+
+
+def on_starting(server):
+    import app
+    app.preload_station_data()
+    # Vorgeladene Objekte aus der Garbage Collection nehmen, sonst schreibt der GC der
+    # Worker in deren Objekt-Header und die geteilten Seiten werden kopiert
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    # Ist das Vorladen im Master gescheitert (NOAA nicht erreichbar), lädt jeder Worker nach
+    if not app.station_data_ready():
+        threading.Thread(target=app.preload_station_data, name='preload', daemon=True).start()
+    # Jeder Worker prüft selbst auf neue Inventory-Versionen; wer später prüft,
+    # lädt meist schon den Snapshot des ersten statt neu zu parsen
+    app.inventory_refresher.start()
@@ -3,20 +3,89 @@ import os
 import tempfile
 import io
 import gzip
+import hashlib
 import json
+import threading
+import time
+import runpy
+import fnmatch
+import socketserver
+import pstats
+import sqlite3
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import numpy as np
 import pandas as pd
+import requests
 from unittest.mock import patch, MagicMock
 
+# Snapshots und Caches der Tests landen in einem eigenen temporären Verzeichnis
+os.environ.setdefault('WETTER_CACHE_DIR', tempfile.mkdtemp(prefix='wetteranzeige-test-'))
+# Stationsverarbeitung im Test-Thread, damit Mocks greifen
+os.environ.setdefault('STATION_WORKERS', '0')
+# Wiederholungen gegen den lokalen Testserver ohne Wartezeit
+os.environ.setdefault('HTTP_BACKOFF_SECONDS', '0')
+
 from app import (
+    BATCH_MAX_STATIONS,
+    limiter,
     app,
     haversine,
     replace_nan_with_none,
+    json_bytes,
     find_stations_within_radius,
     process_station_data,
     get_season,
-    read_station_cities,
-    read_ghcnd_stations
+    read_station_table,
+    load_ghcnd_stations,
+    load_station_cities,
+    station_name_columns,
+    StationTable,
+    StationIndex,
+    StationFileCache,
+    _FileLock,
+    HttpFetcher,
+    aggregate_station_data,
+    parse_station_file,
+    AggregateStore,
+    precompute_aggregates,
+    StationExecutor,
+    StationSummary,
+    SingleFlightCache,
+    preload_station_data,
+    http_fetcher,
+    station_executor,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    RedisCacheBackend,
+    SharedLimiterStorage,
+    cache_backend_from_url,
+    Metrics,
+    metrics,
+    RequestProfiler,
+    _pooled_station_summary,
+    InventoryRefresher,
+    diff_inventory,
+    get_station_index
+)
+from limits import parse as parse_limit
+from limits.strategies import FixedWindowRateLimiter
+try:
+    import redis
+except ImportError:
+    redis = None
+try:
+    import asyncio
+    import httpx
+    import asgi
+except ImportError:
+    asgi = None
+import benchmark
+from benchmark import (
+    legacy_aggregate,
+    load_station_dataframe,
+    synthetic_station_gzip,
+    synthetic_inventory_text,
+    vectorized_aggregate
 )
 
 
@@ -72,6 +141,21 @@ class TestUtilityFunctions(unittest.TestCase):
         }
         self.assertEqual(replace_nan_with_none(test_obj), expected)
 
+    def test_json_bytes_matches_replace_nan_with_none(self):
+        test_obj = {
+            'a': np.nan,
+            'b': [1, 2.5, float('inf'), {'c': np.float64('nan'), 'd': -float('inf')}],
+            'e': np.array([1.0, np.nan]),
+            'f': 'Max_Temperature (°C)'
+        }
+        expected = {'a': None, 'b': [1, 2.5, None, {'c': None, 'd': None}], 'e': [1.0, None],
+                    'f': 'Max_Temperature (°C)'}
+        self.assertEqual(json.loads(json_bytes(test_obj)), expected)
+        # Fallback ohne orjson
+        with patch('app.orjson', None):
+            self.assertEqual(json.loads(json_bytes(test_obj)), expected)
+            self.assertEqual(json_bytes({'a': [1.5, None]}), b'{"a":[1.5,null]}')
+
     def test_get_season(self):
         # Northern Hemisphere (station_lat >= 0)
         self.assertEqual(get_season(3, 45), 'Spring')
@@ -141,13 +225,13 @@ class TestUtilityFunctions(unittest.TestCase):
 
         try:
             # Call the function with the path to our temporary file.
-            mapping = read_station_cities(tmp_path)
-            # Expected mapping: IDs mapped to the station NAME (trimmed).
-            expected = {
-                "GME00102404": "Test City",
-                "GME00102405": "Another City"
-            }
-            self.assertEqual(mapping, expected)
+            columns = load_station_cities(tmp_path, None)
+            # Join the names (trimmed) into a station table; stations without entry have no name.
+            table = StationTable.from_columns(
+                station_inventory(('GME00102405', 49.5678), ('GME00102404', 48.1234), ('GME00109999', 50.0)), columns)
+            self.assertEqual([table.city(position) for position in range(len(table))],
+                             ["Another City", "Test City", "Unknown"])
+            self.assertEqual(columns['NAMES'].dtype.kind, 'S')
         finally:
             os.unlink(tmp_path)
 
@@ -192,27 +276,174 @@ class TestUtilityFunctions(unittest.TestCase):
             tmp_path = tmp.name
 
         try:
-            df = read_ghcnd_stations(tmp_path)
+            columns = load_ghcnd_stations(tmp_path, None)
             # Since row3 should be filtered out (ELEMENT not in ['TMIN','TMAX'])
             # and row2 is a duplicate of row1, we expect exactly 1 unique station.
-            self.assertEqual(len(df), 1)
-            row = df.iloc[0]
-            self.assertEqual(row["ID"].strip(), "STATION001")
-            # Verify that numeric columns are converted correctly.
-            self.assertAlmostEqual(row["LATITUDE"], 48.1234)
-            self.assertAlmostEqual(row["LONGITUDE"], 8.12345)
-            # Check that the ELEMENT is either 'TMIN' or 'TMAX'
-            self.assertIn(row["ELEMENT"], ['TMIN', 'TMAX'])
+            self.assertEqual(len(columns['ID']), 1)
+            self.assertEqual(columns['ID'][0], b"STATION001")
+            # Verify that numeric columns are converted to compact types.
+            self.assertAlmostEqual(float(columns['LATITUDE'][0]), 48.1234, places=4)
+            self.assertAlmostEqual(float(columns['LONGITUDE'][0]), 8.12345, places=4)
+            self.assertEqual(columns['LATITUDE'].dtype, np.float32)
+            self.assertEqual(columns['FIRSTYEAR'].dtype, np.int16)
+            self.assertEqual(int(columns['LASTYEAR'][0]), 2020)
         finally:
             os.unlink(tmp_path)
 
+###############################################################################
+# Testing Inventory Snapshots
+###############################################################################
+def inventory_line(station_id, lat, lon, element, firstyear, lastyear):
+    return f"{station_id:<11} {lat:>8.4f} {lon:>9.4f} {element:<4} {firstyear:<4} {lastyear:<4}"
+
+
+class TestInventorySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        patcher = patch('app.CACHE_DIR', self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.inventory_path = os.path.join(self.cache_dir, 'ghcnd-inventory.txt')
+        self.stations_path = os.path.join(self.cache_dir, 'ghcnd-stations.txt')
+        with open(self.stations_path, 'w') as f:
+            f.write(f"{'GME00102404':<11} {'48.1234':<8} {'8.1234':<9} {'100':<6} {'XX':<2} {'Test City':<30}\n")
+        self.addCleanup(read_station_table.cache_clear)
+        read_station_table.cache_clear()
+
+    def write_inventory(self, lines):
+        with open(self.inventory_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_inventory_snapshot_roundtrip_and_refresh(self):
+        self.write_inventory([
+            inventory_line('GME00102404', 48.1234, 8.1234, 'TMAX', 1950, 2020),
+            inventory_line('GME00102404', 48.1234, 8.1234, 'TMIN', 1950, 2020),
+            inventory_line('USW00094728', 40.7789, -73.9692, 'TMIN', 1869, 2024),
+        ])
+        parsed = read_station_table(self.inventory_path, self.stations_path)
+        read_station_table.cache_clear()
+
+        # Zweiter Start: keine Fixed-Width-Auswertung mehr, Daten kommen aus dem Snapshot
+        with patch('app.pd.read_fwf', side_effect=AssertionError("should not parse")):
+            snapshot = read_station_table(self.inventory_path, self.stations_path)
+        for column in ('ids', 'lat', 'lon', 'firstyear', 'lastyear', 'name_codes', 'names'):
+            np.testing.assert_array_equal(getattr(snapshot, column), getattr(parsed, column))
+        self.assertEqual(snapshot.city(snapshot.position('GME00102404')), "Test City")
+        read_station_table.cache_clear()
+
+        # Geänderte Quelle: Snapshot wird verworfen und neu geschrieben
+        self.write_inventory([inventory_line('ASN00066062', -33.8607, 151.2050, 'TMAX', 1859, 2024)])
+        os.utime(self.inventory_path, ns=(0, 10**18))
+        refreshed = read_station_table(self.inventory_path, self.stations_path)
+        self.assertEqual(list(refreshed.ids), [b'ASN00066062'])
+        self.assertIsNone(refreshed.position('GME00102404'))
+
+    def test_outdated_snapshot_format_is_parsed_again(self):
+        self.write_inventory([inventory_line('GME00102404', 48.1234, 8.1234, 'TMAX', 1950, 2020)])
+        read_station_table(self.inventory_path, self.stations_path)
+        read_station_table.cache_clear()
+        with patch('app.SNAPSHOT_FORMAT', 1), patch('app.pd.read_fwf', wraps=pd.read_fwf) as read_fwf:
+            table = read_station_table(self.inventory_path, self.stations_path)
+        self.assertEqual(read_fwf.call_count, 2)
+        self.assertEqual(table.position('GME00102404'), 0)
+
+class TestInventoryRefresh(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.inventory_path = os.path.join(self.cache_dir, 'ghcnd-inventory.txt')
+        self.stations_path = os.path.join(self.cache_dir, 'ghcnd-stations.txt')
+        with open(self.stations_path, 'w') as f:
+            f.write(f"{'ST001':<11} {'48.0':<8} {'8.0':<9} {'100':<6} {'XX':<2} {'Test City':<30}\n")
+        self.file_cache = StationFileCache(os.path.join(self.cache_dir, 'by_station'),
+                                           "http://127.0.0.1:9/{station_id}.csv.gz")
+        self.store = AggregateStore(os.path.join(self.cache_dir, 'aggregates.sqlite'))
+        patchers = [
+            patch('app.CACHE_DIR', self.cache_dir),
+            patch('app.INVENTORY_URL', self.inventory_path),
+            patch('app.STATIONS_URL', self.stations_path),
+            patch('app.station_file_cache', self.file_cache),
+            patch('app.aggregate_store', self.store),
+            patch.dict('app._station_index_cache', clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for cache in (read_station_table, aggregate_station_data):
+            cache.cache_clear()
+            self.addCleanup(cache.cache_clear)
+
+    def write_inventory(self, stations, mtime):
+        with open(self.inventory_path, 'w') as f:
+            f.write("".join(inventory_line(station_id, lat, 8.0, 'TMAX', 1950, lastyear) + "\n"
+                            for station_id, lat, lastyear in stations))
+        os.utime(self.inventory_path, ns=(mtime, mtime))
+
+    def cache_station_file(self, station_id):
+        path = self.file_cache.path(station_id)
+        os.makedirs(self.file_cache.directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(gzip_bytes(f"{station_id},20240101,TMAX,250,,,,\n"))
+        self.file_cache._write_meta(path, {'url': self.file_cache.url(station_id), 'checked_at': time.time()})
+
+    def test_diff_inventory(self):
+        old = station_table(('ST001', 48.0), ('ST002', 49.0), ('ST003', 50.0), ('ST005', 51.0))
+        new = station_inventory(('ST001', 48.0), ('ST002', 49.0), ('ST004', 50.0), ('ST005', 51.5))
+        new.loc[new['ID'] == 'ST002', 'LASTYEAR'] = 2025
+        self.assertEqual(diff_inventory(old, StationTable.from_columns(new)),
+                         {'added': ['ST004'], 'removed': ['ST003'], 'changed': ['ST002'], 'moved': ['ST005']})
+
+    def test_refresh_swaps_index_and_invalidates_changed_stations(self):
+        self.write_inventory([('ST001', 48.0, 2024), ('ST002', 49.0, 2024), ('ST003', 50.0, 2024)], 10**18)
+        refresher = InventoryRefresher(interval=0)
+        # Noch nichts geladen: der erste Zugriff lädt regulär
+        self.assertIsNone(refresher.refresh())
+
+        old_table = read_station_table(self.inventory_path, self.stations_path)
+        old_index = get_station_index(old_table)
+        summary = StationSummary({}, {})
+        for station_id in ('ST001', 'ST002', 'ST003'):
+            aggregate_station_data.put(summary, station_id, False)
+            self.store.put(station_id, False, summary)
+            self.cache_station_file(station_id)
+        self.assertIsNone(refresher.refresh())
+
+        self.write_inventory([('ST001', 48.0, 2025), ('ST002', 49.0, 2024), ('ST004', 51.0, 2024)], 2 * 10**18)
+        with patch('app.StationIndex', wraps=StationIndex) as build_index:
+            diff = refresher.refresh()
+            new_index = get_station_index(read_station_table(self.inventory_path, self.stations_path))
+        self.assertEqual(diff, {'added': ['ST004'], 'removed': ['ST003'], 'changed': ['ST001'], 'moved': []})
+        # Index einmal im Hintergrund gebaut und zusammen mit dem Inventory ausgetauscht
+        self.assertEqual(build_index.call_count, 1)
+        self.assertIsNotNone(new_index.position('ST004'))
+        self.assertIsNone(new_index.position('ST003'))
+        # Anfragen mit dem alten Stand erhalten weiterhin den alten Index
+        self.assertIs(get_station_index(old_table), old_index)
+
+        self.assertIsNone(aggregate_station_data.peek('ST001', False))
+        self.assertIsNone(aggregate_station_data.peek('ST003', False))
+        self.assertIs(aggregate_station_data.peek('ST002', False), summary)
+        self.assertEqual(self.store.keys(), {('ST002', False)})
+        self.assertTrue(self.file_cache.needs_download('ST001'))
+        self.assertFalse(self.file_cache.needs_download('ST002'))
+        self.assertEqual(refresher.last['changed'], 1)
+        self.assertIsNone(refresher.refresh())
+
+        # Nur die Stationsliste geändert: neue Namen, keine Zusammenfassung wird verworfen
+        with open(self.stations_path, 'w') as f:
+            f.write(f"{'ST001':<11} {'48.0':<8} {'8.0':<9} {'100':<6} {'XX':<2} {'Renamed City':<30}\n")
+        os.utime(self.stations_path, ns=(3 * 10**18, 3 * 10**18))
+        self.assertEqual(refresher.refresh(), {'added': [], 'removed': [], 'changed': [], 'moved': []})
+        table = read_station_table(self.inventory_path, self.stations_path)
+        self.assertEqual(table.city(table.position('ST001')), "Renamed City")
+        self.assertIs(aggregate_station_data.peek('ST002', False), summary)
+
 ###############################################################################
 # Testing find_stations_within_radius
 ###############################################################################
 class TestFindStationsWithinRadius(unittest.TestCase):
-    @patch('app.read_ghcnd_stations')
+    @patch('app.read_station_table')
     def test_find_stations_within_radius(self, mock_read):
-        # Create a sample DataFrame that read_ghcnd_stations should return.
+        # Create a sample DataFrame for the StationTable that read_station_table should return.
         df = pd.DataFrame({
             'ID': ['ST001', 'ST002', 'ST003'],
             'LATITUDE': [48.06, 48.07, 49.0],
@@ -221,7 +452,7 @@ class TestFindStationsWithinRadius(unittest.TestCase):
             'FIRSTYEAR': [2000, 2000, 2000],
             'LASTYEAR': [2020, 2020, 2020]
         })
-        mock_read.return_value = df
+        mock_read.return_value = StationTable.from_columns(df)
 
         # Call the function with parameters that pass the time filter.
         stations = find_stations_within_radius(
@@ -244,12 +475,116 @@ class TestFindStationsWithinRadius(unittest.TestCase):
             self.assertIn('firstyear', station)
             self.assertIn('lastyear', station)
 
+###############################################################################
+# Testing StationIndex
+###############################################################################
+def brute_force_stations_within_radius(df, lat, lon, max_dist_km, max_stations, firstyear, lastyear):
+    """
+    Referenzimplementierung: filtert und sortiert das komplette Inventory.
+    """
+    df = df[(df['FIRSTYEAR'] <= firstyear) & (df['LASTYEAR'] >= lastyear)].copy()
+    df['distance_km'] = haversine(lat, lon, df['LATITUDE'].values, df['LONGITUDE'].values)
+    nearby = df[df['distance_km'] <= max_dist_km].sort_values('distance_km', kind='stable').head(max_stations)
+    return [(row['ID'], row['distance_km']) for _, row in nearby.iterrows()]
+
+
+def random_inventory(n, seed=42):
+    rng = np.random.default_rng(seed)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    # Ein paar Stationen direkt an Polen und Datumsgrenze
+    lat[:4] = [90.0, -90.0, 89.99, -89.99]
+    lon = rng.uniform(-180, 180, n)
+    lon[4:8] = [180.0, -180.0, 179.999, -179.999]
+    firstyear = rng.integers(1850, 2020, n)
+    # Koordinaten mit 4 Nachkommastellen wie im NOAA-Inventory
+    return pd.DataFrame({
+        'ID': [f"ST{i:09d}" for i in range(n)],
+        'LATITUDE': lat.round(4),
+        'LONGITUDE': lon.round(4),
+        'ELEMENT': 'TMAX',
+        'FIRSTYEAR': firstyear,
+        'LASTYEAR': firstyear + rng.integers(0, 170, n)
+    })
+
+
+class TestStationIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        df = random_inventory(5000)
+        rng = np.random.default_rng(7)
+        queries = [(89.5, 10.0, 300.0), (-89.9, -170.0, 500.0), (0.0, 179.9, 250.0),
+                   (10.0, -179.95, 1000.0), (48.06, 8.53, 0.0), (0.0, 0.0, 25000.0)]
+        queries += [(float(np.degrees(np.arcsin(rng.uniform(-1, 1)))), float(rng.uniform(-180, 180)),
+                     float(rng.choice([50.0, 200.0, 800.0, 3000.0]))) for _ in range(200)]
+
+        windows = [(1950, 1990), (1850, 2200), (2019, 2019), (1900, 1900)]
+        with patch('app.read_station_table', return_value=StationTable.from_columns(df)):
+            for i, (lat, lon, radius) in enumerate(queries):
+                firstyear, lastyear = windows[i % len(windows)]
+                expected = brute_force_stations_within_radius(df, lat, lon, radius, 50, firstyear, lastyear)
+                stations = find_stations_within_radius("dummy_url", lat, lon, radius, 50, firstyear, lastyear)
+                actual = [(s['station_id'], s['distance_km']) for s in stations]
+                self.assertEqual(actual, expected, msg=f"query {lat}, {lon}, {radius}")
+
+    def test_candidates_only_touch_nearby_cells(self):
+        index = StationIndex(StationTable.from_columns(random_inventory(20000)))
+        candidates = index.candidates(48.06, 8.53, 50.0)
+        self.assertLess(len(candidates), 200)
+
+    def test_candidates_only_cover_year_window(self):
+        df = random_inventory(20000)
+        df.loc[:99, 'FIRSTYEAR'] = np.nan
+        index = StationIndex(StationTable.from_columns(df))
+        candidates = index.candidates(48.06, 8.53, 2000.0, firstyear=1950, lastyear=1990)
+        all_in_radius = index.candidates(48.06, 8.53, 2000.0)
+        self.assertGreater(len(candidates), 0)
+        self.assertLess(len(candidates), len(all_in_radius))
+        self.assertTrue((df['FIRSTYEAR'].values[candidates] <= 1950).all())
+        self.assertTrue((df['LASTYEAR'].values[candidates] >= 1990).all())
+
+    def test_query_nearest(self):
+        df = random_inventory(3000)
+        index = StationIndex(StationTable.from_columns(df))
+        distances = haversine(12.0, 34.0, df['LATITUDE'].values, df['LONGITUDE'].values)
+        expected = np.argsort(distances, kind='stable')[:7]
+        positions, nearest = index.query_nearest(12.0, 34.0, 7)
+        self.assertEqual(list(positions), list(expected))
+        np.testing.assert_array_equal(nearest, distances[expected])
+
 ###############################################################################
 # Testing process_station_data
 ###############################################################################
+def station_inventory(*stations):
+    return pd.DataFrame({
+        'ID': [station_id for station_id, _ in stations],
+        'LATITUDE': [lat for _, lat in stations],
+        'LONGITUDE': [8.53] * len(stations),
+        'ELEMENT': ['TMAX'] * len(stations),
+        'FIRSTYEAR': [1900] * len(stations),
+        'LASTYEAR': [2024] * len(stations)
+    })
+
+
+def station_table(*stations, names=None):
+    names = names or {}
+    return StationTable.from_columns(station_inventory(*stations),
+                                     station_name_columns(list(names), list(names.values())))
+
+
 class TestProcessStationData(unittest.TestCase):
-    @patch('app.requests.get')
-    def test_process_station_data(self, mock_get):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        patchers = [
+            patch('app.station_file_cache', StationFileCache(
+                tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")),
+            patch('app.read_station_table', return_value=station_table(('ST001', 45.0), ('AS001', -33.9)))
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        aggregate_station_data.cache_clear()
+
+    def test_process_station_data(self):
         # Prepare sample CSV content.
         # Note: Ensure 8 comma-separated columns per row as expected by pd.read_csv.
         csv_content = (
@@ -258,18 +593,8 @@ class TestProcessStationData(unittest.TestCase):
             "ST001,20210102,TMAX,260,,,,\n"
             "ST001,20210102,TMIN,60,,,,\n"
         )
-
-        # Compress the CSV content with gzip.
-        gzipped_csv = io.BytesIO()
-        with gzip.GzipFile(fileobj=gzipped_csv, mode='w') as f:
-            f.write(csv_content.encode('utf-8'))
-        gzipped_csv.seek(0)
-
-        # Create a mock response with a .raw attribute returning our BytesIO stream.
-        mock_response = MagicMock()
-        mock_response.raw = gzipped_csv
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+        # The fake NOAA server delivers the gzip-compressed file.
+        self.serve_station_file("ST001", csv_content)
 
         # Process station data within a Flask app context.
         with app.app_context():
@@ -281,6 +606,1261 @@ class TestProcessStationData(unittest.TestCase):
             self.assertIn('yearly_summary', data)
             self.assertIn('seasonal_summary', data)
 
+    def serve_station_file(self, station_id, csv_content):
+        self.server.files[f'/by_station/{station_id}.csv.gz'] = gzip_bytes(csv_content)
+
+    def test_year_windows_share_one_aggregation(self):
+        self.serve_station_file("ST001", (
+            "ST001,19990115,TMAX,10,,,,\n"
+            "ST001,20100715,TMAX,300,,,,\n"
+            "ST001,20210101,TMAX,250,,,,\n"
+        ))
+        with app.app_context():
+            windows = [(1990, 2000), (2000, 2030), (2021, 2021)]
+            results = [json.loads(process_station_data("ST001", first, last, lat)[0].get_data())
+                       for (first, last), lat in zip(windows, [45.0, 45.1, -12.0])]
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(aggregate_station_data.cache_info().currsize, 1)
+        self.assertEqual(list(results[0]['yearly_summary']), ['1999'])
+        self.assertEqual(list(results[1]['yearly_summary']), ['2010', '2021'])
+        self.assertEqual(list(results[2]['yearly_summary']), ['2021'])
+
+    def test_hemisphere_from_inventory(self):
+        self.serve_station_file("AS001", "AS001,20210115,TMAX,300,,,,\n")
+        with app.app_context():
+            # Der Client behauptet Nordhalbkugel, das Inventory kennt die Station aber auf der Südhalbkugel
+            data = json.loads(process_station_data("AS001", 2021, 2021, 45.0)[0].get_data())
+        self.assertEqual(data['seasonal_summary']['2021']['Summer']['Max_Temperature (°C)'], 30.0)
+        self.assertEqual(data['seasonal_summary']['2021']['Winter']['Max_Temperature (°C)'], 0)
+
+    def test_server_timing_and_metrics(self):
+        self.serve_station_file("ST001", "ST001,20210101,TMAX,250,,,,\n")
+        parsed_before = metrics.histogram('station_parse')[0]
+        with patch('app.SERVER_TIMING', True):
+            response = app.test_client().get('/api/station_data?station_id=ST001&firstyear=2021&lastyear=2021')
+        self.assertEqual(response.status_code, 200)
+        stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+        for stage in ('station_compute', 'station_fetch', 'station_download', 'station_decompress',
+                      'station_parse', 'station_aggregate', 'station_encode', 'total'):
+            self.assertIn(stage, stages)
+        self.assertEqual(metrics.histogram('station_parse')[0], parsed_before + 1)
+
+        body = app.test_client().get('/metrics').get_data(as_text=True)
+        self.assertIn('wetteranzeige_stage_seconds_count{stage="station_parse"}', body)
+        self.assertIn('wetteranzeige_cache_events_total{cache="station_files",event="misses"}', body)
+        self.assertIn('wetteranzeige_cache_events_total{cache="station_summaries",event="hits"}', body)
+        self.assertIn('wetteranzeige_downloaded_bytes_total{source="station"}', body)
+        # Ohne SERVER_TIMING kein Header
+        self.assertNotIn('Server-Timing', app.test_client().get('/metrics').headers)
+
+    def test_encoded_response_etag_and_gzip(self):
+        self.serve_station_file("ST001", "".join(
+            f"ST001,{year}0115,TMAX,{year % 300},,,,\n" for year in range(1900, 2000)))
+        client = app.test_client()
+        url = '/api/station_data?station_id=ST001&firstyear=1900&lastyear=2100'
+        plain = client.get(url)
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.headers['Vary'], 'Accept-Encoding')
+
+        compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.get_data()), plain.get_data())
+        self.assertNotEqual(compressed.headers['ETag'], plain.headers['ETag'])
+
+        # Ein anderes Fenster mit denselben Jahren liefert dieselben Bytes aus
+        same = client.get('/api/station_data?station_id=ST001&firstyear=1800&lastyear=2050')
+        self.assertEqual(same.headers['ETag'], plain.headers['ETag'])
+        not_modified = client.get(url, headers={'If-None-Match': plain.headers['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.get_data(), b'')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_columnar_format_matches_nested(self):
+        self.serve_station_file("ST001", (
+            "ST001,20201215,TMAX,101,,,,\n"
+            "ST001,20210115,TMAX,-55,,,,\n"
+            "ST001,20210715,TMIN,123,,,,\n"
+            "ST001,20211015,TMIN,,,,,\n"
+        ))
+        client = app.test_client()
+        url = '/api/station_data?station_id=ST001&firstyear=2020&lastyear=2021'
+        nested = client.get(url).get_json()
+        columnar = client.get(url + '&format=columnar').get_json()
+        self.assertEqual(columnar['years'], [int(year) for year in nested['yearly_summary']])
+        self.assertEqual(columnar['tmax'], [round(v['Max_Temperature (°C)'], 2) for v in nested['yearly_summary'].values()])
+        self.assertEqual(columnar['avg'], [round(v['Year_Avg_Temperature (°C)'], 2) for v in nested['yearly_summary'].values()])
+        self.assertEqual(columnar['season_years'], [2021])
+        winter, autumn = columnar['seasons'].index('Winter'), columnar['seasons'].index('Autumn')
+        self.assertEqual(columnar['seasonal_tmax'][0][winter], 2.3)
+        self.assertIsNone(columnar['seasonal_tmin'][0][autumn])
+        self.assertIsNone(nested['seasonal_summary']['2021']['Autumn']['Min_Temperature (°C)'])
+        self.assertEqual(client.get(url + '&format=xml').status_code, 400)
+
+###############################################################################
+# Testing the vectorized aggregation against the previous implementation
+###############################################################################
+class TestSummarizeTemperatures(unittest.TestCase):
+    def assertNestedAlmostEqual(self, actual, expected, path=""):
+        if isinstance(expected, dict):
+            self.assertEqual(list(actual), list(expected), msg=path)
+            for key in expected:
+                self.assertNestedAlmostEqual(actual[key], expected[key], f"{path}/{key}")
+        elif expected is None:
+            self.assertIsNone(actual, msg=path)
+        else:
+            self.assertAlmostEqual(actual, expected, places=9, msg=path)
+
+    def test_matches_legacy_aggregation(self):
+        data = load_station_dataframe(synthetic_station_gzip(4, seed=3))
+        # Fehlende Messwerte, inklusive einer Saison ganz ohne gültige TMIN-Werte
+        data.loc[data.sample(frac=0.05, random_state=1).index, 'VALUE'] = np.nan
+        data.loc[(data['ELEMENT'] == 'TMIN') & (data['DATE'].dt.year == 2022) &
+                 data['DATE'].dt.month.isin([6, 7, 8]), 'VALUE'] = np.nan
+        # Eine Saison ganz ohne TMAX-Zeilen
+        data = data[~((data['ELEMENT'] == 'TMAX') & (data['DATE'].dt.year == 2023) &
+                      data['DATE'].dt.month.isin([3, 4, 5]))]
+        for station_lat in (48.0, -33.0):
+            self.assertNestedAlmostEqual(vectorized_aggregate(data, station_lat),
+                                         legacy_aggregate(data, station_lat))
+
+    def test_served_payload_matches_legacy_jsonify(self):
+        # Ausgeliefert wurde früher per jsonify: gleiche Schlüsselreihenfolge, Mittelwerte bis auf
+        # die letzten Stellen (Summationsreihenfolge von bincount gegenüber pandas)
+        data = load_station_dataframe(synthetic_station_gzip(4, seed=5))
+        data.loc[data.sample(frac=0.05, random_state=2).index, 'VALUE'] = np.nan
+        for station_lat in (48.0, -33.0):
+            with app.app_context():
+                legacy = json.loads(app.json.dumps(legacy_aggregate(data, station_lat)))
+            served = json.loads(json_bytes(vectorized_aggregate(data, station_lat)))
+            self.assertEqual(list(served['seasonal_summary']['2021']), ['Autumn', 'Spring', 'Summer', 'Winter'])
+            self.assertNestedAlmostEqual(served, legacy)
+
+###############################################################################
+# Testing the streaming station file parser
+###############################################################################
+class TestParseStationFile(unittest.TestCase):
+    def expected_observations(self, gz):
+        data = load_station_dataframe(gz)
+        data = data[data['ELEMENT'].isin(['TMAX', 'TMIN']) & data['DATE'].notna()]
+        return {
+            'year': data['DATE'].dt.year.to_numpy(),
+            'month': data['DATE'].dt.month.to_numpy(),
+            'is_tmax': (data['ELEMENT'] == 'TMAX').to_numpy(),
+            'value': pd.to_numeric(data['VALUE'], errors='coerce').to_numpy() / 10,
+            'quality_flagged': data['Q-FLAG'].notna().to_numpy(),
+        }
+
+    def assertObservationsEqual(self, actual, expected):
+        for key in expected:
+            np.testing.assert_array_equal(actual[key], expected[key], err_msg=key)
+
+    def test_matches_pandas_across_chunk_sizes(self):
+        gz = synthetic_station_gzip(3, seed=5)
+        expected = self.expected_observations(gz)
+        for chunk_bytes in (37, 4096, 10 ** 7):
+            self.assertObservationsEqual(parse_station_file(io.BytesIO(gz), chunk_bytes), expected)
+
+    def test_irregular_lines(self):
+        csv_content = (
+            "ST001,20210101,TMAX,-25,,,,\n"
+            "ST001,20210101,TMIN,,,,,\n"              # fehlender Wert -> NaN
+            "ST001,20210102,TMAX,abc,,,,\n"           # ungültiger Wert -> NaN
+            "ST001,20211301,TMAX,100,,,,\n"           # ungültiger Monat -> verworfen
+            "ST001,2021010,TMAX,100,,,,\n"            # ungültiges Datum -> verworfen
+            "ST001,20210103,PRCP,7,,,,\n"             # kein Temperaturelement
+            "ST001,20210104,TMIN,12,,X,,\n"           # Q-FLAG gesetzt
+            "ST001,20210105,TMAX,300,,,E,0700"         # letzte Zeile ohne Zeilenumbruch
+        )
+        parsed = parse_station_file(io.BytesIO(gzip.compress(csv_content.encode())))
+        np.testing.assert_array_equal(parsed['year'], [2021] * 5)
+        np.testing.assert_array_equal(parsed['is_tmax'], [True, False, True, False, True])
+        np.testing.assert_array_equal(parsed['value'], [-2.5, np.nan, np.nan, 1.2, 30.0])
+        np.testing.assert_array_equal(parsed['quality_flagged'], [False, False, False, True, False])
+
+    def test_fallback_for_unexpected_field_count(self):
+        csv_content = "ST001,20210101,TMAX,250,,,\nST001,20210201,TMIN,-5,,,,\n"
+        parsed = parse_station_file(io.BytesIO(gzip.compress(csv_content.encode())))
+        np.testing.assert_array_equal(parsed['month'], [1, 2])
+        np.testing.assert_array_equal(parsed['value'], [25.0, -0.5])
+
+###############################################################################
+# Testing StationFileCache against a local stand-in for NOAA
+###############################################################################
+def gzip_bytes(text: str) -> bytes:
+    return gzip.compress(text.encode('utf-8'))
+
+
+class _TestHTTPServer(ThreadingHTTPServer):
+    # Viele gleichzeitige Verbindungen (asynchrone Downloads): mit dem Standard-Backlog von 5
+    # gehen SYNs verloren und werden erst nach einer Sekunde wiederholt
+    request_queue_size = 128
+
+
+class FakeNOAAServer:
+    """
+    Lokaler HTTP-Server, der Dateien aus einem Dictionary ausliefert und ETags unterstützt.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        # Pfad -> Anzahl der Anfragen, die noch mit 503 beantwortet werden
+        self.failures = {}
+        self.delay = 0
+        self.active = 0
+        self.max_active = 0
+        fake = self
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with lock:
+                    fake.requests.append((self.path, dict(self.headers)))
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                try:
+                    self.respond()
+                finally:
+                    with lock:
+                        fake.active -= 1
+
+            def do_HEAD(self):
+                self.respond(head=True)
+
+            def respond(self, head=False):
+                time.sleep(fake.delay)
+                if fake.failures.get(self.path):
+                    fake.failures[self.path] -= 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = fake.files.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _TestHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestHttpFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.server.files['/file.txt'] = b"payload"
+
+    def test_retries_transient_errors(self):
+        self.server.failures['/file.txt'] = 2
+        fetcher = HttpFetcher(retries=3, backoff=0)
+        self.assertEqual(fetcher.get_bytes(self.server.url + '/file.txt'), b"payload")
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.server.failures['/file.txt'] = 5
+        with self.assertRaises(Exception):
+            HttpFetcher(retries=1, backoff=0).get_bytes(self.server.url + '/file.txt')
+
+    def test_per_host_concurrency_limit(self):
+        self.server.delay = 0.05
+        fetcher = HttpFetcher(max_per_host=2, backoff=0)
+        threads = [threading.Thread(target=fetcher.get_bytes, args=(self.server.url + '/file.txt',))
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.server.max_active, 2)
+        self.assertEqual(fetcher.stats()['requests'], 6)
+        self.assertGreater(fetcher.stats()['throttled'], 0)
+
+    def test_read_timeout(self):
+        self.server.delay = 0.5
+        with self.assertRaises(Exception):
+            HttpFetcher(read_timeout=0.1, retries=0).get_bytes(self.server.url + '/file.txt')
+
+    def test_inventory_over_http(self):
+        self.server.files['/ghcnd-inventory.txt'] = (
+            inventory_line('GME00102404', 48.1234, 8.1234, 'TMAX', 1950, 2020) + "\n").encode()
+        with patch('app.CACHE_DIR', tempfile.mkdtemp()):
+            columns = load_ghcnd_stations(self.server.url + '/ghcnd-inventory.txt', None)
+        self.assertEqual(list(columns['ID']), [b'GME00102404'])
+
+
+class TestStationFileCache(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.cache = StationFileCache(tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")
+        self.server.files['/by_station/ST001.csv.gz'] = gzip_bytes("ST001,20210101,TMAX,250,,,,\n")
+
+    def read(self, station_id):
+        with self.cache.open(station_id) as f:
+            return gzip.decompress(f.read()).decode()
+
+    def test_hit_after_miss(self):
+        self.assertIn("TMAX", self.read("ST001"))
+        self.assertIn("TMAX", self.read("ST001"))
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_conditional_revalidation(self):
+        self.cache.revalidate_after = 0
+        self.read("ST001")
+        self.read("ST001")
+        self.assertEqual(self.server.requests[1][1].get('If-None-Match'),
+                         f'"{hashlib.md5(self.server.files["/by_station/ST001.csv.gz"]).hexdigest()}"')
+        self.assertEqual(self.cache.stats()['revalidated'], 1)
+
+        # Geänderte Datei auf dem Server wird neu geladen
+        self.server.files['/by_station/ST001.csv.gz'] = gzip_bytes("ST001,20210101,TMIN,50,,,,\n")
+        self.assertIn("TMIN", self.read("ST001"))
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_stale_copy_when_server_unreachable(self):
+        self.read("ST001")
+        self.cache.revalidate_after = 0
+        self.cache.url_template = "http://127.0.0.1:1/{station_id}.csv.gz"
+        self.assertIn("TMAX", self.read("ST001"))
+        self.assertEqual(self.cache.stats()['stale'], 1)
+
+    def test_lru_eviction(self):
+        for station_id in ("ST002", "ST003", "ST004"):
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = os.urandom(1000)
+        self.cache.max_bytes = 2500
+        for station_id in ("ST002", "ST003"):
+            self.cache.open(station_id).close()
+            time.sleep(0.01)
+        self.cache.open("ST002").close()  # ST002 wird zuletzt genutzt
+        time.sleep(0.01)
+        self.cache.open("ST004").close()
+        cached = sorted(f for f in os.listdir(self.cache.directory) if f.endswith('.csv.gz'))
+        self.assertEqual(cached, ['ST002.csv.gz', 'ST004.csv.gz'])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_eviction_skips_locked_files_and_removes_lock_files(self):
+        for station_id in ("ST002", "ST003", "ST004"):
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = os.urandom(1000)
+        self.cache.max_bytes = 2500
+        for station_id in ("ST002", "ST003"):
+            self.cache.open(station_id).close()
+            time.sleep(0.01)
+        # ST002 ist am ältesten, wird aber gerade gelesen und bleibt deshalb liegen
+        with _FileLock(self.cache.path("ST002") + '.lock'):
+            self.cache.open("ST004").close()
+        # Fehlgeschlagener Download: die Lock-Datei verschwindet mit der nächsten Verdrängung
+        with self.assertRaises(requests.HTTPError):
+            self.cache.open("MISSING")
+        self.cache.open("ST001").close()
+        expected = [f"{station_id}.csv.gz{suffix}" for station_id in ("ST001", "ST002", "ST004")
+                    for suffix in ('', '.json', '.lock')]
+        self.assertEqual(sorted(os.listdir(self.cache.directory)), sorted(expected + ['.evict.lock']))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_deleted_file_is_downloaded_again(self):
+        self.read("ST001")
+        # Zwischen Metadaten-Prüfung und Öffnen entfernt
+        with patch('app.os.utime', side_effect=FileNotFoundError):
+            self.assertIn("TMAX", self.read("ST001"))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_concurrent_requests_download_once(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.read("ST001"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_invalid_station_id(self):
+        with self.assertRaises(ValueError):
+            self.cache.open("../etc/passwd")
+
+###############################################################################
+# Testing the StationExecutor
+###############################################################################
+class TestSingleFlightCache(unittest.TestCase):
+    def test_concurrent_misses_share_one_load(self):
+        release = threading.Event()
+        calls = []
+
+        def load(key):
+            calls.append(key)
+            release.wait(5)
+            return key.upper()
+
+        cache = SingleFlightCache(load, maxsize=4)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache("a"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while cache.stats()['misses'] + cache.stats()['coalesced'] < 8:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, ["a"])
+        self.assertEqual(results, ["A"] * 8)
+        self.assertEqual(cache.stats()['coalesced'], 7)
+        self.assertEqual(cache("a"), "A")
+        self.assertEqual(cache.cache_info().hits, 1)
+
+    def test_errors_are_shared_but_not_cached(self):
+        load = MagicMock(side_effect=[ValueError("down"), "ok"])
+        cache = SingleFlightCache(load, maxsize=4)
+        with self.assertRaises(ValueError):
+            cache("a")
+        self.assertEqual(cache("a"), "ok")
+        self.assertEqual(load.call_count, 2)
+
+    def test_lru_eviction_and_discard(self):
+        cache = SingleFlightCache(lambda key: object(), maxsize=2)
+        first = cache("a")
+        cache("b")
+        cache("a")
+        cache("c")
+        self.assertIs(cache("a"), first)
+        self.assertEqual(cache.cache_info().currsize, 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache.discard("a")
+        self.assertIsNot(cache("a"), first)
+
+    def test_byte_budget(self):
+        cache = SingleFlightCache(lambda key: [key] * int(key[1:]), maxsize=None, maxbytes=10, sizeof=len)
+        cache("a4")
+        cache("b4")
+        cache("a4")
+        cache("c2")
+        self.assertEqual(cache.stats()['bytes'], 10)
+        # Neuer Eintrag über dem Budget verdrängt den am längsten nicht genutzten
+        cache("d1")
+        self.assertIsNone(cache.peek("b4"))
+        self.assertEqual((cache.stats()['bytes'], cache.stats()['evictions']), (7, 1))
+
+        # Nachträglich gewachsener Eintrag
+        cache("a4").extend(["a"] * 5)
+        cache.resized("a4")
+        self.assertIsNone(cache.peek("c2"))
+        self.assertEqual(cache.stats()['bytes'], 10)
+        cache.cache_clear()
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_summary_size_includes_encoded_windows(self):
+        summary = StationSummary({str(year): {'Max_Temperature (°C)': 10.0, 'Min_Temperature (°C)': 1.0,
+                                              'Year_Avg_Temperature (°C)': 5.5} for year in range(1900, 2020)}, {})
+        base = summary.nbytes
+        payload = summary.encoded(1900, 2019, 'columnar')
+        self.assertEqual(summary.nbytes - base,
+                         payload.nbytes + sum(column.nbytes for column in summary._columns().values()))
+        self.assertGreater(payload.nbytes, len(payload.body))
+
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = Metrics(buckets=(0.01, 0.1))
+        registry.inc('requests_total', cache='a"b')
+        registry.inc('requests_total', 2, cache='a"b')
+        for seconds in (0.005, 0.05, 0.5):
+            registry.observe('parse', seconds)
+        lines = registry.render([('entries', 'gauge', {}, 7)]).splitlines()
+        self.assertEqual(lines[:4], ['# TYPE requests_total counter', 'requests_total{cache="a\\"b"} 3',
+                                     '# TYPE entries gauge', 'entries 7'])
+        self.assertIn('wetteranzeige_stage_seconds_bucket{stage="parse",le="0.01"} 1', lines)
+        self.assertIn('wetteranzeige_stage_seconds_bucket{stage="parse",le="0.1"} 2', lines)
+        self.assertIn('wetteranzeige_stage_seconds_bucket{stage="parse",le="+Inf"} 3', lines)
+        self.assertIn('wetteranzeige_stage_seconds_count{stage="parse"} 3', lines)
+        self.assertEqual(registry.histogram('parse'), (3, 0.555))
+
+    def test_capture_merge_and_request_timings(self):
+        worker, web = Metrics(), Metrics()
+        with worker.capture() as records:
+            with worker.span('parse'):
+                pass
+            worker.inc('downloaded_bytes_total', 100, source='station')
+        worker.inc('not_captured_total')
+        web.start_request()
+        web.merge(records)
+        self.assertEqual(list(web.finish_request()), ['parse'])
+        self.assertEqual(web.finish_request(), {})
+        self.assertEqual(web.histogram('parse')[0], 1)
+        self.assertEqual(web.counter('downloaded_bytes_total', source='station'), 100)
+        self.assertEqual(web.counter('not_captured_total'), 0)
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        patcher = patch('app.limiter.enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_profiler(self, **kwargs):
+        profiler = RequestProfiler(**kwargs)
+        patcher = patch('app.profiler', profiler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return profiler
+
+    @staticmethod
+    def slow_station(*args, **kwargs):
+        time.sleep(0.1)
+        return app.response_class(b'{}', mimetype='application/json'), 200
+
+    def test_disabled_by_default(self):
+        self.use_profiler(slow_ms=0, sample_rate=0)
+        self.assertEqual(self.client.get('/admin/profiles').status_code, 404)
+
+    def test_keeps_only_slow_requests(self):
+        self.use_profiler(slow_ms=50, interval_ms=1)
+        with patch('app.process_station_data', side_effect=self.slow_station):
+            self.assertEqual(self.client.get('/api/station_data?station_id=ST001').status_code, 200)
+        self.assertEqual(self.client.get('/api/station_data').status_code, 400)
+
+        profiles = self.client.get('/admin/profiles').get_json()['profiles']
+        self.assertEqual([p['label'] for p in profiles], ['GET /api/station_data?station_id=ST001'])
+        self.assertEqual(profiles[0]['mode'], 'slow')
+        self.assertGreaterEqual(profiles[0]['duration_ms'], 100)
+        collapsed = self.client.get(f"/admin/profiles/{profiles[0]['id']}").get_data(as_text=True)
+        self.assertIn('TestRequestProfiler.slow_station (test_app.py:', collapsed)
+        self.assertIn('get_station_weather_data (app.py:', collapsed)
+        self.assertEqual(self.client.get(f"/admin/profiles/{profiles[0]['id']}?format=pstats").status_code, 400)
+
+    def test_sampled_requests_as_pstats(self):
+        self.use_profiler(sample_rate=1.0)
+        with patch('app.process_station_data', side_effect=self.slow_station):
+            self.client.get('/api/station_data?station_id=ST001')
+        profile_id = self.client.get('/admin/profiles').get_json()['profiles'][0]['id']
+        path = os.path.join(tempfile.mkdtemp(), 'profile.pstats')
+        with open(path, 'wb') as f:
+            f.write(self.client.get(f"/admin/profiles/{profile_id}?format=pstats").get_data())
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn('slow_station', functions)
+        text = self.client.get(f"/admin/profiles/{profile_id}?format=text").get_data(as_text=True)
+        self.assertIn('cumulative', text)
+
+    def test_keeps_slowest_profiles(self):
+        profiler = RequestProfiler(slow_ms=1, keep=2)
+        for label, duration in (('a', 0.3), ('b', 0.1), ('c', 0.2), ('d', 0.05)):
+            state = profiler.start()
+            state['started'] -= duration
+            profiler.finish(state, label)
+        self.assertEqual([p['label'] for p in profiler.profiles()], ['a', 'c'])
+
+    def test_worker_stacks_are_attached(self):
+        profiler = self.use_profiler(slow_ms=1, interval_ms=1)
+
+        def compute(station_id, southern):
+            time.sleep(0.05)
+            return StationSummary({}, {})
+
+        with patch('app.compute_station_summary', side_effect=compute):
+            _, _, stacks = _pooled_station_summary("ST001", False)
+        state = profiler.start()
+        profiler.add_stacks(stacks, 'station_worker')
+        state['started'] -= 0.05
+        record = profiler.finish(state, 'GET /api/station_data')
+        self.assertTrue(any(stack.startswith('station_worker;') and 'compute' in stack for stack in record['stacks']))
+
+    def test_admin_token(self):
+        self.use_profiler(slow_ms=1000)
+        with patch('app.ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.client.get('/admin/profiles').status_code, 401)
+            response = self.client.get('/admin/profiles', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_without_token_only_local(self):
+        self.use_profiler(slow_ms=1000)
+        remote = self.client.get('/admin/profiles', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertEqual(remote.status_code, 403)
+        self.assertEqual(self.client.get('/admin/profiles/1', environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code,
+                         403)
+        self.assertEqual(self.client.get('/admin/profiles').status_code, 200)
+
+    def test_streamed_response_is_profiled_until_closed(self):
+        self.use_profiler(slow_ms=50, interval_ms=1)
+
+        def slow_batch(**params):
+            time.sleep(0.1)
+            yield b'{}'
+
+        with patch('app.stream_station_batch', side_effect=slow_batch):
+            response = self.client.get('/api/station_data/batch?station_ids=ST001')
+            self.assertEqual(response.get_data(), b'{}\n')
+            response.close()
+        profiles = self.client.get('/admin/profiles').get_json()['profiles']
+        self.assertEqual([p['label'] for p in profiles], ['GET /api/station_data/batch?station_ids=ST001'])
+        self.assertGreaterEqual(profiles[0]['duration_ms'], 100)
+
+
+class TestStationExecutor(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.calls = []
+
+        def slow_compute(station_id, southern):
+            self.calls.append(station_id)
+            self.release.wait(5)
+            return StationSummary({'2021': {'Max_Temperature (°C)': 1.0}}, {})
+
+        patcher = patch('app.compute_station_summary', side_effect=slow_compute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_in_threads(self, func, n):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func())) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_concurrent_requests_share_one_computation(self):
+        executor = StationExecutor(workers=0, max_pending=4)
+        threads, results = self.run_in_threads(lambda: executor.submit("ST001", False).result(5), 10)
+        while executor.stats()['submitted'] + executor.stats()['deduplicated'] < 10:
+            time.sleep(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, ["ST001"])
+        self.assertEqual(len(results), 10)
+        self.assertEqual(executor.stats(), {'submitted': 1, 'deduplicated': 9, 'rejected': 0, 'pending': 0})
+
+    def test_saturated_queue_returns_503(self):
+        executor = StationExecutor(workers=0, max_pending=1)
+        threads, _ = self.run_in_threads(lambda: executor.submit("ST001", False), 1)
+        while not self.calls:
+            time.sleep(0.01)
+        with patch('app.station_executor', executor), \
+                patch('app.read_station_table', return_value=station_table(('ST002', 45.0))):
+            aggregate_station_data.cache_clear()
+            response = app.test_client().get('/api/station_data?station_id=ST002')
+        self.release.set()
+        threads[0].join()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '5')
+        self.assertEqual(executor.stats()['rejected'], 1)
+
+
+class TestStationExecutorProcessPool(unittest.TestCase):
+    def test_process_pool(self):
+        with FakeNOAAServer() as server:
+            server.files['/by_station/ST001.csv.gz'] = gzip_bytes("ST001,20210101,TMAX,250,,,,\n")
+            # Worker-Prozesse werden per spawn gestartet und lesen ihre Konfiguration aus der Umgebung
+            with patch.dict(os.environ, {'STATION_DATA_URL': server.url + "/by_station/{station_id}.csv.gz",
+                                         'WETTER_CACHE_DIR': tempfile.mkdtemp()}):
+                executor = StationExecutor(workers=1, max_pending=4)
+                self.addCleanup(executor.shutdown)
+                parsed_before = metrics.histogram('station_parse')[0]
+                summary = executor.submit("ST001", False).result(60)
+        self.assertEqual(summary.window(2021, 2021)['yearly_summary']['2021']['Max_Temperature (°C)'], 25.0)
+        # Im Pool-Prozess gemessen, im aufrufenden Prozess sichtbar
+        self.assertEqual(metrics.histogram('station_parse')[0], parsed_before + 1)
+
+###############################################################################
+# Testing the precomputed aggregate store
+###############################################################################
+class TestAggregateStore(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        for station_id in ("ST001", "ST002", "AS001"):
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = gzip_bytes(
+                f"{station_id},20200115,TMAX,250,,,,\n{station_id},20210715,TMIN,50,,,,\n")
+        self.store = AggregateStore(os.path.join(tempfile.mkdtemp(), 'aggregates.sqlite'))
+        patchers = [
+            patch('app.station_file_cache', StationFileCache(
+                tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")),
+            patch('app.aggregate_store', self.store),
+            patch('app.read_station_table', return_value=station_table(('ST001', 45.0), ('AS001', -33.9))),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        aggregate_station_data.cache_clear()
+        self.addCleanup(aggregate_station_data.cache_clear)
+
+    def test_precompute_and_serve_from_store(self):
+        stats = precompute_aggregates([("ST001", False), ("AS001", True), ("MISSING", False)], self.store)
+        self.assertEqual(stats, {'total': 3, 'skipped': 0, 'stored': 2, 'failed': 1})
+        self.assertEqual(self.store.keys(), {("ST001", False), ("AS001", True)})
+
+        requests_before = len(self.server.requests)
+        with app.app_context():
+            data = json.loads(process_station_data("AS001", 2020, 2021)[0].get_data())
+        self.assertEqual(len(self.server.requests), requests_before)
+        self.assertEqual(data['yearly_summary']['2020']['Max_Temperature (°C)'], 25.0)
+        self.assertEqual(data['seasonal_summary']['2020']['Summer']['Max_Temperature (°C)'], 25.0)
+
+    def test_resume_skips_existing_entries(self):
+        precompute_aggregates([("ST001", False)], self.store)
+        stats = precompute_aggregates([("ST001", False), ("ST002", False)], self.store, workers=2)
+        self.assertEqual(stats, {'total': 2, 'skipped': 1, 'stored': 1, 'failed': 0})
+        stats = precompute_aggregates([("ST001", False), ("ST002", False)], self.store, refresh=True)
+        self.assertEqual(stats['stored'], 2)
+        # Doppelt angegebene Stationen zählen einmal und nicht als übersprungen
+        stats = precompute_aggregates([("ST003", False), ("ST003", False), ("ST001", False)], self.store)
+        self.assertEqual(stats, {'total': 2, 'skipped': 1, 'stored': 0, 'failed': 1})
+
+    def test_cli_command(self):
+        result = app.test_cli_runner().invoke(args=['precompute', '--all', '--workers', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("[2/2]", result.output)
+        self.assertEqual(self.store.keys(), {("ST001", False), ("AS001", True)})
+
+###############################################################################
+# Testing the batch station data endpoint
+###############################################################################
+class TestStationBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        for station_id in ("ST001", "AS001"):
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = gzip_bytes(
+                f"{station_id},20200115,TMAX,250,,,,\n{station_id},20210715,TMIN,50,,,,\n")
+        patchers = [
+            patch('app.station_file_cache', StationFileCache(
+                tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")),
+            patch('app.aggregate_store', None),
+            patch('app.read_station_table', return_value=station_table(('ST001', 45.0), ('AS001', -33.9))),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        aggregate_station_data.cache_clear()
+        self.addCleanup(aggregate_station_data.cache_clear)
+        self.client = app.test_client()
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/api/station_data/batch?station_ids=ST001,AS001,MISSING,ST001'
+                                   '&firstyear=2020&lastyear=2021&format=columnar')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = {line['station_id']: line for line in map(json.loads, response.get_data().splitlines())}
+        self.assertEqual(set(lines), {"ST001", "AS001", "MISSING"})
+        self.assertEqual(lines["ST001"]['data']['tmax'], [25.0, 0.0])
+        self.assertEqual(lines["ST001"]['data']['seasonal_tmax'][0][0], 25.0)
+        # Südhalbkugel: Januar ist Sommer
+        self.assertEqual(lines["AS001"]['data']['seasonal_tmax'][0][2], 25.0)
+        self.assertEqual(lines["MISSING"]['status'], 500)
+
+    def test_stations_are_fetched_concurrently(self):
+        # Beide Stationen müssen gleichzeitig in der Berechnung sein, sonst läuft die Barriere ab
+        barrier = threading.Barrier(2, timeout=5)
+
+        def compute(station_id, southern):
+            barrier.wait()
+            return StationSummary({'2021': {'Max_Temperature (°C)': 1.0}}, {})
+
+        with patch('app.compute_station_summary', side_effect=compute):
+            response = self.client.get('/api/station_data/batch?station_ids=ST001,AS001',
+                                       headers={'Accept': 'text/event-stream'})
+            events = response.get_data(as_text=True).split('\n\n')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(events[-2:], ['data: finished', ''])
+        statuses = [json.loads(event[len('data: '):])['status'] for event in events[:-2]]
+        self.assertEqual(statuses, [200, 200])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/station_data/batch').status_code, 400)
+        self.assertEqual(self.client.get('/api/station_data/batch?station_ids=../etc').status_code, 400)
+        too_many = ','.join(f"ST{i:03d}" for i in range(BATCH_MAX_STATIONS + 1))
+        self.assertEqual(self.client.get(f'/api/station_data/batch?station_ids={too_many}').status_code, 400)
+
+    def test_rate_limit_counts_each_station(self):
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+        stations = ','.join(f"ST{i:03d}" for i in range(20))
+        with patch('app.stream_station_batch', return_value=iter([])):
+            self.assertEqual(self.client.get(f'/api/station_data/batch?station_ids={stations}').status_code, 200)
+            self.assertEqual(self.client.get(f'/api/station_data/batch?station_ids={stations}').status_code, 429)
+
+@unittest.skipUnless(asgi, "httpx/asgiref nicht installiert")
+class TestAsgiApp(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        for station_id in ("ST001", "AS001"):
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = gzip_bytes(
+                f"{station_id},20200115,TMAX,250,,,,\n{station_id},20210715,TMIN,50,,,,\n")
+        self.cache = StationFileCache(tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")
+        patchers = [
+            patch('app.station_file_cache', self.cache),
+            patch('app.aggregate_store', None),
+            patch('app.read_station_table', return_value=station_table(('ST001', 45.0), ('AS001', -33.9),
+                                                                       names={"ST001": "Nord"})),
+            patch('app.limiter.enabled', False),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        aggregate_station_data.cache_clear()
+        self.addCleanup(aggregate_station_data.cache_clear)
+        self.asgi = asgi.AsyncApp(app)
+
+    def run_async(self, coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await self.asgi.fetcher.aclose()
+        return asyncio.run(main())
+
+    def get(self, *requests):
+        async def fetch():
+            transport = httpx.ASGITransport(app=self.asgi)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(client.get(url, headers=headers) for url, headers in requests))
+        return self.run_async(fetch())
+
+    def test_station_data_matches_flask(self):
+        url = '/api/station_data?station_id=AS001&firstyear=2020&lastyear=2021'
+        response, = self.get((url, {'Accept-Encoding': 'gzip'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, app.test_client().get(url).get_data())
+        self.assertEqual(len(self.server.requests), 1)
+
+        not_modified, = self.get((url, {'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']}))
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_server_timing(self):
+        with patch('app.SERVER_TIMING', True):
+            response, = self.get(('/api/station_data?station_id=ST001', {}))
+        stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+        # Download auf der Event-Loop, Berechnung und Serialisierung in Threads
+        for stage in ('station_download', 'station_compute', 'station_parse', 'station_encode', 'total'):
+            self.assertIn(stage, stages)
+
+    def test_many_pending_downloads(self):
+        # Deutlich mehr offene Downloads als Threads im Executor
+        station_ids = [f"ST{i:03d}" for i in range(100)]
+        for station_id in station_ids:
+            self.server.files[f'/by_station/{station_id}.csv.gz'] = gzip_bytes(f"{station_id},20210101,TMAX,250,,,,\n")
+        self.server.delay = 0.3
+
+        async def fetch_all():
+            await asyncio.gather(*(self.asgi.fetcher.ensure_cached(station_id)
+                                   for station_id in station_ids + station_ids[:10]))
+
+        started = time.perf_counter()
+        self.run_async(fetch_all())
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertGreater(self.server.max_active, 32)
+        self.assertEqual(len(self.server.requests), 100)
+        stats = self.asgi.fetcher.stats()
+        self.assertEqual((stats['downloads'], stats['coalesced'], stats['pending']), (100, 10, 0))
+        self.assertEqual(self.cache.stats()['misses'], 100)
+
+    def test_retry_and_stale_copy(self):
+        self.server.failures['/by_station/ST001.csv.gz'] = 1
+        self.run_async(self.asgi.fetcher.ensure_cached("ST001"))
+        self.assertEqual(len(self.server.requests), 2)
+
+        # Server nicht erreichbar: die vorhandene Kopie bleibt nutzbar
+        self.cache.revalidate_after = 0
+        self.server.failures['/by_station/ST001.csv.gz'] = 10
+        self.run_async(self.asgi.fetcher.ensure_cached("ST001"))
+        self.assertEqual(self.asgi.fetcher.stats()['stale'], 1)
+        with self.cache.open("ST001") as f:
+            self.assertIn(b"TMAX", gzip.decompress(f.read()))
+
+    def test_batch_stream(self):
+        response, = self.get(('/api/station_data/batch?station_ids=ST001,AS001,MISSING&format=columnar'
+                              '&firstyear=2020&lastyear=2021', {'Accept': 'text/event-stream'}))
+        self.assertEqual(response.headers['Content-Type'], 'text/event-stream')
+        events = response.text.split('\n\n')
+        self.assertEqual(events[-2:], ['data: finished', ''])
+        lines = {line['station_id']: line for line in (json.loads(event[len('data: '):]) for event in events[:-2])}
+        self.assertEqual(lines["ST001"]['data']['tmax'], [25.0, 0.0])
+        self.assertEqual(lines["AS001"]['data']['seasonal_tmax'][0][2], 25.0)
+        self.assertEqual(lines["MISSING"]['status'], 500)
+
+    def test_batch_rate_limit_counts_each_station(self):
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+        stations = ','.join(f"XX{i:03d}" for i in range(20))
+        with patch('app.limiter.enabled', True):
+            first, = self.get((f'/api/station_data/batch?station_ids={stations}', {}))
+            second, = self.get((f'/api/station_data/batch?station_ids={stations}', {}))
+        self.assertEqual((first.status_code, second.status_code), (200, 429))
+
+    def test_find_stations_and_fallback(self):
+        url = '/api/find_stations?lat=45&lon=8.53&max_dist_km=50&max_stations=5&firstyear=2000&lastyear=2020'
+        response, invalid, invalid_id, index = self.get(
+            (url, {}), ('/api/station_data?station_id=ST001&firstyear=x', {}),
+            ('/api/station_data?station_id=ST..001', {}), ('/', {}))
+        self.assertEqual(response.text, app.test_client().get(url).get_data(as_text=True))
+        self.assertIn('"city":"Nord"', response.text)
+        self.assertEqual((invalid.status_code, invalid_id.status_code), (400, 400))
+        self.assertFalse(any('ST..001' in path for path, _ in self.server.requests))
+        # Alle anderen Routen beantwortet die Flask-App
+        self.assertEqual(index.status_code, 200)
+
+
+class TestPreloadAndHealth(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            patch.dict('app._station_index_cache', clear=True),
+            patch.dict('app._preload_state', {'error': None, 'seconds': None}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app.test_client()
+
+    def test_ready_only_after_index_is_built(self):
+        with patch('app.read_station_table', side_effect=OSError("offline")):
+            self.assertFalse(preload_station_data())
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['preload_error'], "offline")
+
+        with patch('app.read_station_table', return_value=station_table(('ST001', 45.0), ('ST002', 46.0))):
+            self.assertTrue(preload_station_data())
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], "ready")
+        self.assertEqual(response.get_json()['stations'], 2)
+        self.assertIsNone(response.get_json()['preload_error'])
+
+    def test_gunicorn_hooks(self):
+        config = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+        self.assertTrue(config['preload_app'])
+        with patch('app.preload_station_data') as preload, patch('gc.freeze') as freeze:
+            config['on_starting'](None)
+            preload.assert_called_once_with()
+            freeze.assert_called_once_with()
+
+            # Worker ohne Index laden im Hintergrund nach
+            preload.reset_mock()
+            config['post_fork'](None, None)
+            for thread in threading.enumerate():
+                if thread.name == 'preload':
+                    thread.join(5)
+            preload.assert_called_once_with()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "kein fork verfügbar")
+    def test_fork_resets_connections(self):
+        session = http_fetcher.session
+        with patch.object(station_executor, '_executor', MagicMock()):
+            pid = os.fork()
+            if pid == 0:
+                # Kindprozess: eigene Session, kein geerbter Prozess-Pool
+                os._exit(0 if http_fetcher.session is not session and station_executor._executor is None else 1)
+            _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(http_fetcher.session, session)
+
+
+class FakeRedisServer:
+    """
+    Lokaler Server mit dem Redis-Protokoll (RESP2) für die von RedisCacheBackend genutzten Befehle.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        fake = self
+        lock = threading.Lock()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # Befehle zwischen MULTI und EXEC werden gesammelt und gemeinsam ausgeführt
+                queued = None
+                while True:
+                    header = self.rfile.readline()
+                    if not header:
+                        return
+                    args = []
+                    for _ in range(int(header[1:])):
+                        length = int(self.rfile.readline()[1:])
+                        args.append(self.rfile.read(length + 2)[:-2])
+                    command = args[0].decode().upper()
+                    if command == 'MULTI':
+                        queued, reply = [], b"+OK\r\n"
+                    elif command == 'EXEC':
+                        with lock:
+                            replies = [fake.execute(*entry) for entry in queued]
+                        queued, reply = None, b"*%d\r\n%s" % (len(replies), b"".join(replies))
+                    elif queued is not None:
+                        queued.append((command, args[1:]))
+                        reply = b"+QUEUED\r\n"
+                    else:
+                        with lock:
+                            reply = fake.execute(command, args[1:])
+                    self.wfile.write(reply)
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"redis://127.0.0.1:{self.server.server_address[1]}/0"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def execute(self, command, args):
+        self.commands.append(command)
+        if command == 'PING':
+            return b"+PONG\r\n"
+        if command == 'GET':
+            entry = self._live(args[0])
+            return self._bulk(entry and entry[0])
+        if command == 'SET':
+            if b'NX' in args and self._live(args[0]) is not None:
+                return b"$-1\r\n"
+            ttl = int(args[args.index(b'PX') + 1]) / 1000 if b'PX' in args else None
+            self.data[args[0]] = [args[1], time.time() + ttl if ttl else None]
+            return b"+OK\r\n"
+        if command in ('DEL', 'EXISTS'):
+            found = [key for key in args if self._live(key) is not None]
+            if command == 'DEL':
+                for key in found:
+                    del self.data[key]
+            return b":%d\r\n" % len(found)
+        if command == 'INCRBY':
+            entry = self._live(args[0]) or [b"0", None]
+            entry[0] = str(int(entry[0]) + int(args[1])).encode()
+            self.data[args[0]] = entry
+            return b":%s\r\n" % entry[0]
+        if command == 'PEXPIRE':
+            entry = self._live(args[0])
+            if entry is not None:
+                entry[1] = time.time() + int(args[1]) / 1000
+            return b":%d\r\n" % (entry is not None)
+        if command == 'PTTL':
+            entry = self._live(args[0])
+            if entry is None:
+                return b":-2\r\n"
+            return b":%d\r\n" % (-1 if entry[1] is None else int((entry[1] - time.time()) * 1000))
+        if command == 'SCAN':
+            pattern = args[args.index(b'MATCH') + 1].decode() if b'MATCH' in args else '*'
+            keys = [key for key in list(self.data) if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n%s" % (len(keys), b"".join(self._bulk(key) for key in keys))
+        return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SharedCacheBackendTests:
+    """
+    Gemeinsame Tests aller Cache-Backends; make_backend liefert ein neues Backend.
+    """
+
+    def test_values(self):
+        backend = self.make_backend()
+        self.assertIsNone(backend.get("a"))
+        backend.set("a", b"\x00payload")
+        backend.set("b", b"kurz", ttl=0.05)
+        self.assertEqual(backend.get("a"), b"\x00payload")
+        self.assertTrue(backend.contains("b"))
+        time.sleep(0.1)
+        self.assertIsNone(backend.get("b"))
+        self.assertFalse(backend.contains("b"))
+        backend.delete("a")
+        self.assertIsNone(backend.get("a"))
+
+    def test_counters(self):
+        backend = self.make_backend()
+        self.assertEqual(backend.counter("c"), (0, None))
+        self.assertEqual(backend.incr("c", 1, 0.2), 1)
+        self.assertEqual(backend.incr("c", 2, 0.2), 3)
+        value, expires_at = backend.counter("c")
+        self.assertEqual(value, 3)
+        self.assertAlmostEqual(expires_at, time.time() + 0.2, delta=0.15)
+        time.sleep(0.25)
+        # Neues Fenster nach Ablauf
+        self.assertEqual(backend.incr("c", 1, 60), 1)
+        self.assertTrue(backend.ping())
+        self.assertGreaterEqual(backend.clear(), 1)
+        self.assertEqual(backend.counter("c"), (0, None))
+
+    def test_rate_limits_are_shared(self):
+        # Zwei Worker mit je eigenem Backend-Objekt auf demselben Speicher
+        limit = parse_limit("3 per minute")
+        first, second = self.make_backend(), self.make_backend(shared_with_previous=True)
+        with patch('app.shared_cache', first):
+            limiter_a = FixedWindowRateLimiter(SharedLimiterStorage())
+            self.assertTrue(limiter_a.hit(limit, "client"))
+            self.assertTrue(limiter_a.hit(limit, "client"))
+        with patch('app.shared_cache', second):
+            limiter_b = FixedWindowRateLimiter(SharedLimiterStorage())
+            self.assertTrue(limiter_b.hit(limit, "client"))
+            self.assertFalse(limiter_b.hit(limit, "client"))
+            self.assertEqual(limiter_b.get_window_stats(limit, "client").remaining, 0)
+            self.assertTrue(limiter_b.hit(limit, "other"))
+
+    def test_station_summary_is_shared(self):
+        backend = self.make_backend()
+        summary = StationSummary({'2021': {'Max_Temperature (°C)': 1.5}}, {})
+        with patch('app.shared_cache', backend), patch('app.aggregate_store', None), \
+                patch('app.compute_station_summary', return_value=summary) as compute:
+            aggregate_station_data.cache_clear()
+            self.assertEqual(aggregate_station_data("ST001", False).yearly, summary.yearly)
+            # Anderer Worker: leerer Prozess-Cache, aber Treffer im gemeinsamen Cache
+            aggregate_station_data.cache_clear()
+            self.assertEqual(aggregate_station_data("ST001", False).yearly, summary.yearly)
+            aggregate_station_data.cache_clear()
+        self.assertEqual(compute.call_count, 1)
+
+
+class TestMemoryCacheBackend(SharedCacheBackendTests, unittest.TestCase):
+    def make_backend(self, shared_with_previous=False):
+        if not shared_with_previous:
+            self.backend = MemoryCacheBackend(max_entries=100)
+        return self.backend
+
+    def test_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+        self.assertEqual((backend.get("a"), backend.get("b"), backend.get("c")), (b"1", None, b"3"))
+
+
+class TestSQLiteCacheBackend(SharedCacheBackendTests, unittest.TestCase):
+    def make_backend(self, shared_with_previous=False):
+        if not shared_with_previous:
+            self.path = os.path.join(tempfile.mkdtemp(), 'shared.sqlite')
+        return SQLiteCacheBackend(self.path, max_entries=100)
+
+    def test_counters_use_own_file(self):
+        backend = self.make_backend()
+        backend.set("a", b"1")
+        backend.incr("c", 1, 60)
+        # Rate-Limit-Zähler konkurrieren nicht mit den Zusammenfassungen um die Schreibsperre
+        with sqlite3.connect(backend.counters_path) as conn:
+            self.assertEqual(conn.execute('SELECT key, value FROM counters').fetchall(), [("c", 1)])
+        with sqlite3.connect(backend.path) as conn:
+            self.assertEqual(conn.execute('SELECT key FROM entries').fetchall(), [("a",)])
+
+    def test_eviction_and_url(self):
+        backend = SQLiteCacheBackend(os.path.join(tempfile.mkdtemp(), 'shared.sqlite'), max_entries=2)
+        for key in "abc":
+            backend.set(key, key.encode())
+        self.assertEqual([backend.get(key) for key in "abc"], [None, b"b", b"c"])
+        self.assertIsInstance(cache_backend_from_url("memory://"), MemoryCacheBackend)
+        self.assertEqual(cache_backend_from_url("sqlite:///tmp/x.sqlite").path, "/tmp/x.sqlite")
+        with self.assertRaises(ValueError):
+            cache_backend_from_url("memcached://localhost")
+
+
+@unittest.skipUnless(redis, "redis-Paket nicht installiert")
+class TestRedisCacheBackend(SharedCacheBackendTests, unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def make_backend(self, shared_with_previous=False):
+        return RedisCacheBackend(self.server.url)
+
+    def test_counter_expiry_is_set_atomically(self):
+        backend = RedisCacheBackend(self.server.url)
+        self.assertEqual(backend.incr("c", 2, 60), 2)
+        self.assertEqual(backend.incr("c", 1, 60), 3)
+        # Anlegen mit Ablaufzeit und Erhöhen laufen in einer Transaktion, kein separates PEXPIRE
+        self.assertEqual(self.server.commands.count('PEXPIRE'), 0)
+        self.assertIsNotNone(self.server.data[b"wetteranzeige:c"][1])
+
+    def test_unreachable_server_bypasses_cache(self):
+        backend = RedisCacheBackend("redis://127.0.0.1:1/0")
+        summary = StationSummary({'2021': {'Max_Temperature (°C)': 1.5}}, {})
+        with patch('app.shared_cache', backend), patch('app.aggregate_store', None), \
+                patch('app.compute_station_summary', return_value=summary):
+            aggregate_station_data.cache_clear()
+            self.assertEqual(aggregate_station_data("ST001", False).yearly, summary.yearly)
+            aggregate_station_data.cache_clear()
+            self.assertFalse(SharedLimiterStorage().check())
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.common = ['--stations', '3000', '--station-years', '2,3', '--workers', '0',
+                       '--fixtures', os.path.join(self.directory, 'fixtures')]
+
+    def test_synthetic_inventory_is_parsed_like_noaa(self):
+        path = os.path.join(self.directory, 'inventory.txt')
+        with open(path, 'w') as f:
+            f.write(synthetic_inventory_text(500))
+        columns = load_ghcnd_stations(path, None)
+        self.assertEqual(len(columns['ID']), 500)
+        self.assertEqual(columns['ID'][0], b"SYN00000000")
+        self.assertTrue(((columns['LATITUDE'] >= -90) & (columns['LATITUDE'] <= 90)).all())
+        self.assertTrue((columns['FIRSTYEAR'] <= columns['LASTYEAR']).all())
+
+    def test_suite_load_and_compare(self):
+        suite_path = os.path.join(self.directory, 'suite.json')
+        suite = benchmark.main(['suite', '--repeat', '2', '--queries', '5', '--output', suite_path] + self.common)
+        stages = suite['stages']
+        self.assertGreater(stages['inventory_parse']['rows_per_sec'], 0)
+        self.assertIn('peak_rss_mb', stages['index_build'])
+        self.assertEqual(stages['station_search']['runs'], 5)
+        self.assertEqual(set(stages['station_data_3y']), {'cold', 'cached_file', 'cached_summary'})
+        self.assertLessEqual(stages['station_data_3y']['cached_summary']['p50_ms'],
+                             stages['station_data_3y']['cold']['p50_ms'])
+
+        load = benchmark.main(['load', '--clients', '2', '--duration', '0.5', '--load-stations', '4',
+                               '--output', os.path.join(self.directory, 'load.json')] + self.common)
+        self.assertGreater(load['requests_per_sec'], 0)
+        for endpoint in load['endpoints'].values():
+            self.assertEqual(set(endpoint['statuses']), {'200'})
+
+        ratios = benchmark.main(['compare', suite_path, suite_path,
+                                 '--output', os.path.join(self.directory, 'compare.json')])['ratios']
+        self.assertEqual(ratios['stages.station_search'], {'p50_ms': 1.0, 'p99_ms': 1.0})
+
+    def test_memory(self):
+        memory = benchmark.main(['memory', '--output', os.path.join(self.directory, 'memory.json')] + self.common)
+        self.assertEqual(set(memory), {'benchmark', 'stations', 'parse', 'snapshot', 'meta'})
+        self.assertIn('rss_mb', memory['snapshot'])
+        self.assertGreater(memory['parse']['seconds'], 0)
+
+
 ###############################################################################
 # Testing Flask Endpoints
 ###############################################################################
@@ -298,6 +1878,12 @@ class TestFlaskRoutes(unittest.TestCase):
         data = json.loads(response.get_data(as_text=True))
         self.assertIn('error', data)
 
+    @patch('app.process_station_data')
+    def test_get_station_weather_data_invalid_id(self, mock_process):
+        response = self.app.get('/api/station_data?station_id=../etc/passwd')
+        self.assertEqual(response.status_code, 400)
+        mock_process.assert_not_called()
+
     @patch('app.process_station_data')
     def test_get_station_weather_data_valid(self, mock_process):
         # Set up a dummy response for process_station_data.
@@ -316,10 +1902,9 @@ class TestFlaskRoutes(unittest.TestCase):
         data = json.loads(response.get_data(as_text=True))
         self.assertEqual(data, {"dummy": "data"})
 
-    @patch('app.find_stations_within_radius')
-    @patch('app.read_station_cities')
-    def test_find_stations_endpoint(self, mock_read_cities, mock_find_stations):
-        # Set up dummy stations and a station-to-city mapping.
+    @patch('app.iter_stations_within_radius')
+    def test_find_stations_endpoint(self, mock_find_stations):
+        # Set up dummy stations (the city comes from the station table).
         dummy_stations = [
             {
                 "station_id": "ST001",
@@ -327,12 +1912,11 @@ class TestFlaskRoutes(unittest.TestCase):
                 "longitude": 8.53,
                 "distance_km": 10,
                 "firstyear": 2010,
-                "lastyear": 2015
+                "lastyear": 2015,
+                "city": "Test City"
             }
         ]
-        dummy_cities = {"ST001": "Test City"}
-        mock_find_stations.return_value = dummy_stations
-        mock_read_cities.return_value = dummy_cities
+        mock_find_stations.return_value = iter(dummy_stations)
 
         response = self.app.get(
             '/api/find_stations?lat=48.06&lon=8.53&max_dist_km=50&max_stations=5&firstyear=2010&lastyear=2015'
@@ -343,6 +1927,39 @@ class TestFlaskRoutes(unittest.TestCase):
         response_data = response.get_data(as_text=True)
         self.assertIn("Test City", response_data)
 
+    def test_find_stations_paging(self):
+        table = station_table(('ST001', 48.3), ('ST002', 48.07), ('ST003', 48.2), ('ST004', 48.1),
+                              names={"ST002": "Near"})
+        url = '/api/find_stations?lat=48.06&lon=8.53&max_dist_km=50&max_stations=3&firstyear=2000&lastyear=2020'
+
+        def events(query):
+            started = time.perf_counter()
+            body = self.app.get(url + query).get_data(as_text=True)
+            self.assertLess(time.perf_counter() - started, 0.5)
+            return [event for event in body.split('\n\n') if event]
+
+        with patch('app.read_station_table', return_value=table):
+            first = events('&limit=2')
+            second = events('&limit=2&cursor=2')
+        self.assertEqual([json.loads(e[6:])['station_id'] for e in first[:2]], ['ST002', 'ST004'])
+        self.assertEqual(json.loads(first[0][6:])['city'], 'Near')
+        self.assertEqual(first[2:], ['event: cursor\ndata: {"next_cursor":"2"}', 'data: finished'])
+        # Die zweite Seite endet an max_stations, ohne weiteren Cursor
+        self.assertEqual([json.loads(e[6:])['station_id'] for e in second[:-1]], ['ST003'])
+        self.assertEqual(second[-1], 'data: finished')
+
+        # Ungültige Seitenangaben, darunter limit=0 (Seite ohne Fortschritt)
+        for query in ('&limit=0', '&limit=-1', '&cursor=-1', '&cursor=4'):
+            self.assertEqual(self.app.get(url + query).status_code, 400, msg=query)
+
+    def test_stats_endpoint(self):
+        response = self.app.get('/api/stats')
+        self.assertEqual(response.status_code, 200)
+        stats = response.get_json()['station_summaries']
+        for key in ('bytes', 'maxbytes', 'currsize', 'hits', 'misses', 'evictions'):
+            self.assertIn(key, stats)
+        self.assertIn('hits', response.get_json()['station_files'])
+
     def test_index(self):
         # Patch render_template so that we don't require a real template file.
         with patch('app.render_template', return_value="Index Page"):
@@ -358,23 +1975,23 @@ class IntegrationTests(unittest.TestCase):
         # Create a test client using the Flask application configured for testing.
         self.client = app.test_client()
         self.client.testing = True
+        self.server = FakeNOAAServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        patchers = [
+            patch('app.station_file_cache', StationFileCache(
+                tempfile.mkdtemp(), self.server.url + "/by_station/{station_id}.csv.gz")),
+            patch('app.read_station_table', return_value=station_table(('TEST', 45.0)))
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        aggregate_station_data.cache_clear()
 
-    def create_gzipped_csv(self, csv_data: str) -> io.BytesIO:
-        """
-        Helper function that creates a gzip-compressed in-memory CSV.
-        """
-        gzipped_csv = io.BytesIO()
-        with gzip.GzipFile(fileobj=gzipped_csv, mode='w') as gz:
-            gz.write(csv_data.encode('utf-8'))
-        gzipped_csv.seek(0)
-        return gzipped_csv
-
-    @patch('app.requests.get')
-    def test_api_station_data_integration(self, mock_get):
+    def test_api_station_data_integration(self):
         """
         Integration test for the /api/station_data endpoint.
 
-        This test patches the requests.get call to simulate fetching a gzip-compressed CSV file,
+        The gzip-compressed CSV file is served by a local fake NOAA server,
         then verifies that the endpoint returns JSON containing the expected keys.
         """
         csv_data = (
@@ -383,12 +2000,7 @@ class IntegrationTests(unittest.TestCase):
             "TEST,20210102,TMAX,260,,,,\n"
             "TEST,20210102,TMIN,60,,,,\n"
         )
-        gzipped_csv = self.create_gzipped_csv(csv_data)
-
-        fake_response = MagicMock()
-        fake_response.raw = gzipped_csv
-        fake_response.raise_for_status = MagicMock()
-        mock_get.return_value = fake_response
+        self.server.files['/by_station/TEST.csv.gz'] = gzip_bytes(csv_data)
 
         response = self.client.get(
             '/api/station_data?station_id=TEST&firstyear=2021&lastyear=2021&station_lat=45'
@@ -398,13 +2010,13 @@ class IntegrationTests(unittest.TestCase):
         self.assertIn("yearly_summary", data)
         self.assertIn("seasonal_summary", data)
 
-    @patch('app.requests.get')
-    def test_api_station_data_external_error(self, mock_get):
+    @patch('app.http_fetcher.session.request')
+    def test_api_station_data_external_error(self, mock_request):
         """
-        Simulate an external error (e.g. network failure) during the call to requests.get.
+        Simulate an external error (e.g. network failure) during the HTTP request.
         The endpoint should catch the exception and return an error with status code 500.
         """
-        mock_get.side_effect = Exception("Simulated external failure")
+        mock_request.side_effect = Exception("Simulated external failure")
         response = self.client.get(
             '/api/station_data?station_id=TEST&firstyear=2021&lastyear=2021&station_lat=45'
         )
@@ -413,7 +2025,7 @@ class IntegrationTests(unittest.TestCase):
         self.assertIn("error", data)
         self.assertIn("Simulated external failure", data["error"])
 
-    @patch('app.find_stations_within_radius')
+    @patch('app.iter_stations_within_radius')
     def test_api_find_stations_error(self, mock_find_stations):
         """
         Simulate an error in the station search logic.